@@ -9,13 +9,29 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 import streamlit as st
 
 from rag.config import UPLOAD_DIR, OLLAMA_MODEL
-from rag.document_loader import load_and_chunk, SUPPORTED_EXTENSIONS
-from rag.vector_store import add_documents, list_sources, get_document_count, clear_collection
-from rag.chain import ask_stream
+from rag.document_loader import iter_chunks, SUPPORTED_EXTENSIONS
+from rag.bulk_ingest import ingest_paths
+from rag.vector_store import (
+    replace_source,
+    delete_source,
+    list_source_info,
+    get_document_count,
+    clear_collection,
+)
+from rag.chain import ask_stream, warmup
 
 
 st.set_page_config(page_title="Local RAG Chatbot", page_icon="📄", layout="wide")
 
+
+@st.cache_resource
+def _start_warmup():
+    # Once per server process, not on every script rerun
+    warmup()
+
+
+_start_warmup()
+
 # --- Session state ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -33,40 +49,80 @@ with st.sidebar:
 
     if uploaded_files:
         if st.button("Ingest Documents", type="primary", use_container_width=True):
-            for uploaded_file in uploaded_files:
-                save_path = UPLOAD_DIR / uploaded_file.name
-                save_path.write_bytes(uploaded_file.getvalue())
+            names = [f.name for f in uploaded_files]
+            duplicates = sorted({name for name in names if names.count(name) > 1})
+            if duplicates:
+                # Uploads are saved and indexed by file name; one would overwrite the other
+                st.error(f"Several uploads share a file name, rename them first: {', '.join(duplicates)}")
+            else:
+                paths = []
+                UPLOAD_DIR.mkdir(exist_ok=True)
+                for uploaded_file in uploaded_files:
+                    save_path = UPLOAD_DIR / uploaded_file.name
+                    save_path.write_bytes(uploaded_file.getvalue())
+                    paths.append(save_path)
 
                 status_text = st.empty()
                 progress_bar = st.progress(0)
-
-                status_text.text(f"Chunking {uploaded_file.name}...")
-                chunks = load_and_chunk(str(save_path))
-                num_chunks = len(chunks)
-
-                status_text.text(f"Embedding & indexing {num_chunks} chunks...")
+                file_log = st.container()
+                status_text.text(f"Chunking & indexing {len(paths)} files...")
 
                 def update_progress(done, total):
                     progress_bar.progress(done / total)
-                    status_text.text(f"Indexing {uploaded_file.name}: {done}/{total} chunks")
+                    status_text.text(f"Indexing: {done}/{total} chunks")
 
-                count = add_documents(chunks, progress_callback=update_progress)
-                progress_bar.empty()
-                status_text.empty()
-                st.success(f"{uploaded_file.name}: {count} chunks indexed")
+                def file_done(event):
+                    if event["error"]:
+                        file_log.error(f"{event['source']}: {event['error']}")
+                    else:
+                        file_log.write(
+                            f"✓ {event['source']}: {event['chunks']} chunks "
+                            f"({event['files_done']}/{event['files_total']} files)"
+                        )
+
+                try:
+                    stats = ingest_paths(paths, progress_callback=update_progress, file_callback=file_done)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.success(
+                        f"{stats['chunks']} chunks from {stats['files'] - len(stats['failed'])} files indexed "
+                        f"in {stats['seconds']:.1f}s ({stats['chunks_per_second']:.0f} chunks/s), "
+                        f"{stats['unchanged']} unchanged, {stats['deleted']} stale chunks removed"
+                    )
+                finally:
+                    progress_bar.empty()
+                    status_text.empty()
 
     st.divider()
 
     # Status
     st.subheader("Status")
-    sources = list_sources()
+    sources = list_source_info()
     doc_count = get_document_count()
     st.metric("Total Chunks", doc_count)
 
     if sources:
         st.write("**Indexed Sources:**")
         for source in sources:
-            st.write(f"- {source}")
+            name = source["source"]
+            with st.expander(f"{name} ({source['chunks']} chunks)"):
+                replacement = st.file_uploader(
+                    "Replace with a new version",
+                    type=[Path(name).suffix.lstrip(".") or "txt"],
+                    key=f"replace_{name}",
+                )
+                if replacement and st.button("Replace", key=f"replace_btn_{name}", use_container_width=True):
+                    # Saved under the indexed name so the new chunks carry the same source
+                    UPLOAD_DIR.mkdir(exist_ok=True)
+                    save_path = UPLOAD_DIR / name
+                    save_path.write_bytes(replacement.getvalue())
+                    with st.spinner(f"Replacing {name}..."):
+                        replace_source(name, iter_chunks(str(save_path), content_ids=True))
+                    st.rerun()
+                if st.button("Delete", key=f"delete_{name}", use_container_width=True):
+                    delete_source(name)
+                    st.rerun()
     else:
         st.info("No documents indexed yet. Upload files above.")
 
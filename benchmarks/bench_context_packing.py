@@ -0,0 +1,108 @@
+"""Benchmark prompt size with and without token-budgeted context packing.
+
+Indexes the bundled ``data/sample.*`` documents twice (the second time under
+copied names, as when a file is re-uploaded under another name) in a BM25
+index, retrieves ``top_k`` chunks for each evaluation question, and compares
+the estimated prompt tokens of the legacy prompt (every chunk verbatim) with
+``build_prompt`` packing: dedup and merging only, then within the budget.
+No embedding model is needed. With ``--ollama`` the time to first token of
+the legacy and packed prompts is measured against the running Ollama.
+
+Usage:
+    python -m benchmarks.bench_context_packing [--top-k 5 10] [--budget 1500] [--ollama]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import DATA_DIR, banner
+from rag.chain import build_prompt
+from rag.config import CONTEXT_TOKEN_BUDGET, RAG_PROMPT_TEMPLATE
+from rag.context_packer import estimate_tokens
+from rag.document_loader import load_and_chunk
+from rag.lexical_index import LexicalIndex
+
+EVAL_DATASET = Path(__file__).resolve().parent.parent / "evaluation" / "eval_dataset.json"
+
+
+def _legacy_prompt(question: str, docs: list[dict]) -> str:
+    context = "\n\n---\n\n".join(f"[Source: {d['metadata']['source']}]\n{d['text']}" for d in docs)
+    return RAG_PROMPT_TEMPLATE.format(context=context, question=question)
+
+
+def _corpus() -> dict[str, dict]:
+    chunks = {}
+    for file in sorted(DATA_DIR.glob("sample.*")):
+        if file.suffix not in {".txt", ".csv", ".pdf"}:
+            continue
+        for chunk in load_and_chunk(str(file)):
+            chunks[chunk["id"]] = chunk
+            source = f"copy_of_{chunk['metadata']['source']}"
+            copy = {**chunk, "id": f"copy_of_{chunk['id']}", "metadata": {**chunk["metadata"], "source": source}}
+            chunks[copy["id"]] = copy
+    return chunks
+
+
+def _first_token_seconds(prompt: str) -> float:
+    from rag.llm import generate_stream
+
+    start = time.perf_counter()
+    stream = generate_stream(prompt)
+    next(stream)
+    elapsed = time.perf_counter() - start
+    stream.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--ollama", action="store_true", help="Also measure time to first token")
+    args = parser.parse_args()
+
+    questions = [q["question"] for q in json.loads(EVAL_DATASET.read_text())]
+    chunks = _corpus()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex(Path(tmp) / "lexical.sqlite3")
+        index.add(list(chunks.values()))
+
+        banner(f"CONTEXT PACKING — {len(chunks)} chunks, {len(questions)} questions, budget {args.budget}")
+        for top_k in args.top_k:
+            rows = {"legacy (all chunks verbatim)": [], "dedup + merge (no budget)": [], "packed (budget)": []}
+            pack_us = []
+            ttft = {"legacy": [], "packed": []}
+            for question in questions:
+                docs = [chunks[chunk_id] for chunk_id, _ in index.search(question, top_k)]
+                legacy = _legacy_prompt(question, docs)
+                start = time.perf_counter()
+                packed = build_prompt(question, docs, token_budget=args.budget)
+                pack_us.append((time.perf_counter() - start) * 1e6)
+                rows["legacy (all chunks verbatim)"].append(estimate_tokens(legacy))
+                rows["dedup + merge (no budget)"].append(estimate_tokens(build_prompt(question, docs, token_budget=0)))
+                rows["packed (budget)"].append(estimate_tokens(packed))
+                if args.ollama:
+                    ttft["legacy"].append(_first_token_seconds(legacy))
+                    ttft["packed"].append(_first_token_seconds(packed))
+
+            print(f"\n  top_k={top_k}   (estimated prompt tokens)")
+            baseline = np.mean(rows["legacy (all chunks verbatim)"])
+            for name, sizes in rows.items():
+                print(
+                    f"    {name:<30} mean {np.mean(sizes):7.0f}   max {np.max(sizes):6d}"
+                    f"   ({np.mean(sizes) / baseline:5.1%} of legacy)"
+                )
+            print(f"    packing time                   p50 {np.percentile(pack_us, 50):7.1f} us")
+            if args.ollama:
+                for name, samples in ttft.items():
+                    print(f"    time to first token ({name:<6})  p50 {np.percentile(samples, 50) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
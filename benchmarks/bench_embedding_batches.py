@@ -0,0 +1,101 @@
+"""Benchmark embedding throughput: fixed-count batches vs length-bucketed token budgets.
+
+Encodes a mixed-length corpus (the bundled ``data/sample.*`` chunks, scaled
+up: full TXT chunks, short CSV rows and PDF page chunks), split into the
+ingest pipeline's ``BATCH_SIZE`` batches in file order, three ways:
+
+* fixed, file order — 32 texts per forward pass in the order they arrive
+* fixed, sorted per call — ``model.encode`` on each pipeline batch (it
+  sorts the batch by length, then runs 32 texts per pass); the previous path
+* token-budgeted — ``rag.embeddings.encode_local``: texts sorted by length
+  and batched up to ``EMBEDDING_BATCH_TOKENS`` padded tokens
+
+Also reports the padded tokens each plan sends through the model (estimated
+as in ``rag.embedding_batches``) and checks that the bucketed vectors come
+back in input order.
+
+Usage:
+    python -m benchmarks.bench_embedding_batches [--chunks 4000] [--budget 8192]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import banner, sample_chunks
+from rag.config import BATCH_SIZE, EMBEDDING_BATCH_TOKENS, NORMALIZE_EMBEDDINGS
+from rag.embedding_batches import estimate_lengths, padded_tokens, plan_batches
+from rag.embeddings import get_model
+
+_FIXED = 32  # SentenceTransformer.encode's default batch size
+
+
+def _fixed_in_order(n: int) -> list[np.ndarray]:
+    return [np.arange(i, min(i + _FIXED, n)) for i in range(0, n, _FIXED)]
+
+
+def _fixed_sorted(lengths: np.ndarray) -> list[np.ndarray]:
+    order = np.argsort(-lengths, kind="stable")
+    return [order[i : i + _FIXED] for i in range(0, len(order), _FIXED)]
+
+
+def _encode(model, texts: list[str], plan: list[np.ndarray]) -> np.ndarray:
+    out = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    for batch in plan:
+        out[batch] = model.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            normalize_embeddings=NORMALIZE_EMBEDDINGS,
+        )
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Pipeline batch (texts per encode call)")
+    parser.add_argument("--budget", type=int, default=EMBEDDING_BATCH_TOKENS or 8192, help="Padded tokens per pass")
+    args = parser.parse_args()
+
+    texts = [c["text"] for c in sample_chunks(args.chunks)]
+    model = get_model()
+    max_len = model.get_max_seq_length()
+    calls = [texts[i : i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    lengths = [estimate_lengths(call, max_len) for call in calls]
+    all_lengths = np.concatenate(lengths)
+    print(
+        f"{len(texts):,} chunks in {len(calls)} calls of {args.batch_size}; estimated tokens "
+        f"p10 {np.percentile(all_lengths, 10):.0f} / p50 {np.percentile(all_lengths, 50):.0f} / max {all_lengths.max()}"
+    )
+
+    modes = {
+        "fixed, file order": lambda l: _fixed_in_order(len(l)),
+        "fixed, sorted per call": _fixed_sorted,
+        f"token-budgeted ({args.budget})": lambda l: plan_batches(l, args.budget),
+    }
+    banner(f"EMBEDDING BATCHES — {model.__class__.__name__}, {max_len} max tokens")
+    _encode(model, calls[0][:_FIXED], _fixed_in_order(min(_FIXED, len(calls[0]))))
+    results = {}
+    baseline = None
+    for name, planner in modes.items():
+        plans = [planner(l) for l in lengths]
+        tokens = sum(padded_tokens(l, p) for l, p in zip(lengths, plans))
+        passes = sum(len(p) for p in plans)
+        start = time.perf_counter()
+        results[name] = np.concatenate([_encode(model, call, plan) for call, plan in zip(calls, plans)])
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"  {name:<26} {len(texts) / elapsed:8.1f} texts/s   {baseline / elapsed:5.2f}x   "
+            f"padded tokens {tokens:>10,}   passes {passes:>5}"
+        )
+
+    first, *rest = results.values()
+    drift = max(float(np.abs(first - other).max()) for other in rest)
+    print(f"  max |difference| between modes: {drift:.2e} (rows returned in input order)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the ndarray embedding path against the legacy ``.tolist()`` path.
+
+Uses random float32 vectors shaped like MiniLM output (no model needed) so
+only the conversion and store-write overhead is measured:
+
+* legacy  — ``encode(...).tolist()`` nested lists handed to Chroma, which
+  converts them back to float32 arrays
+* ndarray — the float32 matrix handed to Chroma as-is
+
+Usage:
+    python -m benchmarks.bench_embedding_path [--batches 20] [--batch-size 256] [--dim 384]
+"""
+
+import argparse
+import tracemalloc
+
+import chromadb
+import numpy as np
+from chromadb.api.types import normalize_embeddings
+
+from benchmarks.common import banner, timed
+
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _upsert_all(collection, batches: list[np.ndarray], as_lists: bool):
+    for b, vectors in enumerate(batches):
+        ids = [f"{b}_{i}" for i in range(len(vectors))]
+        collection.upsert(ids=ids, embeddings=vectors.tolist() if as_lists else vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    batch = rng.standard_normal((args.batch_size, args.dim), dtype=np.float32)
+    batches = [rng.standard_normal((args.batch_size, args.dim), dtype=np.float32) for _ in range(args.batches)]
+
+    banner(f"EMBEDDING PATH — {args.batch_size} x {args.dim} float32 per batch")
+
+    print("Per-batch conversion (encoder output -> store-ready embeddings):")
+    for name, fn in [
+        ("legacy ", lambda: normalize_embeddings(batch.tolist())),
+        ("ndarray", lambda: normalize_embeddings(batch)),
+    ]:
+        elapsed, _ = timed(fn, repeat=20)
+        print(f"  {name}  {elapsed * 1000:8.2f} ms   peak {_peak_bytes(fn) / 1024:9.1f} KiB")
+
+    print(f"\nUpsert {args.batches} batches into an in-memory Chroma collection:")
+    client = chromadb.EphemeralClient()
+    for name, as_lists in [("legacy ", True), ("ndarray", False)]:
+        collection = client.get_or_create_collection(f"bench_{name.strip()}", embedding_function=None)
+        elapsed, _ = timed(_upsert_all, collection, batches, as_lists)
+        peak = _peak_bytes(lambda: _upsert_all(collection, batches[:1], as_lists))
+        print(f"  {name}  {elapsed * 1000:8.1f} ms total   peak/batch {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
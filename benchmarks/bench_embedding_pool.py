@@ -0,0 +1,50 @@
+"""Benchmark embedding throughput from 1 to N worker processes.
+
+Encodes the same scaled-up sample corpus in-process and then with
+``EmbeddingPool`` at 1, 2, 4, ... workers (up to ``--max-workers``), and reports texts/second and
+speedup over the in-process baseline.
+
+Usage:
+    python -m benchmarks.bench_embedding_pool [--texts 4096] [--max-workers 8] [--threads 1]
+"""
+
+import argparse
+import os
+
+from benchmarks.common import banner, sample_texts, timed
+from rag.config import BATCH_SIZE
+from rag.embedding_pool import EmbeddingPool
+from rag.embeddings import get_model
+
+
+def _encode_in_batches(encode, texts: list[str]):
+    for i in range(0, len(texts), BATCH_SIZE):
+        encode(texts[i : i + BATCH_SIZE])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=4096)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    args = parser.parse_args()
+
+    texts = sample_texts(args.texts)
+    banner(f"EMBEDDING POOL SCALING — {len(texts)} texts, batch {BATCH_SIZE}")
+
+    model = get_model()
+    model.encode(texts[:BATCH_SIZE])  # warm up
+    baseline, _ = timed(_encode_in_batches, lambda b: model.encode(b, convert_to_numpy=True), texts)
+    print(f"  in-process      {len(texts) / baseline:9.1f} texts/s   1.00x")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with EmbeddingPool(workers, args.threads) as pool:
+            pool.warmup()
+            elapsed, _ = timed(_encode_in_batches, pool.encode, texts)
+        print(f"  {workers:3d} worker(s)   {len(texts) / elapsed:9.1f} texts/s   {baseline / elapsed:.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark BM25 lookup latency of the persistent lexical index at scale.
+
+Builds an index of synthetic chunks (sample-corpus words plus one unique
+SKU per chunk) in adds of 1,000, waits for the background merges to
+finish, and measures query latency for exact-code lookups and for
+mixed keyword queries.
+
+Usage:
+    python -m benchmarks.bench_lexical_index [--chunks 1000000] [--queries 1000]
+"""
+
+import argparse
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import banner, sample_texts
+from rag.lexical_index import LexicalIndex
+
+
+def _percentiles(samples: list[float]) -> str:
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):.3f} ms   p99 {np.percentile(ms, 99):.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--chunk-words", type=int, default=120)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocab = sorted({w for t in sample_texts(200) for w in re.findall(r"[a-z]{3,}", t.lower())})
+
+    banner(f"LEXICAL INDEX — {args.chunks:,} chunks, {len(vocab)} word vocabulary")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex(Path(tmp) / "lexical.sqlite3")
+        start = time.perf_counter()
+        for base in range(0, args.chunks, 1000):
+            index.add([
+                {
+                    "id": f"chunk_{i}",
+                    "text": " ".join(rng.choices(vocab, k=args.chunk_words)) + f" SKU-{i:07d}",
+                }
+                for i in range(base, min(base + 1000, args.chunks))
+            ])
+        build = time.perf_counter() - start
+        print(f"  build: {build:.1f} s ({args.chunks / build:,.0f} chunks/s)")
+        start = time.perf_counter()
+        index.merge()
+        drain = time.perf_counter() - start
+        size = (Path(tmp) / "lexical.sqlite3").stat().st_size
+        print(f"  pending background merges drained in {drain:.1f} s, {size / 2**20:.1f} MiB on disk")
+
+        for name, make_query in [
+            ("exact SKU   ", lambda: f"SKU-{rng.randrange(args.chunks):07d}"),
+            ("SKU + words ", lambda: f"{' '.join(rng.choices(vocab, k=2))} SKU-{rng.randrange(args.chunks):07d}"),
+            ("3 words     ", lambda: " ".join(rng.choices(vocab, k=3))),
+        ]:
+            queries = [make_query() for _ in range(args.queries)]
+            latencies = []
+            for q in queries:
+                t0 = time.perf_counter()
+                index.search(q, top_k=20)
+                latencies.append(time.perf_counter() - t0)
+            print(f"  {name} {_percentiles(latencies)}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
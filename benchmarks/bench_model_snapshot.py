@@ -0,0 +1,135 @@
+"""Benchmark embedding model load time and per-worker memory: hub load vs snapshot.
+
+Load time is measured in fresh interpreters (library imports excluded and
+reported separately), for ``SentenceTransformer(name)`` and for the
+memory-mapped ``rag.model_snapshot.load_snapshot``. Memory is measured by
+starting ``--workers`` processes that each load the model and encode once,
+then reading ``/proc/<pid>/smaps_rollup``: RSS counts shared pages in every
+process, PSS splits them between the sharers, and private is what each
+worker holds alone. Linux only for the memory section.
+
+Usage:
+    python -m benchmarks.bench_model_snapshot [--workers 4] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import banner
+from rag.config import EMBEDDING_MODEL
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import torch, sentence_transformers
+from rag.model_snapshot import load_snapshot
+imported = time.perf_counter()
+if {snapshot!r}:
+    model = load_snapshot({snapshot!r})
+else:
+    model = sentence_transformers.SentenceTransformer({model!r}, device="cpu")
+loaded = time.perf_counter()
+model.encode(["warm up the model"])
+encoded = time.perf_counter()
+print(json.dumps({{"import": imported - start, "load": loaded - imported, "encode": encoded - loaded}}), flush=True)
+if {hold}:
+    sys.stdin.read()
+"""
+
+
+def _env() -> dict:
+    return {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")])}
+
+
+def _code(model: str, snapshot: str | None, hold: bool) -> str:
+    return _PROBE.format(model=model, snapshot=snapshot, hold=hold)
+
+
+def _memory_kib(pid: int) -> dict[str, int]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _load_times(model: str, snapshot: str, repeat: int):
+    banner(f"LOAD TIME — {model}, fresh interpreter, median of {repeat}")
+    for name, path in [("SentenceTransformer()", None), ("snapshot (mmap)", snapshot)]:
+        runs = [
+            json.loads(
+                subprocess.run(
+                    [sys.executable, "-c", _code(model, path, False)],
+                    capture_output=True, text=True, env=_env(), check=True,
+                ).stdout
+            )
+            for _ in range(repeat)
+        ]
+        load = statistics.median(r["load"] for r in runs)
+        encode = statistics.median(r["encode"] for r in runs)
+        imports = statistics.median(r["import"] for r in runs)
+        print(f"  {name:<24} load {load * 1000:8.1f} ms   first encode {encode * 1000:7.1f} ms   (imports {imports:.2f} s)")
+
+
+def _worker_memory(model: str, snapshot: str, workers: int):
+    banner(f"MEMORY — {workers} resident workers per mode")
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("  /proc/<pid>/smaps_rollup not available; skipped")
+        return
+    for name, path in [("SentenceTransformer()", None), ("snapshot (mmap)", snapshot)]:
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-c", _code(model, path, True)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=_env(),
+            )
+            for _ in range(workers)
+        ]
+        try:
+            for proc in procs:
+                proc.stdout.readline()
+            usage = [_memory_kib(proc.pid) for proc in procs]
+        finally:
+            for proc in procs:
+                proc.stdin.close()
+                proc.wait()
+        per = {key: statistics.mean(u[key] for u in usage) / 1024 for key in ("rss", "pss", "private")}
+        total = sum(u["pss"] for u in usage) / 1024
+        print(
+            f"  {name:<24} per worker: RSS {per['rss']:7.1f} MiB   PSS {per['pss']:7.1f} MiB   "
+            f"private {per['private']:7.1f} MiB   total PSS {total:7.1f} MiB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from rag.model_snapshot import load_model, snapshot_path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        load_model(args.model, tmp)
+        snapshot = str(snapshot_path(args.model, tmp))
+        print(f"Snapshot: {Path(snapshot).name} ({Path(snapshot).stat().st_size / 2**20:.1f} MiB)")
+        _load_times(args.model, snapshot, args.repeat)
+        _worker_memory(args.model, snapshot, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the streaming, parallel PDF loader against LangChain's PyPDFLoader.
+
+Writes a long PDF from the sample text, then chunks it with:
+
+* legacy    — ``PyPDFLoader(path).load()`` + ``split_documents`` (every page
+  and chunk held in memory at once)
+* streaming — ``iter_chunks`` consumed one chunk at a time, pages extracted
+  by ``PDF_WORKERS`` processes within a ``PDF_PAGE_WINDOW`` window
+
+Peak memory is the main process's Python allocations (tracemalloc, measured
+in a separate run so tracing does not skew the timings).
+
+The legacy path needs ``langchain-community``, which the app itself does not
+use (``pip install langchain-community``).
+
+Usage:
+    python -m benchmarks.bench_pdf_loader [--pages 1000] [--workers 4] [--window 64]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from benchmarks.common import banner, sample_texts, write_text_pdf
+from rag import document_loader
+
+
+def _measure(fn) -> tuple[float, int, int]:
+    """Time an untraced run, then take peak memory from a second, traced run."""
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def _legacy(path: str) -> int:
+    pages = PyPDFLoader(path).load()
+    return len(document_loader.get_splitter().split_documents(pages))
+
+
+def _streaming(path: str) -> int:
+    return sum(1 for _ in document_loader.iter_chunks(path))
+
+
+def _run_streaming(path: str, workers: int, window: int) -> int:
+    with patch.object(document_loader, "PDF_WORKERS", workers), patch.object(document_loader, "PDF_PAGE_WINDOW", window):
+        return _streaming(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=document_loader.PDF_WORKERS)
+    parser.add_argument("--window", type=int, default=document_loader.PDF_PAGE_WINDOW)
+    parser.add_argument("--lines-per-page", type=int, default=60)
+    args = parser.parse_args()
+
+    lines = [line for text in sample_texts(50) for line in text.splitlines() if line.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "long_report.pdf"
+        write_text_pdf(path, [
+            [lines[(p * args.lines_per_page + i) % len(lines)] for i in range(args.lines_per_page)]
+            for p in range(args.pages)
+        ])
+
+        banner(f"PDF LOADER — {args.pages:,} pages ({path.stat().st_size / 1e6:.1f} MB)")
+        rows = [("legacy PyPDFLoader", lambda: _legacy(str(path)))]
+        for workers in sorted({1, args.workers}):
+            rows.append((
+                f"streaming, {workers} worker(s)",
+                lambda w=workers: _run_streaming(str(path), w, args.window),
+            ))
+        for name, fn in rows:
+            elapsed, peak, count = _measure(fn)
+            print(f"  {name:<26} {elapsed:7.2f} s   {count / elapsed:9.0f} chunks/s   peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark memory, recall@k and latency of quantized flat-index storage.
+
+Builds ``FlatIndex`` in each storage mode from the same synthetic corpus and
+compares the bytes per vector that every query scans (what must stay in RAM),
+recall@k against an exact float32 ranking, and query latency. The corpus
+has low-rank structure (random latent factors plus noise), like sentence
+embeddings, so neighbours are graded rather than equidistant. No embedding
+model is needed.
+
+Usage:
+    python -m benchmarks.bench_quantization [--chunks 200000] [--queries 200] [--k 10] [--scale 5000000]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import banner
+from rag.flat_index import FlatIndex
+
+_UPSERT_BATCH = 10_000
+_MODES = [
+    ("float32", "none", 0),
+    ("int8", "int8", 0),
+    ("int8 + rescore x4", "int8", 4),
+    ("binary", "binary", 0),
+    ("binary + rescore x4", "binary", 4),
+    ("binary + rescore x10", "binary", 10),
+]
+
+
+def _corpus(n: int, dim: int, rank: int, rng: np.random.Generator, basis: np.ndarray) -> np.ndarray:
+    vectors = rng.standard_normal((n, rank), dtype=np.float32) @ basis.T
+    vectors += 0.5 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _scanned_bytes(quantization: str, dim: int) -> int:
+    return {"none": 4 * dim, "int8": dim + 4, "binary": (dim + 7) // 8}[quantization]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--rank", type=int, default=24, help="Latent dimensions of the synthetic corpus")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--scale", type=int, default=5_000_000, help="Chunk count for the projected RAM column")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    basis = rng.standard_normal((args.dim, args.rank), dtype=np.float32)
+    vectors = _corpus(args.chunks, args.dim, args.rank, rng, basis)
+    queries = _corpus(args.queries, args.dim, args.rank, rng, basis)
+    ids = [f"chunk_{i}" for i in range(args.chunks)]
+    truth = [set(np.argpartition(-(vectors @ q), args.k)[: args.k]) for q in queries]
+
+    banner(f"QUANTIZATION — {args.chunks:,} x {args.dim} vectors, {args.queries} queries, k={args.k}")
+    print(f"  {'mode':<22}{'B/vec':>7}{f'RAM @ {args.scale / 1e6:g}M':>12}{'recall':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        built: dict[str, FlatIndex] = {}
+        for name, quantization, rescore in _MODES:
+            if quantization not in built:
+                index = FlatIndex(f"{tmp}/{quantization}", quantization)
+                for i in range(0, args.chunks, _UPSERT_BATCH):
+                    index.upsert(ids=ids[i : i + _UPSERT_BATCH], embeddings=vectors[i : i + _UPSERT_BATCH])
+                built[quantization] = index
+            index = built[quantization]
+            index.rescore = rescore
+
+            index.query(query_embeddings=queries[:1], n_results=args.k)
+            latencies = np.empty(args.queries)
+            hits = 0
+            for i, q in enumerate(queries):
+                start = time.perf_counter()
+                result = index.query(query_embeddings=q[None, :], n_results=args.k, include=[])
+                latencies[i] = time.perf_counter() - start
+                hits += len({int(c[6:]) for c in result["ids"][0]} & truth[i])
+
+            per_vector = _scanned_bytes(quantization, args.dim)
+            ms = latencies * 1000
+            print(
+                f"  {name:<22}{per_vector:>7}{per_vector * args.scale / 2**30:>9.2f} GiB"
+                f"{hits / (args.k * args.queries):>9.3f}{np.percentile(ms, 50):>9.2f}{np.percentile(ms, 99):>9.2f}"
+            )
+    print(
+        "  (quantized modes also keep float32 vectors on disk; rescoring reads only the shortlisted rows)"
+    )
+
+
+if __name__ == "__main__":
+    main()
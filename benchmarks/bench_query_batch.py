@@ -0,0 +1,61 @@
+"""Benchmark retrieval for many questions: one ``query`` per question vs ``query_batch``.
+
+Indexes ``--chunks`` sample chunks in a temporary store, then retrieves for
+``--questions`` distinct questions (evaluation questions with a numeric
+suffix, so the query cache never hits) both ways. Generation is not timed.
+
+Usage:
+    python -m benchmarks.bench_query_batch [--chunks 5000] [--questions 2000] [--batch 256]
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import banner, sample_chunks, timed
+import rag.vector_store as vector_store
+
+EVAL_DATASET = Path(__file__).resolve().parent.parent / "evaluation" / "eval_dataset.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    base = [q["question"] for q in json.loads(EVAL_DATASET.read_text())]
+    questions = [f"{base[i % len(base)]} ({i})" for i in range(args.questions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vector_store.CHROMA_DB_DIR = tmp
+        vector_store._client = vector_store._collection = vector_store._count = None
+        vector_store._lexical_index = vector_store._source_catalog = None
+        vector_store.LEXICAL_INDEX_PATH = str(Path(tmp) / "lexical.sqlite3")
+        vector_store.SOURCE_CATALOG_PATH = str(Path(tmp) / "sources.sqlite3")
+        vector_store.add_documents(sample_chunks(args.chunks))
+
+        def single():
+            return [vector_store.query(q, top_k=args.top_k) for q in questions]
+
+        def batched():
+            results = []
+            for start in range(0, len(questions), args.batch):
+                results.extend(vector_store.query_batch(questions[start:start + args.batch], top_k=args.top_k))
+            return results
+
+        banner(f"QUERY BATCH — {args.chunks:,} chunks, {args.questions:,} questions, batch {args.batch}")
+        rows = []
+        for name, fn in [("query per question", single), ("query_batch", batched)]:
+            vector_store.get_query_cache().bump_version()
+            seconds, results = timed(fn)
+            rows.append(results)
+            print(f"  {name:<20} {seconds:8.2f} s   {args.questions / seconds:8.0f} questions/s")
+        print(f"  identical results: {rows[0] == rows[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark per-query overhead before the ANN search in ``rag.vector_store``.
+
+Compares the legacy path (``get_or_create_collection`` with a fresh
+embedding function, then ``count()`` twice) with the cached collection
+handle and in-memory chunk count. The ANN search itself is timed for
+reference. Random unit vectors stand in for embeddings, so no model is
+needed.
+
+Usage:
+    python -m benchmarks.bench_query_overhead [--chunks 20000] [--queries 500]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import banner
+import rag.vector_store as vector_store
+from rag.config import CHROMA_COLLECTION
+from rag.embeddings import LocalEmbeddingFunction
+
+
+def _legacy_overhead() -> int:
+    collection = vector_store.get_client().get_or_create_collection(
+        name=CHROMA_COLLECTION,
+        embedding_function=LocalEmbeddingFunction(),
+        metadata={"hnsw:space": "cosine"},
+    )
+    collection.count()
+    return collection.count()
+
+
+def _cached_overhead() -> int:
+    vector_store.get_collection()
+    return vector_store.get_document_count()
+
+
+def _per_call_us(fn, n: int) -> tuple[float, float]:
+    samples = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    us = samples * 1e6
+    return np.percentile(us, 50), np.percentile(us, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        vector_store.CHROMA_DB_DIR = tmp
+        vector_store._client = None
+        vector_store._collection = None
+        vector_store._count = None
+
+        collection = vector_store.get_collection()
+        for start in range(0, args.chunks, 5000):
+            n = min(5000, args.chunks - start)
+            vectors = rng.standard_normal((n, args.dim), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            collection.upsert(ids=[f"chunk_{start + i}" for i in range(n)], embeddings=vectors)
+        query_vector = rng.standard_normal((1, args.dim), dtype=np.float32)
+
+        banner(f"QUERY OVERHEAD — {args.chunks:,} chunks, {args.queries} queries")
+        rows = [
+            ("legacy (get_or_create + 2x count)", _legacy_overhead),
+            ("cached handle + in-memory count", _cached_overhead),
+            ("ANN search (reference)", lambda: collection.query(query_embeddings=query_vector, n_results=5)),
+        ]
+        for name, fn in rows:
+            fn()
+            p50, p99 = _per_call_us(fn, args.queries)
+            print(f"  {name:<36} p50 {p50:9.1f} us   p99 {p99:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
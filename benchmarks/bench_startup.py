@@ -0,0 +1,113 @@
+"""Benchmark cold-start cost: import time per ``rag`` module, then warmup.
+
+Each import runs in a fresh interpreter, so it includes everything that
+module pulls in, and the report lists which heavy libraries were loaded
+(with lazy imports there should be none). The last section times
+``rag.chain.warmup(background=False)``, the model load, dummy encode and
+store open that the first request would otherwise pay. ``--importtime``
+prints the slowest entries of ``python -X importtime`` for one module.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5] [--importtime rag.server]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import banner
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+MODULES = [
+    "rag.config",
+    "rag.document_loader",
+    "rag.embeddings",
+    "rag.vector_store",
+    "rag.llm",
+    "rag.chain",
+    "rag.bulk_ingest",
+    "rag.server",
+]
+HEAVY = ["chromadb", "sentence_transformers", "torch", "openai", "httpx", "langchain_text_splitters", "pypdf"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_WARMUP_PROBE = """
+import json, time
+import rag.chain
+start = time.perf_counter()
+rag.chain.warmup(background=False)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def _env() -> dict:
+    return {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")])}
+
+
+def _probe(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, env=_env(), check=True)
+
+
+def _import_times(repeat: int):
+    banner(f"IMPORT TIME — fresh interpreter per import, median of {repeat}")
+    baseline = statistics.median(
+        json.loads(_probe(_IMPORT_PROBE.format(module="json", heavy=HEAVY)).stdout)["seconds"] for _ in range(repeat)
+    )
+    for module in MODULES:
+        runs = [json.loads(_probe(_IMPORT_PROBE.format(module=module, heavy=HEAVY)).stdout) for _ in range(repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs) - baseline
+        heavy = ", ".join(runs[0]["heavy"]) or "-"
+        print(f"  {module:<22}{seconds * 1000:>9.1f} ms   heavy libraries loaded: {heavy}")
+
+
+def _warmup_time():
+    banner("WARMUP — rag.chain.warmup(background=False) after import")
+    try:
+        seconds = json.loads(_probe(_WARMUP_PROBE).stdout)["seconds"]
+    except subprocess.CalledProcessError as e:
+        print(f"  warmup failed: {e.stderr.strip().splitlines()[-1]}")
+        return
+    print(f"  model load + dummy encode + store open: {seconds:.2f} s (moved off the first request)")
+
+
+def _importtime(module: str, top: int):
+    banner(f"python -X importtime — slowest {top} imports under {module}")
+    stderr = _probe(f"import {module}", "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", metavar="MODULE", help="Also show the -X importtime breakdown for MODULE")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warmup timing (needs the embedding model)")
+    args = parser.parse_args()
+
+    _import_times(args.repeat)
+    if args.importtime:
+        _importtime(args.importtime, args.top)
+    if not args.no_warmup:
+        _warmup_time()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark peak memory of streaming TXT/CSV chunking against building the full list.
+
+Scales ``data/sample.txt`` and ``data/sample.csv`` up to ``--mb`` megabytes
+and chunks each file with ``load_and_chunk`` (every chunk held at once) and
+with ``iter_chunks`` consumed one chunk at a time. Peak memory is Python
+allocations (tracemalloc).
+
+Usage:
+    python -m benchmarks.bench_streaming_loader [--mb 100]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import DATA_DIR, banner
+from rag.document_loader import iter_chunks, load_and_chunk
+
+
+def _scaled_copy(src: Path, dest: Path, target_bytes: int, skip_header: bool):
+    lines = src.read_text(encoding="utf-8").splitlines(keepends=True)
+    header, body = (lines[:1], lines[1:]) if skip_header else ([], lines)
+    block = "".join(body)
+    with open(dest, "w", encoding="utf-8") as f:
+        f.writelines(header)
+        written = 0
+        while written < target_bytes:
+            f.write(block)
+            written += len(block)
+
+
+def _measure(fn) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=int, default=100)
+    args = parser.parse_args()
+
+    banner(f"STREAMING LOADER — {args.mb} MB files")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("sample.txt", "sample.csv"):
+            path = Path(tmp) / f"big_{name}"
+            _scaled_copy(DATA_DIR / name, path, args.mb * 2**20, skip_header=name.endswith(".csv"))
+            print(f"{name}:")
+            for label, fn in [
+                ("load_and_chunk", lambda: len(load_and_chunk(str(path)))),
+                ("iter_chunks   ", lambda: sum(1 for _ in iter_chunks(str(path)))),
+            ]:
+                elapsed, peak, count = _measure(fn)
+                print(f"  {label}  {count:>9,} chunks  {elapsed:7.2f} s   peak {peak / 2**20:9.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark recall and latency of the Chroma (HNSW) and flat NumPy vector backends.
+
+Builds each backend from the same synthetic corpus (clustered unit vectors,
+so near neighbours are not trivially separated), then runs the same queries
+one at a time and as one batch. Recall@k is measured against an exact
+float32 brute-force ranking. No embedding model is needed.
+
+Usage:
+    python -m benchmarks.bench_vector_backends [--chunks 100000] [--queries 500] [--k 10]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from benchmarks.common import banner
+from rag.flat_index import FlatIndex
+
+_UPSERT_BATCH = 5000
+
+
+def _corpus(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((max(n // 200, 1), dim), dtype=np.float32)
+    vectors = centers[rng.integers(len(centers), size=n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _dir_mib(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = _corpus(args.chunks, args.dim, rng)
+    queries = _corpus(args.queries, args.dim, rng)
+    ids = [f"chunk_{i}" for i in range(args.chunks)]
+    truth = [set(np.argpartition(-(vectors @ q), args.k)[: args.k]) for q in queries]
+
+    banner(f"VECTOR BACKENDS — {args.chunks:,} x {args.dim} vectors, {args.queries} queries, k={args.k}")
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "chroma (HNSW)": lambda: chromadb.PersistentClient(path=f"{tmp}/chroma").get_or_create_collection(
+                "bench", metadata={"hnsw:space": "cosine"}
+            ),
+            "flat float32": lambda: FlatIndex(f"{tmp}/flat_f32"),
+            "flat int8": lambda: FlatIndex(f"{tmp}/flat_i8", "int8"),
+        }
+        for (name, make), path in zip(backends.items(), ["chroma", "flat_f32", "flat_i8"]):
+            backend = make()
+            start = time.perf_counter()
+            for i in range(0, args.chunks, _UPSERT_BATCH):
+                backend.upsert(
+                    ids=ids[i : i + _UPSERT_BATCH],
+                    embeddings=vectors[i : i + _UPSERT_BATCH],
+                    metadatas=[{"source": "bench"}] * len(ids[i : i + _UPSERT_BATCH]),
+                )
+            build = time.perf_counter() - start
+
+            backend.query(query_embeddings=queries[:1], n_results=args.k)
+            latencies = np.empty(args.queries)
+            hits = 0
+            for i, q in enumerate(queries):
+                start = time.perf_counter()
+                result = backend.query(query_embeddings=q[None, :], n_results=args.k)
+                latencies[i] = time.perf_counter() - start
+                hits += len({int(c[6:]) for c in result["ids"][0]} & truth[i])
+            start = time.perf_counter()
+            backend.query(query_embeddings=queries, n_results=args.k)
+            batch = time.perf_counter() - start
+
+            ms = latencies * 1000
+            print(
+                f"  {name:<14} recall@{args.k} {hits / (args.k * args.queries):6.3f}   "
+                f"p50 {np.percentile(ms, 50):7.2f} ms   p99 {np.percentile(ms, 99):7.2f} ms   "
+                f"batch {args.queries / batch:8.0f} q/s   build {build:6.1f} s   "
+                f"disk {_dir_mib(Path(tmp) / path):7.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
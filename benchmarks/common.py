@@ -0,0 +1,88 @@
+"""Shared helpers for the benchmark scripts."""
+
+import sys
+import time
+from pathlib import Path
+
+# Ensure src/ is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from rag.document_loader import load_and_chunk
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def sample_chunks(n: int) -> list[dict]:
+    """Return ``n`` chunks built by repeating the bundled ``data/sample.*`` chunks.
+
+    Each repetition gets a distinct suffix so IDs and texts stay unique (and
+    embedding caches cannot short-circuit the benchmark).
+    """
+    base = []
+    for file in sorted(DATA_DIR.glob("sample.*")):
+        if file.suffix in {".txt", ".csv", ".pdf"}:
+            base.extend(load_and_chunk(str(file)))
+
+    chunks = []
+    for i in range(n):
+        src = base[i % len(base)]
+        copy = i // len(base)
+        chunks.append({
+            "id": f"{src['id']}__copy_{copy}",
+            "text": f"{src['text']} [{copy}]",
+            "metadata": {**src["metadata"], "copy": copy},
+        })
+    return chunks
+
+
+def sample_texts(n: int) -> list[str]:
+    """Return ``n`` unique texts from ``sample_chunks``."""
+    return [c["text"] for c in sample_chunks(n)]
+
+
+def write_text_pdf(path: Path, pages: list[list[str]]):
+    """Write a plain PDF with the given text lines on each page (no extra dependencies)."""
+
+    def escape(line: str) -> bytes:
+        line = line.encode("latin-1", "replace").decode("latin-1")
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+    objects = [b"<</Type/Catalog/Pages 2 0 R>>", None, b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>"]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 9 Tf 11 TL 40 760 Td " + b" ".join(b"(%s) Tj T*" % escape(l) for l in lines) + b" ET"
+        objects.append(b"<</Length %d>>stream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<</Type/Page/MediaBox[0 0 612 792]/Parent 2 0 R/Resources<</Font<</F1 3 0 R>>>>/Contents %d 0 R>>"
+            % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<</Type/Pages/Kids[%s]/Count %d>>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj%sendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer<</Size %d/Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def timed(fn, *args, repeat: int = 1, **kwargs) -> tuple[float, object]:
+    """Run ``fn`` ``repeat`` times; return (best wall-clock seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def banner(title: str):
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
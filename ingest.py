@@ -0,0 +1,12 @@
+"""Bulk ingest entry point for the Local RAG Chatbot (see rag.bulk_ingest)."""
+
+import sys
+from pathlib import Path
+
+# Ensure src/ is on the Python path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from rag.bulk_ingest import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""HTTP API entry point for the Local RAG Chatbot (see rag.server)."""
+
+import sys
+from pathlib import Path
+
+# Ensure src/ is on the Python path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from rag.server import main
+
+if __name__ == "__main__":
+    main()
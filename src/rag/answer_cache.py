@@ -0,0 +1,113 @@
+"""Semantic answer cache: reuse LLM answers for near-duplicate questions."""
+
+import hashlib
+import threading
+
+import numpy as np
+
+
+def context_fingerprint(context_docs: list[dict]) -> str:
+    """Return a digest of the retrieved chunk set (order-insensitive)."""
+    parts = sorted(f"{d['metadata'].get('source', 'unknown')}\x1e{d['text']}" for d in context_docs)
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding and the fingerprint of their context.
+
+    A lookup hits when a stored question has cosine similarity of at least
+    ``threshold`` with the new one *and* retrieval returned the same chunk
+    set; if the chunks changed, the stale entry is dropped. Holds at most
+    ``capacity`` entries, evicting the least recently used.
+    """
+
+    def __init__(self, threshold: float, capacity: int):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._vectors: np.ndarray | None = None  # (n, dim) unit vectors
+        self._entries: list[dict] = []
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, index: int):
+        del self._entries[index]
+        self._vectors = np.delete(self._vectors, index, axis=0)
+
+    def lookup(self, question_vector: np.ndarray, fingerprint: str) -> dict | None:
+        """Return the cached entry (answer, sources, num_chunks) for a similar question."""
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores = self._vectors @ self._unit(question_vector)
+            fresh = np.array([e["fingerprint"] == fingerprint for e in self._entries])
+            best = int(np.argmax(np.where(fresh, scores, -np.inf)))
+            if not fresh[best] or scores[best] < self.threshold:
+                closest = int(np.argmax(scores))
+                if scores[closest] >= self.threshold:
+                    # Same question, different chunks: the stored answer is stale
+                    self._remove(closest)
+                self.misses += 1
+                return None
+            entry = self._entries[best]
+            self._tick += 1
+            entry["last_used"] = self._tick
+            self.hits += 1
+            self.saved_seconds += entry["generation_seconds"]
+            return entry
+
+    def store(
+        self,
+        question: str,
+        question_vector: np.ndarray,
+        fingerprint: str,
+        answer: str,
+        sources: list[str],
+        num_chunks: int,
+        generation_seconds: float,
+    ):
+        """Cache an answer generated for ``question`` over the given context."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.capacity:
+                self._remove(min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"]))
+            self._tick += 1
+            self._entries.append({
+                "question": question,
+                "fingerprint": fingerprint,
+                "answer": answer,
+                "sources": sources,
+                "num_chunks": num_chunks,
+                "generation_seconds": generation_seconds,
+                "last_used": self._tick,
+            })
+            row = self._unit(question_vector)[None, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the LLM generation time saved by hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_generation_seconds": self.saved_seconds,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,249 @@
+"""Bulk ingestion of many documents: concurrent parsing feeding one embedding stage.
+
+Files are parsed by a pool of ``INGEST_PARSE_WORKERS`` processes, at most a
+few files ahead of the writer, and their chunks are merged into a single
+stream through ``vector_store.replace_sources``, so the embedding and write
+stages run on full batches across file boundaries. Each file replaces the
+source of the same name (its file name, as for uploads), so two files with
+the same name in one run are rejected up front; with content-addressed IDs
+only chunks that are not stored yet are embedded. A file that fails to
+parse keeps its previous chunks and is reported instead of aborting the
+run.
+
+Usage:
+    python ingest.py PATH_OR_GLOB [PATH_OR_GLOB ...] [--workers 4] [--positional-ids]
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from rag import document_loader
+from rag.config import INGEST_PARSE_WORKERS
+from rag.document_loader import SUPPORTED_EXTENSIONS, iter_chunks, load_and_chunk
+from rag.vector_store import replace_sources
+
+# Files at least this large are streamed in the calling process instead of
+# being parsed whole in a worker and sent back as one list.
+_STREAM_BYTES = 32 * 1024 * 1024
+
+
+def expand_paths(patterns: Iterable[str]) -> list[Path]:
+    """Resolve files, directories (searched recursively) and glob patterns to supported files."""
+    found: dict[str, Path] = {}
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in map(Path, matches):
+            files = match.rglob("*") if match.is_dir() else [match]
+            for file in files:
+                if file.is_file() and file.suffix.lower() in SUPPORTED_EXTENSIONS:
+                    found.setdefault(str(file.resolve()), file)
+    return sorted(found.values())
+
+
+def _check_source_names(paths: list[str]):
+    """Raise ValueError if two paths would be stored under the same source name."""
+    by_name: dict[str, list[str]] = {}
+    for path in paths:
+        by_name.setdefault(Path(path).name, []).append(path)
+    clashes = {name: found for name, found in by_name.items() if len(found) > 1}
+    if clashes:
+        details = "; ".join(f"{name}: {', '.join(found)}" for name, found in sorted(clashes.items()))
+        raise ValueError(f"Files are stored by file name, and these names occur more than once: {details}")
+
+
+def _init_parser():
+    # Files are already parsed in parallel; don't nest a PDF page pool per worker
+    document_loader.PDF_WORKERS = 1
+
+
+def _parse_file(path: str, content_ids: bool) -> list[dict]:
+    return load_and_chunk(path, content_ids=content_ids)
+
+
+def ingest_paths(
+    paths: Iterable[str | Path],
+    workers: int = INGEST_PARSE_WORKERS,
+    content_ids: bool = True,
+    progress_callback: Callable[[int, int], None] | None = None,
+    file_callback: Callable[[dict], None] | None = None,
+) -> dict:
+    """Parse ``paths`` concurrently and index them through one shared embed/write pipeline.
+
+    Args:
+        paths: Supported files (see ``expand_paths`` for directories and globs).
+        workers: Parser processes; ``1`` parses in the calling process.
+        content_ids: Use content-addressed chunk IDs (see ``document_loader``).
+        progress_callback: Optional callable(chunks written, chunks parsed so far).
+        file_callback: Optional callable(event) run once per file as soon as it is
+            fully indexed or has failed. ``event`` has keys: path, source,
+            chunks, error (None on success), files_done, files_total.
+            Callbacks run in the calling thread.
+
+    Returns:
+        Dict with keys: files, failed ({path: error}), chunks (written),
+        unchanged (already stored, content IDs only), deleted, seconds,
+        chunks_per_second.
+
+    Raises:
+        ValueError: If two paths have the same file name (source name).
+    """
+    paths = [str(p) for p in paths]
+    _check_source_names(paths)
+    failed_sources: set[str] = set()
+    errors: dict[str, str] = {}
+    # (chunk offset where the file ends, event) in stream order, filled by the loader thread
+    boundaries: deque[tuple[int, dict]] = deque()
+    lock = threading.Lock()
+    files_done = 0
+
+    def finished(path: str, chunks: int, error: str | None, end: int):
+        event = {"path": path, "source": Path(path).name, "chunks": chunks, "error": error}
+        if error is not None:
+            failed_sources.add(event["source"])
+            errors[path] = error
+        with lock:
+            boundaries.append((end, event))
+
+    def stream(executor: ProcessPoolExecutor | None) -> Iterator[dict]:
+        produced = 0
+        pending: deque[tuple[str, Future | None]] = deque()
+        queue = deque(paths)
+
+        def submit():
+            while queue and len(pending) < max(2 * workers, 2):
+                path = queue.popleft()
+                big = executor is None or os.path.getsize(path) >= _STREAM_BYTES
+                pending.append((path, None if big else executor.submit(_parse_file, path, content_ids)))
+
+        submit()
+        while pending:
+            # Prefer any file that is already parsed; otherwise stream the oldest
+            ready = next((item for item in pending if item[1] is not None and item[1].done()), None)
+            if ready is None:
+                futures = [f for _, f in pending if f is not None]
+                if pending[0][1] is not None and futures:
+                    wait(futures, return_when=FIRST_COMPLETED)
+                    continue
+                ready = pending[0]
+            pending.remove(ready)
+            path, future = ready
+            count = 0
+            try:
+                chunks = iter_chunks(path, content_ids=content_ids) if future is None else future.result()
+                for chunk in chunks:
+                    count += 1
+                    yield chunk
+            except Exception as e:
+                finished(path, count, f"{type(e).__name__}: {e}", produced + count)
+            else:
+                finished(path, count, None, produced + count)
+            produced += count
+            submit()
+
+    def report(done: int, total: int):
+        nonlocal files_done
+        if progress_callback:
+            progress_callback(done, total)
+        if file_callback:
+            while True:
+                with lock:
+                    if not boundaries or boundaries[0][0] > done:
+                        break
+                    _, event = boundaries.popleft()
+                files_done += 1
+                file_callback({**event, "files_done": files_done, "files_total": len(paths)})
+
+    start = time.perf_counter()
+    executor = None
+    if workers > 1 and len(paths) > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_parser,
+        )
+    try:
+        stats = replace_sources(
+            stream(executor), progress_callback=report, failed=failed_sources, content_ids=content_ids
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    # Files after the last written batch (empty or failed) have not been reported yet
+    if file_callback:
+        while boundaries:
+            _, event = boundaries.popleft()
+            files_done += 1
+            file_callback({**event, "files_done": files_done, "files_total": len(paths)})
+    elapsed = time.perf_counter() - start
+    return {
+        "files": len(paths),
+        "failed": errors,
+        "chunks": stats["written"],
+        "unchanged": stats["unchanged"],
+        "deleted": stats["deleted"],
+        "seconds": elapsed,
+        "chunks_per_second": stats["written"] / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest documents into the RAG store.")
+    parser.add_argument("paths", nargs="+", help="Files, directories (recursive) or glob patterns")
+    parser.add_argument("--workers", type=int, default=INGEST_PARSE_WORKERS, help="Parser processes")
+    parser.add_argument(
+        "--positional-ids", action="store_true",
+        help="Use {filename}__chunk_{i} IDs instead of content-addressed ones",
+    )
+    args = parser.parse_args()
+
+    files = expand_paths(args.paths)
+    if not files:
+        parser.error(f"No {'/'.join(sorted(SUPPORTED_EXTENSIONS))} files matched")
+    try:
+        _check_source_names([str(f) for f in files])
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Ingesting {len(files)} files with {args.workers} parser process(es)...")
+
+    start = time.perf_counter()
+    width = len(str(len(files)))
+    indexed = 0
+
+    def on_progress(done: int, total: int):
+        nonlocal indexed
+        indexed = done
+
+    def on_file(event: dict):
+        status = f"FAILED: {event['error']}" if event["error"] else f"{event['chunks']} chunks"
+        elapsed = time.perf_counter() - start
+        print(
+            f"  [{event['files_done']:>{width}}/{event['files_total']}] {event['path']}: {status}"
+            f"  (total {indexed} chunks, {indexed / elapsed if elapsed else 0:.0f} chunks/s)"
+        )
+
+    stats = ingest_paths(
+        files,
+        workers=args.workers,
+        content_ids=not args.positional_ids,
+        progress_callback=on_progress,
+        file_callback=on_file,
+    )
+    print(
+        f"Indexed {stats['chunks']} chunks from {stats['files'] - len(stats['failed'])}/{stats['files']} files "
+        f"in {stats['seconds']:.1f}s ({stats['chunks_per_second']:.0f} chunks/s); "
+        f"{stats['unchanged']} unchanged, {stats['deleted']} stale chunks removed"
+    )
+    if stats["failed"]:
+        raise SystemExit(f"{len(stats['failed'])} file(s) failed to parse")
+
+
+if __name__ == "__main__":
+    main()
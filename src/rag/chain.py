@@ -1,57 +1,364 @@
 """Core RAG chain: retrieve → prompt → generate."""
 
-from collections.abc import Generator
+import asyncio
+import re
+import threading
+import time
+from collections.abc import AsyncGenerator, Generator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from rag.config import RAG_PROMPT_TEMPLATE, TOP_K
-from rag.vector_store import query as vector_query
-from rag.llm import generate, generate_stream
+from rag.answer_cache import SemanticAnswerCache, context_fingerprint
+from rag.config import (
+    ASK_BATCH_PARALLELISM,
+    BATCH_SIZE,
+    CONTEXT_DEDUP_THRESHOLD,
+    CONTEXT_TOKEN_BUDGET,
+    HYBRID_SEARCH,
+    RAG_PROMPT_TEMPLATE,
+    RERANK_BATCH_SIZE,
+    RERANK_BUDGET_MS,
+    RERANK_CACHE_SIZE,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RERANK_MODEL,
+    RETRIEVAL_MODE,
+    TOP_K,
+    RETRIEVAL_THREADS,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+)
+from rag.context_packer import pack_context, render_context
+from rag.embeddings import encode, encode_local
+from rag.reranker import Reranker
+from rag.vector_store import (
+    get_document_count,
+    get_lexical_index,
+    get_source_catalog,
+    query as vector_query,
+    query_batch as vector_query_batch,
+)
+from rag.llm import generate, generate_stream, generate_async, generate_stream_async, get_client as get_llm_client
 
+_answer_cache: SemanticAnswerCache | None = (
+    SemanticAnswerCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE) if SEMANTIC_CACHE_ENABLED else None
+)
 
-def build_prompt(question: str, context_docs: list[dict]) -> str:
-    """Build the RAG prompt from a question and retrieved documents."""
-    context_parts = []
-    for i, doc in enumerate(context_docs, 1):
-        source = doc["metadata"].get("source", "unknown")
-        context_parts.append(f"[Source: {source}]\n{doc['text']}")
+_reranker: Reranker | None = (
+    Reranker(RERANK_MODEL, RERANK_BUDGET_MS, RERANK_BATCH_SIZE, RERANK_CACHE_SIZE) if RERANK_ENABLED else None
+)
 
-    context = "\n\n---\n\n".join(context_parts) if context_parts else "No relevant documents found."
+# Blocking retrieval (encode + index search) for the async chain runs here
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_THREADS, thread_name_prefix="rag-retrieval")
+
+
+def get_answer_cache() -> SemanticAnswerCache | None:
+    """Return the semantic answer cache, or None if SEMANTIC_CACHE_ENABLED is off."""
+    return _answer_cache
+
+
+def get_reranker() -> Reranker | None:
+    """Return the cross-encoder reranker, or None if RERANK_ENABLED is off."""
+    return _reranker
+
+
+def _warm():
+    encode_local(["warmup"])
+    get_document_count()
+    get_source_catalog()
+    if HYBRID_SEARCH:
+        get_lexical_index()
+    if _reranker is not None:
+        _reranker.load()
+    get_llm_client()
+
+
+def warmup(background: bool = True) -> threading.Thread | None:
+    """Pay the cold-start costs before the first question arrives.
+
+    Heavy libraries are imported on first use, so without this the first
+    request loads them. This loads the embedding model and runs a dummy
+    encode (bypassing the embedding cache), opens the vector index, source
+    catalog and lexical index, loads the reranker if enabled and builds the
+    LLM client. With ``background`` it runs on a daemon thread, which is
+    returned; requests that arrive meanwhile wait for the same loads.
+    """
+    if not background:
+        _warm()
+        return None
+    thread = threading.Thread(target=_warm, name="rag-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def build_prompt(question: str, context_docs: list[dict], token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Build the RAG prompt from a question and retrieved documents (most relevant first).
+
+    Context is packed by ``rag.context_packer``: near-duplicates dropped,
+    neighbouring chunks merged, and filled by relevance up to ``token_budget``
+    estimated tokens (``0`` = unlimited).
+    """
+    blocks = pack_context(context_docs, token_budget, CONTEXT_DEDUP_THRESHOLD)
+    context = render_context(blocks) if blocks else "No relevant documents found."
 
     return RAG_PROMPT_TEMPLATE.format(context=context, question=question)
 
 
-def ask(question: str, top_k: int = TOP_K) -> dict:
-    """Run the full RAG pipeline and return the answer.
+def _cache_lookup(question: str, context_docs: list[dict], question_vector=None):
+    """Return (cached entry or None, question vector, context fingerprint)."""
+    if _answer_cache is None:
+        return None, None, None
+    if question_vector is None:
+        question_vector = encode([question])[0]
+    fingerprint = context_fingerprint(context_docs)
+    return _answer_cache.lookup(question_vector, fingerprint), question_vector, fingerprint
 
-    Returns dict with keys: answer, sources, num_chunks.
+
+def _replay_tokens(answer: str) -> Generator[str, None, None]:
+    """Split a cached answer into word tokens so streaming UIs render it as usual."""
+    yield from re.findall(r"\s*\S+|\s+", answer)
+
+
+def _retrieve(question: str, top_k: int, mode: str = RETRIEVAL_MODE):
+    """Retrieve context with the given retrieval mode, rerank it if enabled,
+    and check the answer cache.
+
+    Returns (context_docs, cached entry or None, question vector, fingerprint).
     """
-    context_docs = vector_query(question, top_k=top_k)
-    prompt = build_prompt(question, context_docs)
-    answer = generate(prompt)
+    if _reranker is None:
+        context_docs = vector_query(question, top_k=top_k, mode=mode)
+    else:
+        candidates = vector_query(question, top_k=top_k * RERANK_CANDIDATES, mode=mode)
+        context_docs = _reranker.rerank(question, candidates, top_k)
+    cached, question_vector, fingerprint = _cache_lookup(question, context_docs)
+    return context_docs, cached, question_vector, fingerprint
+
 
-    sources = list({doc["metadata"].get("source", "unknown") for doc in context_docs})
+def _retrieve_batch(questions: list[str], top_k: int, mode: str) -> list[tuple]:
+    """``_retrieve`` for many questions: one encode and one index search for all of them."""
+    if _reranker is None:
+        context_lists = vector_query_batch(questions, top_k=top_k, mode=mode)
+    else:
+        candidate_lists = vector_query_batch(questions, top_k=top_k * RERANK_CANDIDATES, mode=mode)
+        context_lists = [
+            _reranker.rerank(question, candidates, top_k) for question, candidates in zip(questions, candidate_lists)
+        ]
+    question_vectors = encode(questions) if _answer_cache is not None else [None] * len(questions)
+    retrieved = []
+    for question, context_docs, question_vector in zip(questions, context_lists, question_vectors):
+        cached, question_vector, fingerprint = _cache_lookup(question, context_docs, question_vector)
+        retrieved.append((context_docs, cached, question_vector, fingerprint))
+    return retrieved
+
+
+def _cached_result(cached: dict) -> dict:
+    return {
+        "answer": cached["answer"],
+        "sources": cached["sources"],
+        "num_chunks": cached["num_chunks"],
+    }
+
+
+def _finish(question, context_docs, answer, question_vector, fingerprint, elapsed) -> dict:
+    """Build the ask() result and remember it in the answer cache."""
+    sources = sorted({doc["metadata"].get("source", "unknown") for doc in context_docs})
+
+    if _answer_cache is not None:
+        _answer_cache.store(question, question_vector, fingerprint, answer, sources, len(context_docs), elapsed)
 
     return {
         "answer": answer,
-        "sources": sorted(sources),
+        "sources": sources,
         "num_chunks": len(context_docs),
     }
 
 
-def ask_stream(question: str, top_k: int = TOP_K) -> Generator[str | dict, None, None]:
-    """Stream the RAG answer token by token.
+def ask(question: str, top_k: int = TOP_K, mode: str = RETRIEVAL_MODE) -> dict:
+    """Run the full RAG pipeline and return the answer.
+
+    ``mode`` selects retrieval: "similarity" (nearest chunks) or "mmr"
+    (diversified by maximal marginal relevance, see ``vector_store.query``).
 
-    Yields string tokens, then a final dict with metadata.
+    Returns dict with keys: answer, sources, num_chunks.
     """
-    context_docs = vector_query(question, top_k=top_k)
+    context_docs, cached, question_vector, fingerprint = _retrieve(question, top_k, mode)
+    if cached is not None:
+        return _cached_result(cached)
+    return _answer(question, context_docs, question_vector, fingerprint)
+
+
+def _answer(question, context_docs, question_vector, fingerprint) -> dict:
+    """Generate the answer for retrieved context and build the ask() result."""
     prompt = build_prompt(question, context_docs)
+    start = time.perf_counter()
+    answer = generate(prompt)
+    return _finish(question, context_docs, answer, question_vector, fingerprint, time.perf_counter() - start)
 
-    sources = sorted({doc["metadata"].get("source", "unknown") for doc in context_docs})
 
-    for token in generate_stream(prompt):
-        yield token
+def _error_result(e: Exception) -> dict:
+    return {"error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+
+
+def ask_batch(
+    questions: list[str],
+    top_k: int = TOP_K,
+    mode: str = RETRIEVAL_MODE,
+    parallelism: int = ASK_BATCH_PARALLELISM,
+    progress_callback=None,
+    return_exceptions: bool = False,
+) -> list[dict]:
+    """Answer many questions; each result is what ``ask`` returns for it, plus ``seconds``.
+
+    Questions are retrieved in slices of BATCH_SIZE, each with one encoder
+    call and one multi-query index search, while generations run on
+    ``parallelism`` threads. The next slice is retrieved once at most
+    BATCH_SIZE questions are still waiting for generation, so memory stays
+    flat for large batches.
+
+    Args:
+        questions: Questions to answer.
+        top_k: Chunks retrieved per question.
+        mode: Retrieval mode, as for ``ask``.
+        parallelism: Concurrent LLM generations.
+        progress_callback: Optional callable(answered, total).
+        return_exceptions: If True, a question whose retrieval or generation
+            fails gets ``{"error": "<type>: <message>", "seconds": ...}`` and
+            the others are still answered; otherwise the first failure is
+            raised.
+
+    Returns:
+        One dict per question (answer, sources, num_chunks, and ``seconds``
+        spent generating it, 0.0 for cached answers), in input order.
+    """
+    results: list[dict | None] = [None] * len(questions)
+    done = 0
+
+    def answer(i: int, *retrieved) -> dict:
+        start = time.perf_counter()
+        try:
+            result = _answer(questions[i], *retrieved)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            result = _error_result(e)
+        return {**result, "seconds": time.perf_counter() - start}
+
+    def retrieve(batch: list[str]) -> list:
+        try:
+            return _retrieve_batch(batch, top_k, mode)
+        except Exception:
+            if not return_exceptions:
+                raise
+        # One question at a time, so only the questions that fail are lost
+        retrieved = []
+        for question in batch:
+            try:
+                retrieved += _retrieve_batch([question], top_k, mode)
+            except Exception as e:
+                retrieved.append(e)
+        return retrieved
+
+    def finished(i: int, result: dict):
+        nonlocal done
+        results[i] = result
+        done += 1
+        if progress_callback:
+            progress_callback(done, len(questions))
+
+    def collect(futures: dict, limit: int):
+        while len(futures) > limit:
+            completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in completed:
+                finished(futures.pop(future), future.result())
+
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1), thread_name_prefix="rag-batch") as executor:
+        futures = {}
+        for start in range(0, len(questions), BATCH_SIZE):
+            collect(futures, BATCH_SIZE)
+            for i, retrieved in enumerate(retrieve(questions[start:start + BATCH_SIZE]), start):
+                if isinstance(retrieved, Exception):
+                    finished(i, _error_result(retrieved))
+                    continue
+                context_docs, cached, question_vector, fingerprint = retrieved
+                if cached is not None:
+                    finished(i, {**_cached_result(cached), "seconds": 0.0})
+                else:
+                    futures[executor.submit(answer, i, context_docs, question_vector, fingerprint)] = i
+        collect(futures, 0)
+    return results
+
+
+def ask_stream(question: str, top_k: int = TOP_K, mode: str = RETRIEVAL_MODE) -> Generator[str | dict, None, None]:
+    """Stream the RAG answer token by token.
+
+    Yields string tokens, then a final dict with metadata. Answers served from
+    the semantic cache are replayed as a token stream.
+    """
+    context_docs, cached, question_vector, fingerprint = _retrieve(question, top_k, mode)
+    if cached is not None:
+        yield from _replay_tokens(cached["answer"])
+        result = _cached_result(cached)
+    else:
+        prompt = build_prompt(question, context_docs)
+        tokens = []
+        start = time.perf_counter()
+        for token in generate_stream(prompt):
+            tokens.append(token)
+            yield token
+        result = _finish(
+            question, context_docs, "".join(tokens), question_vector, fingerprint, time.perf_counter() - start
+        )
 
     # Final metadata yield
     yield {
-        "sources": sources,
-        "num_chunks": len(context_docs),
+        "sources": result["sources"],
+        "num_chunks": result["num_chunks"],
+    }
+
+
+async def ask_async(question: str, top_k: int = TOP_K, mode: str = RETRIEVAL_MODE) -> dict:
+    """Async ``ask``: retrieval runs in the retrieval thread pool, generation
+    uses the pooled async client under the LLM concurrency limit.
+
+    Returns dict with keys: answer, sources, num_chunks.
+    """
+    loop = asyncio.get_running_loop()
+    context_docs, cached, question_vector, fingerprint = await loop.run_in_executor(
+        _retrieval_executor, _retrieve, question, top_k, mode
+    )
+    if cached is not None:
+        return _cached_result(cached)
+
+    prompt = build_prompt(question, context_docs)
+    start = time.perf_counter()
+    answer = await generate_async(prompt)
+    return _finish(question, context_docs, answer, question_vector, fingerprint, time.perf_counter() - start)
+
+
+async def ask_stream_async(
+    question: str, top_k: int = TOP_K, mode: str = RETRIEVAL_MODE
+) -> AsyncGenerator[str | dict, None]:
+    """Async ``ask_stream``: yields string tokens, then a final metadata dict."""
+    loop = asyncio.get_running_loop()
+    context_docs, cached, question_vector, fingerprint = await loop.run_in_executor(
+        _retrieval_executor, _retrieve, question, top_k, mode
+    )
+    if cached is not None:
+        for token in _replay_tokens(cached["answer"]):
+            yield token
+        result = _cached_result(cached)
+    else:
+        prompt = build_prompt(question, context_docs)
+        tokens = []
+        start = time.perf_counter()
+        async for token in generate_stream_async(prompt):
+            tokens.append(token)
+            yield token
+        result = _finish(
+            question, context_docs, "".join(tokens), question_vector, fingerprint, time.perf_counter() - start
+        )
+
+    yield {
+        "sources": result["sources"],
+        "num_chunks": result["num_chunks"],
     }
@@ -9,15 +9,38 @@ load_dotenv()
 # Paths
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", str(PROJECT_ROOT / "chroma_db"))
+# Created by the first upload, not at import
 UPLOAD_DIR = PROJECT_ROOT / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Ollama / LLM
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
 
+# Async chain: max in-flight LLM generations (protects the local Ollama) and
+# threads used for blocking retrieval work
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+RETRIEVAL_THREADS = int(os.getenv("RETRIEVAL_THREADS", "8"))
+# Concurrent generations dispatched by rag.chain.ask_batch
+ASK_BATCH_PARALLELISM = int(os.getenv("ASK_BATCH_PARALLELISM", str(LLM_MAX_CONCURRENCY)))
+
 # Embedding
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Unit-normalize vectors once at encode time (cosine similarity becomes a dot product)
+NORMALIZE_EMBEDDINGS = os.getenv("NORMALIZE_EMBEDDINGS", "true").lower() == "true"
+# Padded tokens per encoder forward pass: texts are sorted by length and batched
+# by token count rather than item count (see rag.embedding_batches); the
+# default matches 32 full-length MiniLM texts. 0 = the model's fixed batches of 32
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "8192"))
+
+# Load-optimized model snapshot (see rag.model_snapshot): written on first load,
+# then memory-mapped so processes share one copy of the weights; CPU only
+# (set MODEL_SNAPSHOT=false to load through sentence-transformers every time)
+MODEL_SNAPSHOT = os.getenv("MODEL_SNAPSHOT", "true").lower() == "true"
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR", str(PROJECT_ROOT / "model_snapshots"))
+
+# On-disk embedding cache (set EMBEDDING_CACHE_MAX_MB=0 to disable)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", str(PROJECT_ROOT / "embedding_cache"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
 
 # Chunking
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1500"))
@@ -26,9 +49,82 @@ CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
 # Batch size for embedding and upserting
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "256"))
 
+# Embedding worker processes for bulk ingestion (1 = encode in-process) and
+# torch threads per worker; workers x threads should not exceed the core count
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "1"))
+
+# PDF text extraction processes (1 = in-process) and pages in flight at once;
+# memory while parsing is bounded by the window, not the document size
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "64"))
+
+# Parser processes for bulk ingestion of many files (see rag.bulk_ingest)
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Batches buffered between ingest pipeline stages (chunking -> embedding -> writes)
+INGEST_QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+
 # RAG
 TOP_K = int(os.getenv("TOP_K", "5"))
 CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "documents")
+# Estimated tokens of retrieved context packed into the prompt (0 = no budget)
+# and the word 3-gram overlap at which a chunk counts as a near-duplicate
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))
+
+# Vector index backend: "chroma" (HNSW, PersistentClient) or "flat" (exact
+# brute-force NumPy index over memory-mapped vectors, see rag.flat_index).
+# FLAT_INDEX_QUANTIZATION="int8" or "binary" scans 1/4 or 1/32 of the float32
+# size, then rescores FLAT_INDEX_RESCORE x top_k candidates on the full
+# vectors kept on disk (0 = no rescoring)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+FLAT_INDEX_DIR = os.getenv("FLAT_INDEX_DIR", str(Path(CHROMA_DB_DIR) / f"{CHROMA_COLLECTION}_flat"))
+FLAT_INDEX_QUANTIZATION = os.getenv("FLAT_INDEX_QUANTIZATION", "none")
+FLAT_INDEX_RESCORE = int(os.getenv("FLAT_INDEX_RESCORE", "4"))
+
+# Hybrid retrieval: BM25 over a persistent inverted index, fused with dense
+# results by weighted reciprocal rank fusion (score = w / (RRF_K + rank))
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+LEXICAL_INDEX_PATH = os.getenv(
+    "LEXICAL_INDEX_PATH", str(Path(CHROMA_DB_DIR) / f"{CHROMA_COLLECTION}_lexical.sqlite3")
+)
+# Per-source chunk count, size, ingest time and content hash
+SOURCE_CATALOG_PATH = os.getenv(
+    "SOURCE_CATALOG_PATH", str(Path(CHROMA_DB_DIR) / f"{CHROMA_COLLECTION}_sources.sqlite3")
+)
+DENSE_WEIGHT = float(os.getenv("DENSE_WEIGHT", "1.0"))
+LEXICAL_WEIGHT = float(os.getenv("LEXICAL_WEIGHT", "1.0"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Candidates fetched from each retriever before fusion, as a multiple of top_k
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+
+# Retrieval mode: "similarity" (nearest chunks) or "mmr" (maximal marginal
+# relevance: over-fetch MMR_FETCH_MULTIPLIER x top_k candidates, then pick
+# chunks scoring MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * redundancy)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "similarity")
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+MMR_FETCH_MULTIPLIER = int(os.getenv("MMR_FETCH_MULTIPLIER", "4"))
+
+# Optional CPU cross-encoder reranking between retrieval and the prompt:
+# RERANK_CANDIDATES x top_k chunks are retrieved and the best top_k kept; if
+# scoring takes longer than RERANK_BUDGET_MS the dense order is used instead
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "3"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "250"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+
+# Retrieval result cache (entries, seconds); QUERY_CACHE_SIZE=0 disables it
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "600"))
+
+# Opt-in semantic answer cache: reuse an answer when a previous question is at
+# least this cosine-similar and retrieved the same chunks
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
 
 # Prompt template
 RAG_PROMPT_TEMPLATE = """You are a helpful assistant. Answer the user's question using ONLY the context provided below. If the context does not contain enough information to answer the question, say "I don't have enough information in the provided documents to answer that question."
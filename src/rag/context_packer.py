@@ -0,0 +1,122 @@
+"""Token-budgeted packing of retrieved chunks into prompt context.
+
+Chunks arrive in relevance order. Near-duplicates of a more relevant chunk
+are dropped, neighbouring chunks of the same source (consecutive
+``chunk_index``) are merged into one block with the text shared through
+``CHUNK_OVERLAP`` written once, and chunks are added by relevance while the
+rendered context fits the token budget.
+"""
+
+import re
+
+from rag.config import CHUNK_OVERLAP
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Shortest suffix/prefix match treated as splitter overlap rather than coincidence
+_MIN_OVERLAP_CHARS = 10
+_SHINGLE_WORDS = 3
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English BPE vocabularies)."""
+    return (len(text) + 3) // 4
+
+
+def render_block(doc: dict) -> str:
+    """Render one context block with its source label."""
+    return f"[Source: {doc['metadata'].get('source', 'unknown')}]\n{doc['text']}"
+
+
+def render_context(docs: list[dict]) -> str:
+    return CONTEXT_SEPARATOR.join(render_block(doc) for doc in docs)
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < _SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + _SHINGLE_WORDS]) for i in range(len(words) - _SHINGLE_WORDS + 1)}
+
+
+def _overlap(left: str, right: str, max_chars: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    for size in range(min(len(left), len(right), max_chars), _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _join(left: str, right: str) -> str:
+    size = _overlap(left, right, 2 * CHUNK_OVERLAP)
+    # Without overlap the splitter cut at a separator it dropped; restore a paragraph break
+    return left + right[size:] if size else f"{left}\n\n{right}"
+
+
+def _merge(selected: list[tuple[int, dict]]) -> list[dict]:
+    """Merge runs of consecutive chunks per source; blocks are ordered by their best rank."""
+    blocks: list[tuple[int, dict]] = []
+    runs: dict[str, list[tuple[int, int, dict]]] = {}
+    for rank, doc in selected:
+        index = doc["metadata"].get("chunk_index")
+        if index is None:
+            blocks.append((rank, doc))
+        else:
+            runs.setdefault(doc["metadata"].get("source", "unknown"), []).append((index, rank, doc))
+
+    for members in runs.values():
+        members.sort(key=lambda m: m[0])
+        run = [members[0]]
+        for member in members[1:] + [None]:
+            if member is not None and member[0] == run[-1][0] + 1:
+                run.append(member)
+                continue
+            text = run[0][2]["text"]
+            for _, _, doc in run[1:]:
+                text = _join(text, doc["text"])
+            best = min(run, key=lambda m: m[1])
+            blocks.append((best[1], {
+                "text": text,
+                "metadata": run[0][2]["metadata"],
+                "distance": best[2].get("distance"),
+            }))
+            run = [member]
+    blocks.sort(key=lambda b: b[0])
+    return [doc for _, doc in blocks]
+
+
+def pack_context(docs: list[dict], token_budget: int, dedup_threshold: float = 0.9) -> list[dict]:
+    """Select and merge retrieved chunks into context blocks that fit ``token_budget``.
+
+    Args:
+        docs: Retrieved chunks (text, metadata, distance), most relevant first.
+        token_budget: Estimated tokens allowed for the rendered context; ``0``
+            disables the budget (deduplication and merging still apply).
+        dedup_threshold: Drop a chunk when at least this share of its word
+            3-grams already appears in one more relevant kept chunk.
+
+    Returns:
+        Blocks with keys text, metadata (of the block's first chunk) and
+        distance (of its most relevant chunk), in order of relevance. A most
+        relevant chunk larger than the whole budget is truncated rather than
+        dropped, so the context is never empty when ``docs`` is not.
+    """
+    kept: list[tuple[int, dict]] = []
+    kept_shingles: list[set] = []
+    blocks: list[dict] = []
+    for rank, doc in enumerate(docs):
+        shingles = _shingles(doc["text"])
+        if shingles and any(len(shingles & other) >= dedup_threshold * len(shingles) for other in kept_shingles):
+            continue
+        candidate = _merge(kept + [(rank, doc)])
+        if token_budget and estimate_tokens(render_context(candidate)) > token_budget:
+            if kept:
+                continue
+            header = estimate_tokens(render_block({**doc, "text": ""}))
+            doc = {**doc, "text": doc["text"][:max(token_budget - header, 0) * 4]}
+            candidate = [doc]
+        kept.append((rank, doc))
+        kept_shingles.append(shingles)
+        blocks = candidate
+    return blocks
@@ -1,26 +1,52 @@
 """Load and chunk PDF, TXT, and CSV documents."""
 
 import csv
+import hashlib
+import multiprocessing
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from rag import pdf_pages
+from rag.config import CHUNK_SIZE, CHUNK_OVERLAP, PDF_WORKERS, PDF_PAGE_WINDOW
 
-from rag.config import CHUNK_SIZE, CHUNK_OVERLAP
+if TYPE_CHECKING:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 SUPPORTED_EXTENSIONS = {".pdf", ".txt", ".csv"}
 
-_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    length_function=len,
-)
+# PDFs shorter than this are extracted in-process; worker start-up would dominate
+_PDF_PARALLEL_MIN_PAGES = 32
+_PDF_PAGES_PER_TASK = 4
+# Characters read per block from TXT files before splitting
+_TEXT_BLOCK_CHARS = 1 << 20
 
+_splitter: "RecursiveCharacterTextSplitter | None" = None
 
-def _load_csv_fast(file_path: str) -> list[dict]:
-    """Load CSV by batching rows into chunks directly — skips LangChain's one-doc-per-row overhead."""
+
+def get_splitter() -> "RecursiveCharacterTextSplitter":
+    """Return the singleton text splitter (langchain is imported on first call)."""
+    global _splitter
+    if _splitter is None:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            length_function=len,
+        )
+    return _splitter
+
+
+def _iter_csv_chunks(file_path: str) -> Iterator[dict]:
+    """Stream CSV rows into chunks directly — skips LangChain's one-doc-per-row overhead.
+
+    Every chunk repeats the header line. Rows are read through a buffered
+    file handle, so memory stays flat however large the file is.
+    """
     source_name = Path(file_path).name
-    results = []
     chunk_idx = 0
     buffer = []
     buffer_len = 0
@@ -29,7 +55,7 @@ def _load_csv_fast(file_path: str) -> list[dict]:
         reader = csv.reader(f)
         header = next(reader, None)
         if not header:
-            return []
+            return
         header_line = ",".join(header)
 
         for row in reader:
@@ -37,12 +63,11 @@ def _load_csv_fast(file_path: str) -> list[dict]:
             line_len = len(line) + 1  # +1 for newline
 
             if buffer_len + line_len > CHUNK_SIZE and buffer:
-                text = header_line + "\n" + "\n".join(buffer)
-                results.append({
+                yield {
                     "id": f"{source_name}__chunk_{chunk_idx}",
-                    "text": text,
+                    "text": header_line + "\n" + "\n".join(buffer),
                     "metadata": {"source": source_name, "chunk_index": chunk_idx},
-                })
+                }
                 chunk_idx += 1
                 buffer = []
                 buffer_len = 0
@@ -52,51 +77,163 @@ def _load_csv_fast(file_path: str) -> list[dict]:
 
         # Flush remaining
         if buffer:
-            text = header_line + "\n" + "\n".join(buffer)
-            results.append({
+            yield {
                 "id": f"{source_name}__chunk_{chunk_idx}",
-                "text": text,
+                "text": header_line + "\n" + "\n".join(buffer),
                 "metadata": {"source": source_name, "chunk_index": chunk_idx},
-            })
+            }
 
-    return results
 
+def content_chunk_id(source_name: str, text: str) -> str:
+    """Return a content-addressed chunk ID: {filename}__{sha1(text)[:20]}."""
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+    return f"{source_name}__{digest}"
 
-def load_and_chunk(file_path: str) -> list[dict]:
-    """Load a document and split it into chunks.
 
-    Returns a list of dicts with keys: id, text, metadata.
+def _iter_content_ids(chunks: Iterable[dict]) -> Iterator[dict]:
+    """Replace positional IDs with content hashes, numbering repeated texts."""
+    seen: dict[str, int] = {}
+    for chunk in chunks:
+        base_id = content_chunk_id(chunk["metadata"]["source"], chunk["text"])
+        occurrence = seen.get(base_id, 0)
+        seen[base_id] = occurrence + 1
+        chunk["id"] = base_id if occurrence == 0 else f"{base_id}_{occurrence}"
+        yield chunk
+
+
+def _assign_content_ids(chunks: list[dict]) -> list[dict]:
+    """List version of ``_iter_content_ids``."""
+    return list(_iter_content_ids(chunks))
+
+
+def _iter_pdf_pages(file_path: str, total: int) -> Iterator[tuple[int, str, str]]:
+    """Yield (page number, text, page label) in page order.
+
+    Large PDFs are extracted by a pool of ``PDF_WORKERS`` processes with at
+    most ``PDF_PAGE_WINDOW`` pages submitted but not yet yielded, so memory
+    stays bounded however long the document is.
+    """
+    workers = min(PDF_WORKERS, total // _PDF_PAGES_PER_TASK)
+    if total < _PDF_PARALLEL_MIN_PAGES or workers <= 1:
+        try:
+            for start in range(0, total, _PDF_PAGES_PER_TASK):
+                yield from pdf_pages.extract_pages(file_path, start, min(start + _PDF_PAGES_PER_TASK, total))
+        finally:
+            pdf_pages.release()
+        return
+
+    step = max(1, min(_PDF_PAGES_PER_TASK, PDF_PAGE_WINDOW // workers))
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = deque()
+    next_page = 0
+    try:
+        while pending or next_page < total:
+            while next_page < total and len(pending) * step < PDF_PAGE_WINDOW:
+                stop = min(next_page + step, total)
+                pending.append(executor.submit(pdf_pages.extract_pages, file_path, next_page, stop))
+                next_page = stop
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _iter_pdf_chunks(file_path: str) -> Iterator[dict]:
+    """Split a PDF page by page as pages are extracted; metadata carries the page."""
+    source_name = Path(file_path).name
+    total = pdf_pages.page_count(file_path)
+    i = 0
+    for page, text, label in _iter_pdf_pages(file_path, total):
+        for piece in get_splitter().split_text(text):
+            yield {
+                "id": f"{source_name}__chunk_{i}",
+                "text": piece,
+                "metadata": {
+                    "source": source_name,
+                    "chunk_index": i,
+                    "page": page,
+                    "page_label": label,
+                    "total_pages": total,
+                },
+            }
+            i += 1
+
+
+def _iter_text_blocks(file_path: str, block_chars: int = _TEXT_BLOCK_CHARS) -> Iterator[str]:
+    """Read a text file in blocks of roughly ``block_chars``, cut at paragraph breaks.
+
+    Cutting where the splitter's first separator (a blank line) falls means
+    splitting block by block gives the same chunks as splitting the whole
+    text, except right at the cuts.
+    """
+    carry = ""
+    with open(file_path, "r", encoding="utf-8") as f:
+        while data := f.read(block_chars):
+            carry += data
+            if len(data) < block_chars:
+                break  # end of file
+            cut = carry.rfind("\n\n")
+            if cut <= 0:
+                cut = carry.rfind("\n")
+            if cut <= 0:
+                if len(carry) < 4 * block_chars:
+                    continue
+                cut = len(carry)
+            yield carry[:cut]
+            carry = carry[cut:]
+    if carry:
+        yield carry
+
+
+def _iter_text_chunks(file_path: str) -> Iterator[dict]:
+    """Split a TXT file as it is read."""
+    source_name = Path(file_path).name
+    i = 0
+    for block in _iter_text_blocks(file_path):
+        for piece in get_splitter().split_text(block):
+            yield {
+                "id": f"{source_name}__chunk_{i}",
+                "text": piece,
+                "metadata": {"source": source_name, "chunk_index": i},
+            }
+            i += 1
+
+
+def iter_chunks(file_path: str, content_ids: bool = False) -> Iterator[dict]:
+    """Yield a document's chunks as they are parsed.
+
+    Same records as ``load_and_chunk``, produced incrementally: CSV rows and
+    TXT blocks are read through buffered file handles and PDFs are extracted
+    page by page (in parallel for long PDFs, see ``_iter_pdf_pages``), so
+    memory stays flat on huge files and ingestion
+    (``vector_store.add_documents``) can start embedding before the whole
+    file has been parsed.
     """
     ext = Path(file_path).suffix.lower()
     if ext not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {ext}. Supported: {SUPPORTED_EXTENSIONS}")
+    return _iter_file_chunks(file_path, ext, content_ids)
 
-    source_name = Path(file_path).name
 
+def _iter_file_chunks(file_path: str, ext: str, content_ids: bool) -> Iterator[dict]:
     # CSV: fast direct chunking, no LangChain overhead
     if ext == ".csv":
-        return _load_csv_fast(file_path)
-
-    # PDF / TXT: use LangChain loaders
-    if ext == ".pdf":
-        loader = PyPDFLoader(file_path)
+        chunks = _iter_csv_chunks(file_path)
+    elif ext == ".pdf":
+        chunks = _iter_pdf_chunks(file_path)
     else:
-        loader = TextLoader(file_path, encoding="utf-8")
-
-    documents = loader.load()
-    chunks = _splitter.split_documents(documents)
-
-    results = []
-    for i, chunk in enumerate(chunks):
-        metadata = {
-            "source": source_name,
-            "chunk_index": i,
-            **{k: v for k, v in chunk.metadata.items() if k != "source"},
-        }
-        results.append({
-            "id": f"{source_name}__chunk_{i}",
-            "text": chunk.page_content,
-            "metadata": metadata,
-        })
-
-    return results
+        chunks = _iter_text_chunks(file_path)
+    yield from _iter_content_ids(chunks) if content_ids else chunks
+
+
+def load_and_chunk(file_path: str, content_ids: bool = False) -> list[dict]:
+    """Load a document and split it into chunks.
+
+    Args:
+        file_path: Path to a PDF, TXT, or CSV file.
+        content_ids: If True, chunk IDs are derived from a hash of the chunk
+            text instead of its position, so an edit only changes the IDs of
+            the chunks it touches. Use with ``vector_store.sync_source``.
+
+    Returns a list of dicts with keys: id, text, metadata.
+    """
+    return list(iter_chunks(file_path, content_ids=content_ids))
@@ -0,0 +1,62 @@
+"""Length-bucketed, token-budgeted batch planning for the embedding model.
+
+A transformer batch costs about ``len(batch) x longest text`` tokens,
+because every text is padded to the longest one. Fixed-count batches over
+mixed input (a short CSV row next to a full 1,500-character chunk) therefore
+spend much of their compute on padding. ``plan_batches`` sorts texts by
+estimated token length and cuts the order into batches whose padded size
+stays within a token budget: long texts go a few at a time and short ones
+in large batches. A batch also only takes texts at least ``BUCKET_RATIO`` as
+long as its longest, so no text is padded by more than a third. Callers
+encode each batch and scatter the rows back to the input positions, so
+order is preserved.
+"""
+
+import numpy as np
+
+# Upper bound on texts per forward pass, however short they are
+MAX_BATCH_TEXTS = 1024
+# Shortest text a batch accepts, relative to its longest
+BUCKET_RATIO = 0.75
+# Tokens added by the model around every text ([CLS] ... [SEP])
+_SPECIAL_TOKENS = 2
+
+
+def estimate_lengths(texts: list[str], max_seq_length: int | None = None) -> np.ndarray:
+    """Estimate each text's token count (~4 characters per token), capped at the model's truncation length.
+
+    Only used for ordering and sizing batches, so an estimate is enough and
+    the texts are not tokenized twice.
+    """
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts)) // 4 + _SPECIAL_TOKENS
+    if max_seq_length:
+        np.minimum(lengths, max_seq_length, out=lengths)
+    return lengths
+
+
+def plan_batches(lengths: np.ndarray, token_budget: int, max_texts: int = MAX_BATCH_TEXTS) -> list[np.ndarray]:
+    """Split text indices into batches, longest first, each padding to at most ``token_budget`` tokens.
+
+    Every index appears in exactly one batch. A text longer than the budget
+    gets a batch of its own.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted descending, so the first text of a batch is its longest
+        longest = max(int(sorted_lengths[start]), 1)
+        size = max(1, min(max_texts, token_budget // longest))
+        # End the batch early at the first text shorter than the bucket allows
+        short = np.flatnonzero(sorted_lengths[start + 1 : start + size] < longest * BUCKET_RATIO)
+        stop = start + 1 + short[0] if len(short) else min(start + size, len(order))
+        batches.append(order[start:stop])
+        start = stop
+    return batches
+
+
+def padded_tokens(lengths: np.ndarray, batches: list[np.ndarray]) -> int:
+    """Total tokens the model processes for ``batches``, padding included."""
+    return sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
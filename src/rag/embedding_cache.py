@@ -0,0 +1,254 @@
+"""Persistent on-disk embedding cache keyed by (model, text hash).
+
+Vectors are stored as float32 rows in a memory-mapped file; a small SQLite
+index maps each text digest to its row and tracks recency for LRU eviction.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+_INITIAL_ROWS = 1024
+_EVICT_FRACTION = 0.1
+
+
+def text_key(text: str) -> str:
+    """Return the cache key (SHA-1 hex digest) for a text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU cache of embedding vectors for one model, bounded by ``max_bytes``.
+
+    One directory per model holds ``vectors.f32`` (a ``(rows, dim)`` float32
+    memmap) and ``index.sqlite`` (key -> row, last use). Safe to share
+    between threads and between processes: rows are allocated inside a
+    SQLite write transaction, so two writers never hand out the same row.
+    """
+
+    def __init__(self, directory: str | Path, model_name: str, max_bytes: int):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = Path(directory) / slug
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._vectors_path = self.path / "vectors.f32"
+        self._db = sqlite3.connect(self.path / "index.sqlite", check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, row INTEGER NOT NULL, last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+            """
+        )
+        dim = self._db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim: int | None = int(dim[0]) if dim else None
+        self._tick = self._db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        self._vectors: np.memmap | None = None
+        self._refresh()
+
+    @property
+    def max_rows(self) -> int:
+        """Maximum number of vectors that fit in ``max_bytes``."""
+        if self.dim is None:
+            return 0
+        return max(1, self.max_bytes // (self.dim * 4))
+
+    def _open_vectors(self):
+        rows = self._vectors_path.stat().st_size // (self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _refresh(self):
+        """Pick up the dimension and file growth written by other processes."""
+        if self.dim is None:
+            dim = self._db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            self.dim = int(dim[0]) if dim else None
+        if self.dim is None or not self._vectors_path.exists():
+            return
+        rows = self._vectors_path.stat().st_size // (self.dim * 4)
+        if self._vectors is None or self._vectors.shape[0] != rows:
+            self._open_vectors()
+
+    def _ensure_capacity(self, rows: int):
+        """Grow the vectors file (doubling) so it holds at least ``rows`` rows."""
+        self._refresh()
+        current = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= current:
+            return
+        new_rows = min(max(rows, current * 2, _INITIAL_ROWS), self.max_rows)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_rows * self.dim * 4)
+        self._open_vectors()
+
+    def _allocate_rows(self, n: int) -> list[int]:
+        """Hand out ``n`` rows, reusing free rows and evicting LRU entries if full.
+
+        Must run inside the write transaction: the next fresh row is read from
+        the index, not from this instance, so concurrent processes never
+        receive the same row.
+        """
+        rows = [r for (r,) in self._db.execute("SELECT row FROM free_rows LIMIT ?", (n,))]
+        self._db.executemany("DELETE FROM free_rows WHERE row = ?", [(r,) for r in rows])
+
+        next_row = self._db.execute(
+            "SELECT COALESCE(MAX(row) + 1, 0) FROM"
+            " (SELECT MAX(row) AS row FROM entries UNION ALL SELECT MAX(row) FROM free_rows)"
+        ).fetchone()[0]
+        next_row = max(next_row, max(rows, default=-1) + 1)
+        fresh = min(n - len(rows), self.max_rows - next_row)
+        if fresh > 0:
+            rows.extend(range(next_row, next_row + fresh))
+            self._ensure_capacity(next_row + fresh)
+
+        shortfall = n - len(rows)
+        if shortfall > 0:
+            evict = max(shortfall, int(self.max_rows * _EVICT_FRACTION))
+            victims = self._db.execute(
+                "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (evict,)
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+            victim_rows = [r for _, r in victims]
+            rows.extend(victim_rows[:shortfall])
+            self._db.executemany(
+                "INSERT INTO free_rows (row) VALUES (?)", [(r,) for r in victim_rows[shortfall:]]
+            )
+        return rows
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        """Return cached vectors for ``keys`` (``None`` for misses)."""
+        with self._lock:
+            # Look up, copy and touch in one write transaction: another process
+            # cannot evict a row and reuse it for a different key in between
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                results = self._get_locked(keys)
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return results
+
+    def _get_locked(self, keys: list[str]) -> list[np.ndarray | None]:
+        results: list[np.ndarray | None] = [None] * len(keys)
+        self._refresh()
+        if self._vectors is None or not keys:
+            return results
+
+        found: dict[str, int] = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            part = unique[i : i + 500]
+            placeholders = ",".join("?" * len(part))
+            found.update(self._db.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({placeholders})", part
+            ).fetchall())
+
+        if found and max(found.values()) >= self._vectors.shape[0]:
+            self._open_vectors()  # another process grew the file
+        for i, key in enumerate(keys):
+            row = found.get(key)
+            if row is not None:
+                results[i] = np.array(self._vectors[row])
+
+        if found:
+            self._tick += 1
+            self._db.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(self._tick, k) for k in found],
+            )
+        return results
+
+    def put_many(self, keys: list[str], vectors: np.ndarray):
+        """Store ``vectors`` (shape ``(len(keys), dim)``) under ``keys``."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not keys:
+            return
+        with self._lock:
+            # Takes the database write lock now, so the existence check, row
+            # allocation and inserts are atomic with respect to other processes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._put_locked(keys, vectors)
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+
+    def _put_locked(self, keys: list[str], vectors: np.ndarray):
+        self._refresh()
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._db.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+
+        existing = set()
+        unique: dict[str, int] = {}
+        for i, key in enumerate(keys):
+            unique.setdefault(key, i)
+        unique_keys = list(unique)
+        for i in range(0, len(unique_keys), 500):
+            part = unique_keys[i : i + 500]
+            placeholders = ",".join("?" * len(part))
+            existing.update(k for (k,) in self._db.execute(
+                f"SELECT key FROM entries WHERE key IN ({placeholders})", part
+            ))
+        pending = [(k, i) for k, i in unique.items() if k not in existing][: self.max_rows]
+        if not pending:
+            return
+
+        rows = self._allocate_rows(len(pending))
+        self._vectors[rows] = vectors[[i for _, i in pending]]
+        self._vectors.flush()
+
+        latest = self._db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        self._tick = max(self._tick, latest) + 1
+        self._db.executemany(
+            "INSERT INTO entries (key, row, last_used) VALUES (?, ?, ?)",
+            [(k, row, self._tick) for (k, _), row in zip(pending, rows)],
+        )
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": entries * (self.dim or 0) * 4,
+        }
+
+    def clear(self):
+        """Drop every cached vector and reset the counters."""
+        with self._lock:
+            self._db.executescript("DELETE FROM entries; DELETE FROM free_rows; DELETE FROM meta;")
+            self._vectors = None
+            self._vectors_path.unlink(missing_ok=True)
+            self.dim = None
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Flush vectors and close the index."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._db.close()
@@ -0,0 +1,77 @@
+"""Multi-process embedding pool for bulk ingestion on many-core CPUs.
+
+Each worker process holds its own SentenceTransformer replica with a fixed
+number of intra-op threads (with MODEL_SNAPSHOT the replicas' weights are
+mapped from one snapshot file, so they share physical memory); batches are sharded across workers and the
+results are concatenated back in input order.
+"""
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_MIN_SHARD = 8
+
+
+def _init_worker(threads: int):
+    """Pin the worker's BLAS/torch thread count, then load the model once."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    import torch
+
+    torch.set_num_threads(threads)
+
+    from rag.embeddings import get_model
+
+    get_model()
+
+
+def _encode_shard(texts: list[str]) -> np.ndarray:
+    from rag.embeddings import encode_local
+
+    return encode_local(texts)
+
+
+class EmbeddingPool:
+    """A pool of worker processes that each encode with their own model replica.
+
+    Use as a context manager or call ``close()`` to shut the workers down.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int = 1):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        # spawn, not fork: forking a process that already initialised torch
+        # threads can deadlock the children.
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker,),
+        )
+
+    def warmup(self):
+        """Block until every worker has loaded its model."""
+        list(self._executor.map(_encode_shard, [["warmup"]] * self.workers))
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode ``texts`` across the workers, returning rows in input order."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        shard = max(_MIN_SHARD, math.ceil(len(texts) / self.workers))
+        shards = [texts[i : i + shard] for i in range(0, len(texts), shard)]
+        return np.concatenate(list(self._executor.map(_encode_shard, shards)))
+
+    def close(self):
+        """Shut down the worker processes, cancelling any queued shards."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
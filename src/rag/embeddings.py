@@ -1,37 +1,189 @@
-"""Sentence-transformers embedding wrapper compatible with ChromaDB."""
+"""Sentence-transformers embedding wrapper compatible with ChromaDB.
 
-from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
-from sentence_transformers import SentenceTransformer
+sentence-transformers (and torch) are imported by ``get_model`` and chromadb
+by the first use of ``LocalEmbeddingFunction``, so importing this module is
+cheap; ``rag.chain.warmup`` pays those costs ahead of the first request.
+"""
 
-from rag.config import EMBEDDING_MODEL
+import atexit
+import threading
+from typing import TYPE_CHECKING
 
-_model: SentenceTransformer | None = None
+import numpy as np
 
+from rag.config import (
+    EMBEDDING_BATCH_TOKENS,
+    EMBEDDING_MODEL,
+    NORMALIZE_EMBEDDINGS,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_MB,
+    EMBEDDING_WORKERS,
+    EMBEDDING_WORKER_THREADS,
+    MODEL_SNAPSHOT,
+    MODEL_SNAPSHOT_DIR,
+)
+from rag.embedding_batches import estimate_lengths, plan_batches
+from rag.embedding_cache import EmbeddingCache, text_key
+from rag.embedding_pool import EmbeddingPool
 
-def get_model() -> SentenceTransformer:
-    """Return a singleton SentenceTransformer instance."""
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Batches smaller than this are encoded in-process; IPC would cost more than it saves
+POOL_MIN_TEXTS = 32
+
+_model: "SentenceTransformer | None" = None
+_cache: EmbeddingCache | None = None
+_pool: EmbeddingPool | None = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> "SentenceTransformer":
+    """Return a singleton SentenceTransformer instance.
+
+    With MODEL_SNAPSHOT it is mapped from a snapshot in MODEL_SNAPSHOT_DIR
+    (created on first use), so processes share the weights.
+    """
     global _model
-    if _model is None:
-        _model = SentenceTransformer(EMBEDDING_MODEL)
+    with _model_lock:
+        if _model is None:
+            if MODEL_SNAPSHOT:
+                from rag.model_snapshot import load_model
+
+                _model = load_model(EMBEDDING_MODEL, MODEL_SNAPSHOT_DIR)
+            else:
+                from sentence_transformers import SentenceTransformer
+
+                _model = SentenceTransformer(EMBEDDING_MODEL)
     return _model
 
 
-class LocalEmbeddingFunction(EmbeddingFunction[Documents]):
-    """ChromaDB-compatible embedding function using sentence-transformers."""
+def get_cache() -> EmbeddingCache | None:
+    """Return the singleton on-disk embedding cache, or None if disabled."""
+    global _cache
+    if _cache is None and EMBEDDING_CACHE_MAX_MB > 0:
+        # Normalized and raw vectors differ, so they get separate namespaces
+        namespace = f"{EMBEDDING_MODEL}-normalized" if NORMALIZE_EMBEDDINGS else EMBEDDING_MODEL
+        _cache = EmbeddingCache(EMBEDDING_CACHE_DIR, namespace, EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
 
-    def __call__(self, input: Documents) -> Embeddings:
-        model = get_model()
-        embeddings = model.encode(input, convert_to_numpy=True)
-        return embeddings.tolist()
 
+def get_pool() -> EmbeddingPool | None:
+    """Return the singleton multi-process embedding pool, or None if EMBEDDING_WORKERS <= 1."""
+    global _pool
+    if _pool is None and EMBEDDING_WORKERS > 1:
+        if MODEL_SNAPSHOT:
+            # Build the snapshot here so the workers only map it, rather than each racing to write one
+            get_model()
+        _pool = EmbeddingPool(EMBEDDING_WORKERS, EMBEDDING_WORKER_THREADS)
+        atexit.register(shutdown_pool)
+    return _pool
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    """Embed a list of texts and return vectors."""
+
+def shutdown_pool():
+    """Stop the embedding worker processes, if running."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def encode_local(texts: list[str]) -> np.ndarray:
+    """Encode with this process's model: float32, unit-normalized if NORMALIZE_EMBEDDINGS.
+
+    Texts are encoded in length-sorted batches of at most EMBEDDING_BATCH_TOKENS
+    padded tokens and the rows returned in input order.
+    """
     model = get_model()
-    embeddings = model.encode(texts, convert_to_numpy=True)
-    return embeddings.tolist()
+    if EMBEDDING_BATCH_TOKENS <= 0 or len(texts) <= 1:
+        vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=NORMALIZE_EMBEDDINGS)
+        return vectors.astype(np.float32, copy=False)
+
+    lengths = estimate_lengths(texts, model.get_max_seq_length())
+    out: np.ndarray | None = None
+    for batch in plan_batches(lengths, EMBEDDING_BATCH_TOKENS):
+        vectors = model.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            normalize_embeddings=NORMALIZE_EMBEDDINGS,
+        )
+        if out is None:
+            out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        out[batch] = vectors
+    return out
+
+
+def _encode_uncached(texts: list[str]) -> np.ndarray:
+    """Encode with the worker pool for bulk batches, in-process otherwise."""
+    pool = get_pool() if len(texts) >= POOL_MIN_TEXTS else None
+    if pool is not None:
+        return pool.encode(texts)
+    return encode_local(texts)
+
+
+def encode(texts: list[str]) -> np.ndarray:
+    """Encode texts to a ``(len(texts), dim)`` float32 matrix.
+
+    This is the ndarray-native hot path used by ingestion and retrieval: no
+    per-element Python floats are created, and the embedding cache is
+    consulted first.
+    """
+    cache = get_cache()
+    if cache is None or not texts:
+        return _encode_uncached(texts)
+
+    keys = [text_key(t) for t in texts]
+    cached = cache.get_many(keys)
+
+    missing: dict[str, int] = {}
+    for i, vec in enumerate(cached):
+        if vec is None:
+            missing.setdefault(keys[i], i)
+
+    fresh: dict[str, np.ndarray] = {}
+    if missing:
+        vectors = _encode_uncached([texts[i] for i in missing.values()])
+        cache.put_many(list(missing), vectors)
+        fresh = dict(zip(missing, vectors))
+
+    return np.stack([vec if vec is not None else fresh[key] for key, vec in zip(keys, cached)])
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed a list of texts and return vectors as Python lists.
+
+    Kept for callers that need plain lists; internal code uses ``encode``.
+    """
+    return encode(texts).tolist()
 
 
 def embed_query(text: str) -> list[float]:
     """Embed a single query string."""
     return embed_texts([text])[0]
+
+
+_embedding_function_cls: type | None = None
+
+
+def _local_embedding_function_cls() -> type:
+    global _embedding_function_cls
+    if _embedding_function_cls is None:
+        from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+        class LocalEmbeddingFunction(EmbeddingFunction[Documents]):
+            """ChromaDB-compatible embedding function using sentence-transformers."""
+
+            def __call__(self, input: Documents) -> Embeddings:
+                # Chroma's native Embeddings type is a list of float32 rows; views avoid copies
+                return list(encode(list(input)))
+
+        _embedding_function_cls = LocalEmbeddingFunction
+    return _embedding_function_cls
+
+
+def __getattr__(name: str):
+    # The Chroma subclass is built on first access so chromadb is not imported with this module
+    if name == "LocalEmbeddingFunction":
+        return _local_embedding_function_cls()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,454 @@
+"""Brute-force in-process vector index over memory-mapped NumPy arrays.
+
+A ``VectorBackend`` (see ``rag.vector_backend``) for corpora up to a few
+million chunks: a query is one matrix multiply over every stored vector
+followed by ``argpartition`` top-k selection, so results are exact for
+float32 and there is no graph to build or client round-trip to pay.
+
+With quantization the scan runs over compact codes instead: ``int8``
+(symmetric per-row scale, 1/4 of float32) or ``binary`` (one sign bit per
+dimension, 1/32, compared by Hamming distance). The best ``rescore x k``
+candidates are then rescored against the full-precision vectors, which stay
+on disk and are only paged in for those rows.
+
+Layout of the index directory:
+
+- ``vectors.f32``: one unit-normalized float32 row per chunk.
+- ``codes.i8`` + ``scales.f32`` (int8) or ``codes.bits`` (binary): the
+  scanned codes, one row per chunk.
+- ``chunks.sqlite3``: chunk ID, row, document and JSON metadata.
+
+Vector and code files are memory-mapped and grown by doubling; rows freed by
+deletes are reused by later inserts. Rows are handed out inside a SQLite
+write transaction, so several processes can share one index directory;
+each picks up the others' writes when ``PRAGMA data_version`` changes.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+_INITIAL_ROWS = 1024
+_SCORE_BLOCK_ROWS = 65536  # rows scored per matmul
+_INT8_BLOCK_ROWS = 512  # int8 rows dequantized at a time; the float32 copy stays in cache
+_SCORE_BUFFER_BYTES = 256 * 1024 * 1024  # cap on the (rows, queries) score matrix
+_SQL_BATCH = 500  # IDs per "IN (...)" lookup
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (int8 rows, float32 scales)."""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed into ``ceil(dim / 8)`` uint8 per row."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+    _POPCOUNT_WORDS = True  # count 64 bits per element when the code width allows
+else:  # NumPy < 2.0
+    _POPCOUNT_WORDS = False
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(codes: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_TABLE[codes]
+
+
+class FlatIndex:
+    """Exact (float32) or quantized flat index persisted in ``path``. Process- and thread-safe.
+
+    ``rescore`` sets the quantized shortlist to ``rescore * n_results``
+    candidates reranked by full-precision cosine; ``0`` keeps the top
+    ``n_results`` by code score (their distances are still exact).
+    """
+
+    def __init__(self, path: str | Path, quantization: str = "none", rescore: int = 4):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}. Supported: {QUANTIZATIONS}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.quantization = quantization
+        self.rescore = rescore
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path / "chunks.sqlite3", timeout=30, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, document TEXT, metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY, seq INTEGER NOT NULL);
+            """
+        )
+        self.dim: int | None = None
+        self._vectors: np.ndarray | None = None  # full precision, float32
+        self._codes: np.ndarray | None = None  # int8 or packed bits; None without quantization
+        self._scales: np.ndarray | None = None
+        self._live = np.zeros(0, dtype=bool)
+        self._size = 0  # rows in use or freed, from the start
+        self._count = 0
+        self._seq = 0  # change sequence of the last write this instance has applied
+        self._generation: str | None = None
+        self._version: int | None = None
+        with self._transaction(write=True):
+            if "seq" not in {r[1] for r in self._db.execute("PRAGMA table_info(chunks)")}:
+                self._db.execute("ALTER TABLE chunks ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS chunks_seq ON chunks (seq)")
+            stored = dict(self._db.execute("SELECT key, value FROM info"))
+            if stored.get("quantization", quantization) != quantization:
+                raise ValueError(
+                    f"{self.path} holds a {stored['quantization']} index; clear it to switch to {quantization}"
+                )
+            if "dim" in stored and "size" not in stored:
+                # Written before rows were allocated in SQLite: record the size and free gaps
+                used = {r for (r,) in self._db.execute("SELECT row FROM chunks")}
+                size = max(used, default=-1) + 1
+                self._db.executemany(
+                    "INSERT INTO free_rows (row, seq) VALUES (?, 0)", [(r,) for r in range(size) if r not in used]
+                )
+                self._db.execute("INSERT INTO info (key, value) VALUES ('size', ?)", (str(size),))
+                self._load(dict(self._db.execute("SELECT key, value FROM info")))
+
+    @contextmanager
+    def _transaction(self, write: bool = False):
+        """Hold the SQLite lock (shared, or the write lock with ``write``) and sync first.
+
+        Inside a read transaction other processes cannot commit, so rows
+        looked up stay valid while their vectors are read.
+        """
+        self._db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            self._sync()
+            yield
+        except BaseException:
+            self._db.rollback()
+            self._version = None  # reload on the next sync, dropping changes made in memory
+            self._generation = None
+            raise
+        self._db.commit()
+
+    def _sync(self):
+        """Pick up rows written or freed by other processes since this instance last looked."""
+        info = dict(self._db.execute("SELECT key, value FROM info"))
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return
+        self._version = version
+        if info.get("generation", "0") != self._generation or (self.dim is None and "dim" in info):
+            self._load(info)
+            return
+        seq = int(info.get("seq", 0))
+        if seq == self._seq:
+            return
+        size = int(info.get("size", 0))
+        if size > len(self._live):
+            self._open(max(self._capacity_on_disk(), size))
+        self._size = size
+        written = [r for (r,) in self._db.execute("SELECT row FROM chunks WHERE seq > ?", (self._seq,))]
+        freed = [r for (r,) in self._db.execute("SELECT row FROM free_rows WHERE seq > ?", (self._seq,))]
+        self._live[written] = True
+        self._live[freed] = False
+        self._count = int(self._live[: self._size].sum())
+        self._seq = seq
+
+    def _load(self, info: dict):
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self._generation = info.get("generation", "0")
+        self._seq = int(info.get("seq", 0))
+        self._size = int(info.get("size", 0))
+        self._vectors = self._codes = self._scales = None
+        self._live = np.zeros(0, dtype=bool)
+        rows = [r for (r,) in self._db.execute("SELECT row FROM chunks")]
+        if self.dim is not None:
+            self._open(max(self._capacity_on_disk(), self._size))
+            self._live[rows] = True
+        self._count = len(rows)
+
+    def _set_info(self, **values):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    # -- storage -----------------------------------------------------------
+
+    def _capacity_on_disk(self) -> int:
+        file = self.path / "vectors.f32"
+        return file.stat().st_size // (self.dim * 4) if file.exists() else 0
+
+    def _flush(self):
+        for array in (self._vectors, self._codes, self._scales):
+            if array is not None:
+                array.flush()
+
+    def _map(self, file: Path, dtype, shape: tuple) -> np.ndarray:
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(file, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(file, dtype=dtype, mode="r+", shape=shape)
+
+    def _open(self, capacity: int):
+        self._flush()
+        self._vectors = self._map(self.path / "vectors.f32", np.float32, (capacity, self.dim))
+        if self.quantization == "int8":
+            self._codes = self._map(self.path / "codes.i8", np.int8, (capacity, self.dim))
+            self._scales = self._map(self.path / "scales.f32", np.float32, (capacity,))
+        elif self.quantization == "binary":
+            self._codes = self._map(self.path / "codes.bits", np.uint8, (capacity, (self.dim + 7) // 8))
+        live = np.zeros(capacity, dtype=bool)
+        kept = min(capacity, len(self._live))
+        live[:kept] = self._live[:kept]
+        self._live = live
+
+    def _allocate(self, n: int) -> list[int]:
+        """Hand out ``n`` rows, freed ones first; call inside the write transaction."""
+        rows = [r for (r,) in self._db.execute("SELECT row FROM free_rows ORDER BY row LIMIT ?", (n,))]
+        self._db.executemany("DELETE FROM free_rows WHERE row = ?", [(r,) for r in rows])
+        extra = n - len(rows)
+        rows.extend(range(self._size, self._size + extra))
+        self._size += extra
+        capacity = len(self._live)
+        if self._size > capacity:
+            while capacity < self._size:
+                capacity = max(capacity * 2, _INITIAL_ROWS)
+            self._open(capacity)
+        return rows
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    # -- VectorBackend -----------------------------------------------------
+
+    def count(self) -> int:
+        with self._lock, self._transaction():
+            return self._count
+
+    def _stored_rows(self, ids: list[str]) -> dict[str, int]:
+        found = {}
+        for i in range(0, len(ids), _SQL_BATCH):
+            batch = ids[i : i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._fetch(f"SELECT id, row FROM chunks WHERE id IN ({placeholders})", batch))
+        return found
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if embeddings is None:
+            raise ValueError("FlatIndex stores precomputed embeddings; pass embeddings to upsert")
+        vectors = _unit_rows(embeddings)
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        with self._lock, self._transaction(write=True):
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_info(dim=self.dim, quantization=self.quantization)
+                self._open(_INITIAL_ROWS)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            # Later duplicates of an ID win, as with repeated upserts
+            latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+            row_of = self._stored_rows(list(latest))
+            new_ids = [chunk_id for chunk_id in latest if chunk_id not in row_of]
+            row_of.update(zip(new_ids, self._allocate(len(new_ids))))
+            order = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+            rows = np.fromiter((row_of[chunk_id] for chunk_id in latest), dtype=np.int64, count=len(latest))
+            self._vectors[rows] = vectors[order]
+            if self.quantization == "int8":
+                self._codes[rows], self._scales[rows] = quantize_int8(vectors[order])
+            elif self.quantization == "binary":
+                self._codes[rows] = quantize_binary(vectors[order])
+            self._live[rows] = True
+            self._count += len(new_ids)
+            self._flush()
+            self._seq += 1
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (id, row, document, metadata, seq) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, row_of[chunk_id], documents[i],
+                     None if metadatas[i] is None else json.dumps(metadatas[i]), self._seq)
+                    for chunk_id, i in latest.items()
+                ],
+            )
+            self._set_info(size=self._size, seq=self._seq)
+
+    def update(self, ids, metadatas):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)],
+            )
+            self._db.commit()
+
+    def delete(self, ids):
+        with self._lock, self._transaction(write=True):
+            rows = list(self._stored_rows(list(dict.fromkeys(ids))).values())
+            if not rows:
+                return
+            self._live[rows] = False
+            self._count -= len(rows)
+            self._seq += 1
+            self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+            self._db.executemany("INSERT INTO free_rows (row, seq) VALUES (?, ?)", [(row, self._seq) for row in rows])
+            self._set_info(seq=self._seq)
+
+    def _fetch(self, sql: str, params: list) -> list[tuple]:
+        return self._db.execute(sql, params).fetchall()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock, self._transaction():
+            if ids is not None:
+                found = {}
+                for i in range(0, len(ids), _SQL_BATCH):
+                    batch = ids[i : i + _SQL_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    for row in self._fetch(
+                        f"SELECT id, row, document, metadata FROM chunks WHERE id IN ({placeholders})", batch
+                    ):
+                        found[row[0]] = row
+                records = [found[chunk_id] for chunk_id in dict.fromkeys(ids) if chunk_id in found]
+            else:
+                sql = "SELECT id, row, document, metadata FROM chunks"
+                params: list = []
+                if where:
+                    sql += " WHERE " + " AND ".join("json_extract(metadata, ?) = ?" for _ in where)
+                    for key, value in where.items():
+                        params += [f"$.{key}", value]
+                sql += " ORDER BY row"
+                if limit is not None or offset:
+                    sql += " LIMIT ? OFFSET ?"
+                    params += [-1 if limit is None else limit, offset or 0]
+                records = self._fetch(sql, params)
+            embeddings = None
+            if "embeddings" in include:
+                rows = np.array([r[1] for r in records], dtype=np.int64)
+                embeddings = self._read_vectors(rows) if len(rows) else np.zeros((0, self.dim or 0), np.float32)
+        return {
+            "ids": [r[0] for r in records],
+            "documents": [r[2] for r in records] if "documents" in include else None,
+            "metadatas": [None if r[3] is None else json.loads(r[3]) for r in records]
+            if "metadatas" in include else None,
+            "embeddings": embeddings,
+        }
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Approximate (exact without quantization) similarity of every row with each query.
+
+        Returns a (rows, queries) matrix over the first ``_size`` rows; higher
+        is closer. Binary codes score ``-hamming distance``.
+        """
+        scores = np.empty((self._size, len(queries)), dtype=np.float32)
+        queries_t = np.ascontiguousarray(queries.T)
+        query_bits = quantize_binary(queries) if self.quantization == "binary" else None
+        as_words = query_bits is not None and _POPCOUNT_WORDS and query_bits.shape[1] % 8 == 0
+        if as_words:
+            query_bits = query_bits.view(np.uint64)
+        step = _INT8_BLOCK_ROWS if self.quantization == "int8" else _SCORE_BLOCK_ROWS
+        for start in range(0, self._size, step):
+            stop = min(start + step, self._size)
+            if self.quantization == "binary":
+                block = self._codes[start:stop]
+                block = block.view(np.uint64) if as_words else block
+                for q, bits in enumerate(query_bits):
+                    scores[start:stop, q] = -_popcount(block ^ bits).sum(axis=1, dtype=np.int32)
+            elif self.quantization == "int8":
+                np.matmul(self._codes[start:stop].astype(np.float32), queries_t, out=scores[start:stop])
+                scores[start:stop] *= self._scales[start:stop, None]
+            else:
+                np.matmul(self._vectors[start:stop], queries_t, out=scores[start:stop])
+        scores[~self._live[: self._size]] = -np.inf
+        return scores
+
+    def query(self, query_embeddings, n_results=10, include=None):
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        queries = _unit_rows(query_embeddings)
+        result_rows: list[np.ndarray] = []
+        result_scores: list[np.ndarray] = []
+        result_vectors: list[np.ndarray] = []
+        with self._lock, self._transaction():
+            k = min(n_results, self._count)
+            if k > 0:
+                shortlist = k
+                if self.quantization != "none" and self.rescore > 0:
+                    shortlist = min(k * self.rescore, self._count)
+                per_call = max(1, _SCORE_BUFFER_BYTES // (4 * self._size))
+                for start in range(0, len(queries), per_call):
+                    scores = self._scores(queries[start : start + per_call])
+                    if shortlist < self._size:
+                        top = np.argpartition(-scores, shortlist - 1, axis=0)[:shortlist]
+                    else:
+                        top = np.argsort(-scores, axis=0)[:shortlist]
+                    for q in range(scores.shape[1]):
+                        rows = top[:, q]
+                        # Rescore against full-precision vectors (read from disk for these
+                        # rows only), which also makes a row's distance independent of the
+                        # other queries that shared the matmul
+                        vectors = self._read_vectors(rows)
+                        exact = vectors @ queries[start + q]
+                        order = np.argsort(-exact, kind="stable")[:k]
+                        result_rows.append(rows[order])
+                        result_scores.append(exact[order])
+                        result_vectors.append(vectors[order])
+            else:
+                result_rows = [np.zeros(0, dtype=np.int64)] * len(queries)
+                result_scores = [np.zeros(0, dtype=np.float32)] * len(queries)
+                result_vectors = [np.zeros((0, self.dim or 0), dtype=np.float32)] * len(queries)
+
+            by_row = {}
+            wanted = sorted({int(r) for rows in result_rows for r in rows})
+            for i in range(0, len(wanted), _SQL_BATCH):
+                batch = wanted[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for record in self._fetch(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({placeholders})", batch
+                ):
+                    by_row[record[0]] = record
+
+        records = [[by_row[int(r)] for r in rows] for rows in result_rows]
+        return {
+            "ids": [[r[1] for r in recs] for recs in records],
+            "documents": [[r[2] for r in recs] for recs in records] if "documents" in include else None,
+            "metadatas": [[None if r[3] is None else json.loads(r[3]) for r in recs] for recs in records]
+            if "metadatas" in include else None,
+            "distances": [(1.0 - s).tolist() for s in result_scores] if "distances" in include else None,
+            "embeddings": result_vectors if "embeddings" in include else None,
+        }
+
+    # -- maintenance -------------------------------------------------------
+
+    def clear(self):
+        """Delete every chunk and the vector files."""
+        with self._lock, self._transaction(write=True):
+            self._vectors = self._codes = self._scales = None
+            for name in ("vectors.f32", "codes.i8", "scales.f32", "codes.bits"):
+                (self.path / name).unlink(missing_ok=True)
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("DELETE FROM free_rows")
+            self._db.execute("DELETE FROM info")
+            # Other processes see the new generation and drop their maps of the old files
+            self._generation = str(int(self._generation or 0) + 1)
+            self._set_info(generation=self._generation)
+            self.dim = None
+            self._seq = self._size = self._count = 0
+            self._live = np.zeros(0, dtype=bool)
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
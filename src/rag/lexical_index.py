@@ -0,0 +1,749 @@
+"""Persistent BM25 inverted index for exact-match (part number, SKU, error code) retrieval.
+
+Posting lists are stored in SQLite as compact numpy blobs (int32 doc numbers
+and uint16 term frequencies). Each ``add`` writes one segment. Within a
+segment a term's postings are ordered by impact (their BM25 term-frequency
+component) and split into blocks of doubling size; every block row carries
+its largest tf and shortest document, so the best score it can contribute
+is known without reading it. A search reads blocks best bound first across
+all query terms until no unseen document can reach the top results, then
+only completes the scores of the documents that still can (score-at-a-time
+with MaxScore-style bounds), so the results and their scores are exact while
+common words are mostly skimmed rather than scored. Queries with few
+postings are scored exhaustively without per-document arrays.
+Terms present in more than ``max_df_ratio`` of the documents contribute
+almost nothing to BM25 and are skipped when the query has rarer terms.
+
+Segments are merged size-tiered: ``merge_factor`` segments of one level
+become one segment of the next, so a posting is rewritten a logarithmic
+number of times. Merges run on a background thread in short transactions
+of a few terms each, off the ``add`` path, and drop replaced and deleted
+documents. Once dead document numbers outnumber live documents (and
+``compact_min_dead``), live documents are renumbered densely.
+
+Several processes may share one index file (the app and ``ingest.py``).
+Document numbers come from a counter in SQLite, taken under ``BEGIN
+IMMEDIATE``, and the in-memory document lengths and liveness mask are
+brought up to date from a change sequence whenever ``PRAGMA data_version``
+shows that another connection committed.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./:#][a-z0-9]+)*")
+_SPLIT_RE = re.compile(r"[-_./:#]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+_SQL_BATCH = 500
+# Postings in the first block of a term's segment; each further block doubles, up to _MAX_BLOCK
+_FIRST_BLOCK = 128
+_MAX_BLOCK = 16384
+# Segments of level L hold at least _LEVEL_BASE * merge_factor**L documents
+_LEVEL_BASE = 1024
+# Postings moved per merge transaction, so writers never wait long on a merge
+_MERGE_BUDGET = 200_000
+# Query terms scored (one bit each in the per-document mask of terms seen)
+_MAX_QUERY_TERMS = 63
+
+_POSTINGS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        term TEXT NOT NULL, seg INTEGER NOT NULL, block INTEGER NOT NULL,
+        n INTEGER NOT NULL, max_tf INTEGER NOT NULL, min_len INTEGER NOT NULL,
+        docs BLOB NOT NULL, tfs BLOB NOT NULL
+    );
+"""
+_POSTINGS_INDEXES = """
+    CREATE INDEX IF NOT EXISTS postings_term ON postings (term, seg, block, n, max_tf, min_len);
+    CREATE INDEX IF NOT EXISTS postings_seg ON postings (seg, term, n);
+"""
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    CREATE TABLE IF NOT EXISTS docs (
+        doc INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, length INTEGER NOT NULL,
+        alive INTEGER NOT NULL DEFAULT 1, seq INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS docs_chunk_id ON docs (chunk_id);
+    CREATE INDEX IF NOT EXISTS docs_seq ON docs (seq);
+    CREATE TABLE IF NOT EXISTS segments (
+        seg INTEGER PRIMARY KEY, level INTEGER NOT NULL, docs INTEGER NOT NULL,
+        building INTEGER NOT NULL DEFAULT 0, merged_into INTEGER
+    );
+    """
+    + _POSTINGS_TABLE.format(name="postings")
+    + _POSTINGS_INDEXES
+)
+
+
+def _execute_script(db: sqlite3.Connection, script: str):
+    # executescript() would commit the caller's transaction first
+    for statement in script.split(";"):
+        if statement.strip():
+            db.execute(statement)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; compound tokens such as ``AX-2048`` also yield their parts."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(p for p in _SPLIT_RE.split(token) if p and p not in _STOPWORDS)
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 index over chunk texts, keyed by chunk ID. Safe to share between threads and processes."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_factor: int = 8,
+        max_df_ratio: float = 0.25,
+        compact_min_dead: int = 1024,
+        background_merge: bool = True,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.merge_factor = merge_factor
+        self.max_df_ratio = max_df_ratio
+        self.compact_min_dead = compact_min_dead
+        self.background_merge = background_merge
+        self._lock = threading.Lock()  # serializes use of self._db
+        self._state_lock = threading.Lock()  # guards the in-memory arrays
+        self._merge_lock = threading.Lock()  # one merge step at a time in this process
+        self._merge_wanted = threading.Event()
+        self._merge_thread: threading.Thread | None = None
+        self._merge_db: sqlite3.Connection | None = None
+        self._closed = False
+        self._versions: dict[sqlite3.Connection, int] = {}
+        self._epoch: int | None = None
+        self._db = self._connect()
+        with self._transaction(self._db, write=True), self._state_lock:
+            migrate = self._upgrade_schema(self._db)
+            _execute_script(self._db, _SCHEMA)
+            meta = self._sync(self._db)
+            if migrate:
+                self._migrate_v1(self._db, meta)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+
+    @contextmanager
+    def _transaction(self, db: sqlite3.Connection, write: bool):
+        db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield
+        except BaseException:
+            db.execute("ROLLBACK")
+            if write:
+                # The arrays may hold the rolled-back changes; reload them on the next sync
+                self._epoch = None
+            raise
+        db.execute("COMMIT")
+
+    # -- in-memory document state -------------------------------------------------
+
+    def _load(self, db: sqlite3.Connection, meta: dict):
+        rows = db.execute("SELECT doc, length, alive FROM docs").fetchall()
+        arr = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        # Dead numbers above the last stored document may still appear in postings
+        size = max(int(arr[:, 0].max()) + 1 if len(arr) else 0, meta.get("next_doc", 0))
+        self._lengths = np.zeros(size, dtype=np.int32)
+        self._alive = np.zeros(size, dtype=bool)
+        self._lengths[arr[:, 0]] = arr[:, 1]
+        self._alive[arr[:, 0]] = arr[:, 2].astype(bool)
+        self._n_alive = int(self._alive.sum())
+        self._total_length = int(self._lengths[self._alive].sum())
+        self._seq = meta.get("seq", 0)
+        self._epoch = meta.get("epoch", 0)
+
+    def _apply(self, rows: list[tuple], next_doc: int):
+        """Apply (doc, length, alive) rows written by another connection."""
+        arr = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        size = max(len(self._lengths), next_doc, int(arr[:, 0].max()) + 1 if len(arr) else 0)
+        if size > len(self._lengths):
+            grow = size - len(self._lengths)
+            self._lengths = np.concatenate([self._lengths, np.zeros(grow, dtype=np.int32)])
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        docs, lengths, alive = arr[:, 0], arr[:, 1], arr[:, 2].astype(bool)
+        was = self._alive[docs]
+        self._n_alive += int(alive.sum()) - int(was.sum())
+        self._total_length += int(lengths[alive].sum()) - int(self._lengths[docs][was].sum())
+        self._lengths[docs] = lengths
+        self._alive[docs] = alive
+
+    def _sync(self, db: sqlite3.Connection) -> dict:
+        """Bring the arrays up to date with ``db`` and return its meta values.
+
+        Call inside a transaction on ``db`` while holding ``_state_lock``.
+        """
+        # Reading meta first takes the read lock, so data_version describes this snapshot
+        meta = dict(db.execute("SELECT name, value FROM meta").fetchall())
+        version = db.execute("PRAGMA data_version").fetchone()[0]
+        if self._versions.get(db) == version and self._epoch is not None:
+            return meta
+        self._versions[db] = version
+        if meta.get("epoch", 0) != self._epoch:
+            self._load(db, meta)
+        elif meta.get("seq", 0) != self._seq:
+            rows = db.execute("SELECT doc, length, alive FROM docs WHERE seq > ?", (self._seq,)).fetchall()
+            self._apply(rows, meta.get("next_doc", 0))
+            self._seq = meta.get("seq", 0)
+        return meta
+
+    @staticmethod
+    def _set_meta(db: sqlite3.Connection, **values: int):
+        db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", list(values.items()))
+
+    def _avg_len(self) -> float:
+        return self._total_length / self._n_alive if self._n_alive else 1.0
+
+    def _tf_part(self, tfs: np.ndarray, lengths: np.ndarray, avg_len: float) -> np.ndarray:
+        """BM25 term-frequency component; grows with tf and shrinks with document length."""
+        tfs = np.asarray(tfs, dtype=np.float64)
+        return tfs * (self.k1 + 1.0) / (tfs + self.k1 * (1.0 - self.b + self.b * np.asarray(lengths) / avg_len))
+
+    def _level(self, n_docs: int) -> int:
+        return max(0, int(math.log(max(n_docs, 1) / _LEVEL_BASE, self.merge_factor)))
+
+    def __len__(self) -> int:
+        with self._lock, self._transaction(self._db, write=False), self._state_lock:
+            self._sync(self._db)
+            return self._n_alive
+
+    # -- writes -------------------------------------------------------------------
+
+    def _ids_to_docs(self, db: sqlite3.Connection, chunk_ids: list[str]) -> list[int]:
+        docs = []
+        for i in range(0, len(chunk_ids), _SQL_BATCH):
+            part = chunk_ids[i : i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(part))
+            docs += [d for (d,) in db.execute(
+                f"SELECT doc FROM docs WHERE alive = 1 AND chunk_id IN ({placeholders})", part
+            )]
+        return docs
+
+    def _kill(self, db: sqlite3.Connection, docs: list[int], seq: int):
+        if docs:
+            db.executemany("UPDATE docs SET alive = 0, seq = ? WHERE doc = ?", [(seq, d) for d in docs])
+            self._alive[docs] = False
+            self._n_alive -= len(docs)
+            self._total_length -= int(self._lengths[docs].sum())
+
+    def _segment_rows(
+        self,
+        seg: int,
+        terms: list[str],
+        term_of: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        lengths: np.ndarray,
+        avg_len: float,
+    ) -> list[tuple]:
+        """Postings rows of segment ``seg``: per term, impact-ordered blocks of doubling size.
+
+        ``term_of[i]`` indexes ``terms`` for posting ``i``; ``lengths`` is
+        indexed by doc number.
+        """
+        if not len(docs):
+            return []
+        doc_lengths = lengths[docs]
+        order = np.lexsort((-self._tf_part(tfs, doc_lengths, avg_len), term_of))
+        term_of, doc_lengths = term_of[order], doc_lengths[order]
+        docs, tfs = docs[order].astype("<i4"), tfs[order].astype("<u2")
+        starts = np.flatnonzero(np.r_[True, term_of[1:] != term_of[:-1]])
+        ends = np.r_[starts[1:], len(term_of)]
+        # Most terms fit in one block; take their bounds in one vectorized pass
+        max_tfs = np.maximum.reduceat(tfs, starts).tolist()
+        min_lens = np.minimum.reduceat(doc_lengths, starts).tolist()
+        rows = []
+        for t, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            term = terms[term_of[start]]
+            if end - start <= _FIRST_BLOCK:
+                rows.append((term, seg, 0, end - start, max_tfs[t], min_lens[t],
+                             docs[start:end].tobytes(), tfs[start:end].tobytes()))
+                continue
+            block, size = 0, _FIRST_BLOCK
+            while start < end:
+                stop = min(start + size, end)
+                rows.append((
+                    term, seg, block, stop - start, int(tfs[start:stop].max()), int(doc_lengths[start:stop].min()),
+                    docs[start:stop].tobytes(), tfs[start:stop].tobytes(),
+                ))
+                start, block, size = stop, block + 1, min(2 * size, _MAX_BLOCK)
+        return rows
+
+    @staticmethod
+    def _insert_rows(db: sqlite3.Connection, table: str, rows: list[tuple]):
+        db.executemany(
+            f"INSERT INTO {table} (term, seg, block, n, max_tf, min_len, docs, tfs) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def add(self, chunks: list[dict]):
+        """Index chunks (dicts with id and text); re-adding an ID replaces it."""
+        if not chunks:
+            return
+        tokens = [tokenize(c["text"]) for c in chunks]
+        lengths = [len(t) for t in tokens]
+        vocab: dict[str, int] = {}
+        term_ids = np.array([vocab.setdefault(t, len(vocab)) for doc in tokens for t in doc], dtype=np.int64)
+        # One posting per distinct (chunk, term), with its count as tf
+        pairs, tfs = np.unique(np.repeat(np.arange(len(chunks)), lengths) * len(vocab) + term_ids, return_counts=True)
+        offsets, term_of = np.divmod(pairs, max(len(vocab), 1))
+        tfs = np.minimum(tfs, 65535)
+
+        with self._lock:
+            with self._transaction(self._db, write=True), self._state_lock:
+                meta = self._sync(self._db)
+                seq = meta.get("seq", 0) + 1
+                self._kill(self._db, self._ids_to_docs(self._db, [c["id"] for c in chunks]), seq)
+
+                start = len(self._lengths)
+                self._db.executemany(
+                    "INSERT INTO docs (doc, chunk_id, length, seq) VALUES (?, ?, ?, ?)",
+                    [(start + i, c["id"], n, seq) for i, (c, n) in enumerate(zip(chunks, lengths))],
+                )
+                self._lengths = np.concatenate([self._lengths, np.array(lengths, dtype=np.int32)])
+                self._alive = np.concatenate([self._alive, np.ones(len(chunks), dtype=bool)])
+                self._n_alive += len(chunks)
+                self._total_length += sum(lengths)
+
+                seg = self._db.execute(
+                    "INSERT INTO segments (level, docs) VALUES (?, ?)", (self._level(len(chunks)), len(chunks))
+                ).lastrowid
+                self._insert_rows(self._db, "postings", self._segment_rows(
+                    seg, list(vocab), term_of, start + offsets, tfs, self._lengths, self._avg_len(),
+                ))
+                self._set_meta(self._db, next_doc=start + len(chunks), seq=seq)
+                self._seq = seq
+            self._schedule_merge()
+
+    def delete(self, chunk_ids: list[str]):
+        """Remove chunks from the index (their postings are dropped by later merges)."""
+        with self._lock:
+            with self._transaction(self._db, write=True), self._state_lock:
+                meta = self._sync(self._db)
+                seq = meta.get("seq", 0) + 1
+                self._kill(self._db, self._ids_to_docs(self._db, list(chunk_ids)), seq)
+                self._set_meta(self._db, seq=seq)
+                self._seq = seq
+            self._schedule_merge()
+
+    def clear(self):
+        """Remove every document."""
+        with self._lock, self._transaction(self._db, write=True), self._state_lock:
+            meta = self._sync(self._db)
+            self._db.execute("DELETE FROM docs")
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM segments")
+            meta = {**meta, "epoch": meta.get("epoch", 0) + 1, "seq": meta.get("seq", 0) + 1, "next_doc": 0}
+            self._set_meta(self._db, **meta)
+            self._load(self._db, meta)
+
+    # -- merging ------------------------------------------------------------------
+
+    def _schedule_merge(self):
+        if not self.background_merge:
+            self.merge()
+            return
+        self._merge_wanted.set()
+        if self._merge_thread is None or not self._merge_thread.is_alive():
+            self._merge_thread = threading.Thread(target=self._merge_loop, name="rag-lexical-merge", daemon=True)
+            self._merge_thread.start()
+
+    def _merge_loop(self):
+        while not self._closed:
+            self._merge_wanted.wait()
+            self._merge_wanted.clear()
+            try:
+                while not self._closed and self._merge_step():
+                    pass
+            except sqlite3.OperationalError:
+                # Another process held the write lock past the timeout; retry later
+                if not self._closed:
+                    time.sleep(1.0)
+                    self._merge_wanted.set()
+
+    def merge(self):
+        """Run every pending merge and compaction now (after ``add`` they run on a background thread)."""
+        while self._merge_step():
+            pass
+
+    def _merge_step(self) -> bool:
+        """Do one short unit of merge work in its own transaction; False when there is none."""
+        with self._merge_lock:
+            if self._merge_db is None:
+                self._merge_db = self._connect()
+            db = self._merge_db
+            with self._transaction(db, write=True):
+                with self._state_lock:
+                    meta = self._sync(db)
+                    alive, lengths = self._alive.copy(), self._lengths
+                    n_alive, avg_len = self._n_alive, self._avg_len()
+                if len(alive) - n_alive <= max(self.compact_min_dead, n_alive):
+                    return self._merge_segments(db, alive, lengths, avg_len)
+                self._compact(db, meta, alive, lengths)
+            # Renumbered: every connection, this one included, reloads the arrays
+            self._epoch = None
+            return True
+
+    def _merge_segments(self, db: sqlite3.Connection, alive: np.ndarray, lengths: np.ndarray, avg_len: float) -> bool:
+        row = db.execute("SELECT merged_into FROM segments WHERE merged_into IS NOT NULL LIMIT 1").fetchone()
+        if row is None:
+            row = db.execute(
+                "SELECT level FROM segments WHERE building = 0 AND merged_into IS NULL"
+                " GROUP BY level HAVING COUNT(*) >= ? ORDER BY level LIMIT 1",
+                (self.merge_factor,),
+            ).fetchone()
+            if row is None:
+                return False
+            level = row[0]
+            sources = db.execute(
+                "SELECT seg, docs FROM segments WHERE level = ? AND building = 0 AND merged_into IS NULL"
+                " ORDER BY seg LIMIT ?",
+                (level, self.merge_factor),
+            ).fetchall()
+            n_docs = sum(n for _, n in sources)
+            target = db.execute(
+                "INSERT INTO segments (level, docs, building) VALUES (?, ?, 1)",
+                (max(level + 1, self._level(n_docs)), n_docs),
+            ).lastrowid
+            db.executemany("UPDATE segments SET merged_into = ? WHERE seg = ?", [(target, s) for s, _ in sources])
+            return True
+
+        target = row[0]
+        sources = [s for (s,) in db.execute("SELECT seg FROM segments WHERE merged_into = ?", (target,))]
+        # Move the next terms of the first source that still has postings, up to the budget
+        terms, budget = [], 0
+        for seg in sources:
+            for term, n in db.execute(
+                "SELECT term, SUM(n) FROM postings WHERE seg = ? GROUP BY term ORDER BY term LIMIT ?",
+                (seg, _SQL_BATCH),
+            ).fetchall():
+                terms.append(term)
+                budget += n
+                if budget >= _MERGE_BUDGET:
+                    break
+            if terms:
+                break
+        if not terms:
+            db.execute("DELETE FROM segments WHERE merged_into = ?", (target,))
+            db.execute("UPDATE segments SET building = 0 WHERE seg = ?", (target,))
+            return True
+
+        rows = db.execute(
+            f"SELECT rowid, term, docs, tfs FROM postings WHERE term IN ({','.join('?' * len(terms))})"
+            f" AND seg IN ({','.join('?' * len(sources))})",
+            (*terms, *sources),
+        ).fetchall()
+        index = {term: i for i, term in enumerate(terms)}
+        docs = [np.frombuffer(d, dtype="<i4") for _, _, d, _ in rows]
+        term_of = np.repeat([index[t] for _, t, _, _ in rows], [len(d) for d in docs])
+        docs = np.concatenate(docs)
+        tfs = np.concatenate([np.frombuffer(t, dtype="<u2") for _, _, _, t in rows])
+        keep = alive[docs]
+        db.executemany("DELETE FROM postings WHERE rowid = ?", [(r[0],) for r in rows])
+        self._insert_rows(db, "postings", self._segment_rows(
+            target, terms, term_of[keep], docs[keep], tfs[keep], lengths, avg_len
+        ))
+        return True
+
+    def _copy_postings(
+        self,
+        db: sqlite3.Connection,
+        source: str,
+        dest: str,
+        seg: int,
+        new_of: np.ndarray,
+        lengths: np.ndarray,
+        avg_len: float,
+    ):
+        """Rewrite every posting of ``source`` into segment ``seg`` of ``dest``.
+
+        Doc numbers are mapped through ``new_of`` (-1 drops the posting);
+        ``lengths`` is indexed by the new numbers.
+        """
+        batch: list[tuple[str, bytes, bytes]] = []
+        size = 0
+
+        def flush():
+            terms = sorted({t for t, _, _ in batch})
+            index = {t: i for i, t in enumerate(terms)}
+            docs = [new_of[np.frombuffer(d, dtype="<i4")] for _, d, _ in batch]
+            term_of = np.repeat([index[t] for t, _, _ in batch], [len(d) for d in docs])
+            docs = np.concatenate(docs)
+            tfs = np.concatenate([np.frombuffer(t, dtype="<u2") for _, _, t in batch])
+            keep = docs >= 0
+            self._insert_rows(db, dest, self._segment_rows(
+                seg, terms, term_of[keep], docs[keep], tfs[keep], lengths, avg_len
+            ))
+
+        term = None
+        for row_term, docs, tfs in db.execute(f"SELECT term, docs, tfs FROM {source} ORDER BY term").fetchall():
+            # Flush only between terms, so each term's postings land in one segment's blocks
+            if row_term != term and size >= _MERGE_BUDGET:
+                flush()
+                batch, size = [], 0
+            term = row_term
+            batch.append((row_term, docs, tfs))
+            size += len(docs) // 4
+        if batch:
+            flush()
+
+    def _compact(self, db: sqlite3.Connection, meta: dict, alive: np.ndarray, lengths: np.ndarray):
+        """Renumber live documents 0..n-1 and rewrite all postings as one segment without dead docs."""
+        live = np.flatnonzero(alive)
+        new_of = np.full(len(alive), -1, dtype=np.int64)
+        new_of[live] = np.arange(len(live))
+        new_lengths = lengths[live]
+
+        db.execute("DELETE FROM docs WHERE alive = 0")
+        # Ascending order never collides: every new number is at most its old one
+        db.executemany(
+            "UPDATE docs SET doc = ? WHERE doc = ?", [(int(new_of[d]), int(d)) for d in live if new_of[d] != d]
+        )
+        db.execute("DELETE FROM segments")
+        seg = db.execute(
+            "INSERT INTO segments (level, docs) VALUES (?, ?)", (self._level(len(live)), len(live))
+        ).lastrowid
+        db.execute("DROP TABLE IF EXISTS postings_compact")
+        db.execute(_POSTINGS_TABLE.format(name="postings_compact"))
+        avg_len = float(new_lengths.mean()) if len(live) else 1.0
+        self._copy_postings(db, "postings", "postings_compact", seg, new_of, new_lengths, avg_len)
+        db.execute("DROP TABLE postings")
+        db.execute("ALTER TABLE postings_compact RENAME TO postings")
+        _execute_script(db, _POSTINGS_INDEXES)
+        self._set_meta(
+            db, epoch=meta.get("epoch", 0) + 1, seq=meta.get("seq", 0) + 1, next_doc=len(live)
+        )
+
+    def compact(self):
+        """Drop dead documents from the postings and renumber live ones (also runs automatically)."""
+        with self._merge_lock:
+            if self._merge_db is None:
+                self._merge_db = self._connect()
+            with self._transaction(self._merge_db, write=True):
+                with self._state_lock:
+                    meta = self._sync(self._merge_db)
+                    alive, lengths = self._alive.copy(), self._lengths
+                self._compact(self._merge_db, meta, alive, lengths)
+            self._epoch = None
+
+    @staticmethod
+    def _upgrade_schema(db: sqlite3.Connection) -> bool:
+        """Prepare an index written by the unsegmented format; True if its postings need converting."""
+        doc_columns = {r[1] for r in db.execute("PRAGMA table_info(docs)")}
+        if doc_columns and "seq" not in doc_columns:
+            db.execute("ALTER TABLE docs ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        posting_columns = {r[1] for r in db.execute("PRAGMA table_info(postings)")}
+        if posting_columns and "block" not in posting_columns:
+            db.execute("ALTER TABLE postings RENAME TO postings_v1")
+            return True
+        return False
+
+    def _migrate_v1(self, db: sqlite3.Connection, meta: dict):
+        new_of = np.where(self._alive, np.arange(len(self._alive)), -1)
+        seg = db.execute(
+            "INSERT INTO segments (level, docs) VALUES (?, ?)", (self._level(self._n_alive), self._n_alive)
+        ).lastrowid
+        self._copy_postings(db, "postings_v1", "postings", seg, new_of, self._lengths, self._avg_len())
+        db.execute("DROP TABLE postings_v1")
+        self._set_meta(db, next_doc=len(self._lengths), seq=meta.get("seq", 0))
+
+    # -- search -------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int) -> list[tuple[str, float]]:
+        """Return up to ``top_k`` (chunk_id, BM25 score) pairs, best first.
+
+        Reading stops once unread postings cannot change which documents make
+        the top ``top_k``; only those documents' scores are then completed.
+        """
+        terms = list(set(tokenize(query)))
+        if not terms or top_k < 1:
+            return []
+        with self._lock, self._transaction(self._db, write=False), self._state_lock:
+            self._sync(self._db)
+            return self._search(terms, top_k)
+
+    def _search(self, terms: list[str], top_k: int) -> list[tuple[str, float]]:
+        n_docs = self._n_alive
+        if n_docs == 0:
+            return []
+        avg_len = self._total_length / n_docs or 1.0
+
+        blocks = []
+        for i in range(0, len(terms), _SQL_BATCH):
+            part = terms[i : i + _SQL_BATCH]
+            blocks += self._db.execute(
+                f"SELECT rowid, term, n, max_tf, min_len FROM postings WHERE term IN ({','.join('?' * len(part))})",
+                part,
+            ).fetchall()
+        if not blocks:
+            return []
+        names = sorted({row[1] for row in blocks})
+        index = {term: i for i, term in enumerate(names)}
+        rowids = np.array([row[0] for row in blocks], dtype=np.int64)
+        term_of = np.array([index[row[1]] for row in blocks], dtype=np.int64)
+        stats = np.array([row[2:] for row in blocks], dtype=np.int64)
+
+        # Upper-bound document frequency (dead postings not yet merged away included)
+        df = np.minimum(np.bincount(term_of, weights=stats[:, 0], minlength=len(names)), n_docs)
+        kept = df <= self.max_df_ratio * n_docs
+        if not kept.any():
+            kept[:] = True
+        if kept.sum() > _MAX_QUERY_TERMS:
+            kept[np.argsort(np.where(kept, df, np.inf), kind="stable")[_MAX_QUERY_TERMS:]] = False
+        renumber = np.cumsum(kept) - 1
+        rows = kept[term_of]
+        rowids, term_of, stats = rowids[rows], renumber[term_of[rows]], stats[rows]
+        df = df[kept]
+        n_terms = len(df)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        if stats[:, 0].sum() * 32 <= len(self._lengths):
+            # Few postings: score them all without allocating per-document arrays
+            blocks = [(self._read_block(rowid), t) for rowid, t in zip(rowids, term_of.tolist())]
+            docs = np.concatenate([d for (d, _), _ in blocks])
+            if not len(docs):
+                return []
+            contributions = np.concatenate([
+                idf[t] * self._tf_part(tfs, self._lengths[d], avg_len) for (d, tfs), t in blocks
+            ])
+            unique, inverse = np.unique(docs, return_inverse=True)
+            totals = np.bincount(inverse, weights=contributions)
+            k = min(top_k, len(unique))
+            best = np.argpartition(-totals, k - 1)[:k]
+            best = best[np.argsort(-totals[best], kind="stable")]
+            return self._results(unique[best], totals[best])
+
+        bounds = idf[term_of] * self._tf_part(stats[:, 1], stats[:, 2], avg_len)
+        order = np.argsort(-bounds, kind="stable")
+        # Best unread bound per term: each term's bounds in reading order, and a cursor into them
+        term_bounds = [bounds[order][term_of[order] == t] for t in range(n_terms)]
+        cursor = [0] * n_terms
+        remaining = np.array([tb[0] for tb in term_bounds])
+        bits = np.left_shift(np.uint64(1), np.arange(n_terms, dtype=np.uint64))
+
+        scores = np.zeros(len(self._lengths))
+        seen = np.zeros(len(self._lengths), dtype=np.uint64)
+        found: list[np.ndarray] = []
+        unread = np.empty(0, dtype=np.int64)
+        read, check_at = 0, _FIRST_BLOCK
+        for position, i in enumerate(order.tolist()):
+            docs, tfs = self._read_block(rowids[i])
+            t = term_of[i]
+            cursor[t] += 1
+            remaining[t] = term_bounds[t][cursor[t]] if cursor[t] < len(term_bounds[t]) else 0.0
+            if len(docs):
+                found.append(docs[seen[docs] == 0])
+                scores[docs] += idf[t] * self._tf_part(tfs, self._lengths[docs], avg_len)
+                seen[docs] |= bits[t]
+                read += len(docs)
+            if read >= check_at and position + 1 < len(order):
+                found = [np.concatenate(found)]
+                contenders = self._contenders(found[0], scores, seen, remaining, bits, top_k)
+                if contenders is not None:
+                    unread = order[position + 1 :]
+                    break
+                check_at = 2 * read
+        if not found:
+            return []
+
+        if len(unread):
+            # No unseen document can reach the top any more; finish the contenders' scores only
+            wanted = np.zeros(len(self._lengths), dtype=bool)
+            wanted[contenders] = True
+            incomplete = [bool(((seen[contenders] & bits[t]) == 0).any()) for t in range(n_terms)]
+            for i in unread.tolist():
+                t = term_of[i]
+                if not incomplete[t]:
+                    continue
+                # Contenders are live, so the block needs no liveness filter
+                docs, tfs = self._fetch_block(rowids[i])
+                hit = wanted[docs]
+                if hit.any():
+                    docs = docs[hit]
+                    scores[docs] += idf[t] * self._tf_part(tfs[hit], self._lengths[docs], avg_len)
+            candidates = contenders
+        else:
+            candidates = np.concatenate(found)
+        k = min(top_k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self._results(top, scores[top])
+
+    def _results(self, docs: np.ndarray, scores: np.ndarray) -> list[tuple[str, float]]:
+        doc_ids = [int(d) for d in docs]
+        id_of = dict(self._db.execute(
+            f"SELECT doc, chunk_id FROM docs WHERE doc IN ({','.join('?' * len(doc_ids))})", doc_ids
+        ).fetchall())
+        return [(id_of[d], float(score)) for d, score in zip(doc_ids, scores)]
+
+    def _fetch_block(self, rowid: int) -> tuple[np.ndarray, np.ndarray]:
+        """(docs, tfs) of one postings row, dead documents included."""
+        docs, tfs = self._db.execute("SELECT docs, tfs FROM postings WHERE rowid = ?", (int(rowid),)).fetchone()
+        return np.frombuffer(docs, dtype="<i4"), np.frombuffer(tfs, dtype="<u2")
+
+    def _read_block(self, rowid: int) -> tuple[np.ndarray, np.ndarray]:
+        """Live (docs, tfs) of one postings row."""
+        docs, tfs = self._fetch_block(rowid)
+        live = self._alive[docs]
+        return docs[live], tfs[live]
+
+    @staticmethod
+    def _contenders(
+        candidates: np.ndarray,
+        scores: np.ndarray,
+        seen: np.ndarray,
+        remaining: np.ndarray,
+        bits: np.ndarray,
+        top_k: int,
+    ) -> np.ndarray | None:
+        """Documents that can still make the top ``top_k``, or None while unseen ones still can.
+
+        ``remaining`` holds each term's best unread block bound: a document
+        can still gain it for every term it was not found under.
+        """
+        if len(candidates) < top_k:
+            return None
+        lower = scores[candidates]
+        unseen = float(remaining.sum())
+        top = np.argpartition(-lower, top_k - 1)[:top_k]
+        threshold = float(lower[top].min())
+        if unseen > threshold * (1 + 1e-9):
+            return None
+        upper = lower + unseen
+        mask = seen[candidates]
+        for t in np.flatnonzero(remaining):
+            upper -= remaining[t] * ((mask & bits[t]) != 0)
+        keep = upper > threshold * (1 + 1e-9)
+        keep[top] = True
+        return candidates[keep]
+
+    def close(self):
+        self._closed = True
+        self._merge_wanted.set()
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+        with self._merge_lock:
+            if self._merge_db is not None:
+                self._merge_db.close()
+        with self._lock:
+            self._db.close()
@@ -1,18 +1,31 @@
-"""Ollama LLM client via OpenAI-compatible API."""
+"""Ollama LLM client via OpenAI-compatible API.
 
-from collections.abc import Generator
+The openai and httpx packages are imported when the first client is built.
+"""
 
-from openai import OpenAI
+import asyncio
+import weakref
+from collections.abc import AsyncGenerator, Generator
+from typing import TYPE_CHECKING
 
-from rag.config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from rag.config import OLLAMA_BASE_URL, OLLAMA_MODEL, LLM_MAX_CONCURRENCY
 
-_client: OpenAI | None = None
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
+_client: "OpenAI | None" = None
 
-def get_client() -> OpenAI:
+# Async clients and limiters are bound to the event loop that created them
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_limiters: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_client() -> "OpenAI":
     """Return a singleton OpenAI client pointing to Ollama."""
     global _client
     if _client is None:
+        from openai import OpenAI
+
         _client = OpenAI(
             base_url=OLLAMA_BASE_URL,
             api_key="ollama",  # Ollama doesn't need a real key
@@ -20,6 +33,43 @@ def get_client() -> OpenAI:
     return _client
 
 
+def get_async_client() -> "AsyncOpenAI":
+    """Return the AsyncOpenAI client for the running event loop.
+
+    The client keeps a pooled keep-alive connection per concurrent request
+    (up to LLM_MAX_CONCURRENCY) instead of reconnecting for every call.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            base_url=OLLAMA_BASE_URL,
+            api_key="ollama",  # Ollama doesn't need a real key
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                ),
+                timeout=httpx.Timeout(600.0, connect=5.0),
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def get_limiter() -> asyncio.Semaphore:
+    """Return the semaphore capping concurrent generations on the running loop."""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _limiters[loop] = limiter
+    return limiter
+
+
 def generate(prompt: str, temperature: float = 0.1) -> str:
     """Generate a complete response from the LLM."""
     client = get_client()
@@ -43,3 +93,33 @@ def generate_stream(prompt: str, temperature: float = 0.1) -> Generator[str, Non
     for chunk in stream:
         if chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
+
+
+async def generate_async(prompt: str, temperature: float = 0.1) -> str:
+    """Generate a complete response without blocking the event loop."""
+    client = get_async_client()
+    async with get_limiter():
+        response = await client.chat.completions.create(
+            model=OLLAMA_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+        )
+    return response.choices[0].message.content
+
+
+async def generate_stream_async(prompt: str, temperature: float = 0.1) -> AsyncGenerator[str, None]:
+    """Stream response tokens without blocking the event loop.
+
+    The concurrency slot is held until the stream is exhausted or closed.
+    """
+    client = get_async_client()
+    async with get_limiter():
+        stream = await client.chat.completions.create(
+            model=OLLAMA_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
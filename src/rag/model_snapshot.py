@@ -0,0 +1,97 @@
+"""Load-optimized snapshots of the embedding model.
+
+``SentenceTransformer(name)`` resolves the model through the Hugging Face
+cache, parses its configs, builds every module with freshly initialised
+weights and then copies the checkpoint into them. A snapshot is the loaded
+model written once with ``torch.save``; ``torch.load(..., mmap=True)``
+restores it by unpickling the module tree and mapping the weight storages
+from the file instead of reading them. Mapped pages that are never written
+stay in the OS page cache, so every process loading the same snapshot
+(Streamlit restarts, embedding pool workers) shares one physical copy of
+the weights.
+
+Snapshots are pickles, so only load files this process wrote. They are
+keyed by model name and the torch and sentence-transformers versions, so an
+upgrade builds a new snapshot rather than unpickling against changed classes.
+Snapshots are written and mapped on CPU; on a CUDA or MPS machine the loaded
+model is then moved to that device, as ``SentenceTransformer(name)`` would
+place it. Moving copies the weights, so the shared pages only help CPU
+processes.
+"""
+
+import os
+import re
+from pathlib import Path
+
+
+def snapshot_path(model_name: str, directory: str | Path) -> Path:
+    """Return the snapshot file for ``model_name`` under the installed library versions."""
+    import sentence_transformers
+    import torch
+
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name).strip("-")
+    return Path(directory) / f"{safe_name}-st{sentence_transformers.__version__}-torch{torch.__version__}.pt"
+
+
+def save_snapshot(model, path: str | Path):
+    """Write ``model`` to ``path`` atomically (concurrent loaders never see a partial file)."""
+    import torch
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        torch.save(model, tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def load_snapshot(path: str | Path):
+    """Load a snapshot with its weights memory-mapped from ``path``."""
+    import torch
+
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+
+
+def preferred_device() -> str:
+    """Return the device ``SentenceTransformer`` picks by default: CUDA, then Apple MPS, then CPU."""
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _to_device(model, device: str):
+    return model if device == "cpu" else model.to(device)
+
+
+def load_model(model_name: str, directory: str | Path, device: str | None = None):
+    """Return ``model_name`` loaded from its snapshot, creating the snapshot on first use.
+
+    The model ends up on ``device`` (default: ``preferred_device()``). A
+    snapshot that fails to load (truncated, or written by other library
+    versions under the same name) is rebuilt. If the model cannot be
+    snapshotted, the normally loaded model is returned.
+    """
+    device = device or preferred_device()
+    path = snapshot_path(model_name, directory)
+    if path.exists():
+        try:
+            return _to_device(load_snapshot(path), device)
+        except Exception:
+            path.unlink(missing_ok=True)
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    try:
+        save_snapshot(model, path)
+    except Exception:
+        return _to_device(model, device)
+    # Reload so this process also runs on the shared, mapped weights
+    return _to_device(load_snapshot(path), device)
@@ -0,0 +1,48 @@
+"""Per-page PDF text extraction, run in worker processes by ``document_loader``.
+
+Only imports pypdf, and only on first use, so spawned workers start quickly
+and loading TXT or CSV files never pays for it. Readers are opened on
+a file handle (a path would make pypdf read the whole file into memory) and
+kept for the document being worked on, so the cross-reference table is
+parsed once per process rather than once per task. pypdf caches every
+object it resolves (for scanned PDFs that includes page images), so the
+cache is emptied after each task to keep memory flat over long documents.
+"""
+
+_open: dict[str, tuple] = {}  # file_path -> (file handle, reader, page labels)
+
+
+def _reader(file_path: str) -> tuple:
+    if file_path not in _open:
+        from pypdf import PdfReader
+
+        release()
+        handle = open(file_path, "rb")
+        reader = PdfReader(handle)
+        _open[file_path] = (handle, reader, reader.page_labels)
+    return _open[file_path]
+
+
+def page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    with open(file_path, "rb") as handle:
+        return len(PdfReader(handle).pages)
+
+
+def extract_pages(file_path: str, start: int, stop: int) -> list[tuple[int, str, str]]:
+    """Return (page number, text, page label) for pages ``start`` to ``stop - 1``."""
+    _, reader, labels = _reader(file_path)
+    pages = [
+        (n, reader.pages[n].extract_text(extraction_mode="plain").strip(), labels[n])
+        for n in range(start, stop)
+    ]
+    reader.resolved_objects.clear()
+    return pages
+
+
+def release():
+    """Close the cached reader, if any."""
+    for handle, _, _ in _open.values():
+        handle.close()
+    _open.clear()
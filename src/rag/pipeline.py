@@ -0,0 +1,141 @@
+"""Three-stage streaming ingest pipeline: chunking -> embedding -> store writes.
+
+Each stage runs concurrently and hands batches to the next through a bounded
+queue, so parsing the next page and persisting the previous batch overlap
+with embedding the current one while memory stays bounded by the queue depth.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from rag.config import BATCH_SIZE, INGEST_QUEUE_DEPTH
+
+_DONE = object()
+
+
+class _StageError:
+    """Wraps an exception raised in a worker stage so the caller can re-raise it."""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put ``item`` on ``q``, giving up if ``stop`` is set. Returns False if stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Get the next item from ``q``, returning ``_DONE`` if ``stop`` is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(
+    chunks: Iterable[dict],
+    embed_batch: Callable[[list[dict]], Any],
+    write_batch: Callable[[list[dict], Any], None],
+    progress_callback=None,
+    total: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    queue_depth: int = INGEST_QUEUE_DEPTH,
+) -> int:
+    """Stream ``chunks`` through embedding and writing with overlapping stages.
+
+    The chunk iterator is drained in a loader thread and ``embed_batch`` runs in
+    an embedder thread; ``write_batch`` and ``progress_callback`` run in the
+    calling thread (Streamlit widgets may only be updated from there).
+
+    Args:
+        chunks: Iterable (typically a generator) of dicts with keys: id, text, metadata.
+        embed_batch: Callable(batch) -> payload, e.g. the batch's embeddings.
+        write_batch: Callable(batch, payload) that persists one batch.
+        progress_callback: Optional callable(done, total). If ``total`` is not
+            given and ``chunks`` has no ``len()``, total is the number of
+            chunks produced so far.
+        total: Expected number of chunks, if known.
+        batch_size: Chunks per batch.
+        queue_depth: Maximum batches buffered between two stages.
+
+    Returns:
+        Number of chunks processed.
+    """
+    if total is None and hasattr(chunks, "__len__"):
+        total = len(chunks)
+
+    stop = threading.Event()
+    to_embed: queue.Queue = queue.Queue(maxsize=queue_depth)
+    to_write: queue.Queue = queue.Queue(maxsize=queue_depth)
+    produced = 0
+
+    def load():
+        nonlocal produced
+        try:
+            batch = []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= batch_size:
+                    produced += len(batch)
+                    if not _put(to_embed, batch, stop):
+                        return
+                    batch = []
+            if batch:
+                produced += len(batch)
+                _put(to_embed, batch, stop)
+        except BaseException as exc:
+            _put(to_embed, _StageError(exc), stop)
+            return
+        _put(to_embed, _DONE, stop)
+
+    def embed():
+        while True:
+            batch = _get(to_embed, stop)
+            if batch is _DONE or isinstance(batch, _StageError):
+                _put(to_write, batch, stop)
+                return
+            try:
+                payload = embed_batch(batch)
+            except BaseException as exc:
+                _put(to_write, _StageError(exc), stop)
+                return
+            if not _put(to_write, (batch, payload), stop):
+                return
+
+    workers = [
+        threading.Thread(target=load, name="ingest-load", daemon=True),
+        threading.Thread(target=embed, name="ingest-embed", daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    done = 0
+    try:
+        while True:
+            item = _get(to_write, stop)
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.exc
+            batch, payload = item
+            write_batch(batch, payload)
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, max(total or 0, produced, done))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    return done
@@ -0,0 +1,84 @@
+"""LRU/TTL cache of retrieval results with version-based invalidation."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups: lowercase, collapse whitespace, drop trailing ?.!"""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+class QueryCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Keys include a collection ``version`` counter; ``bump_version()`` (called
+    on every write to the store) makes all existing entries unreachable and
+    drops them. Only writes made through this process are seen, so ``ttl``
+    bounds staleness when several processes share one store.
+    """
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, question: str, top_k: int, mode: str) -> tuple:
+        return normalize_question(question), top_k, mode, self.version
+
+    def get(self, question: str, top_k: int, mode: str = "similarity") -> list[dict] | None:
+        """Return cached results for (question, top_k, retrieval mode), or None on a miss."""
+        with self._lock:
+            key = self._key(question, top_k, mode)
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(
+        self, question: str, top_k: int, results: list[dict], version: int | None = None, mode: str = "similarity"
+    ):
+        """Cache ``results`` for (question, top_k, retrieval mode), evicting the LRU entry if full.
+
+        Pass the ``version`` read before searching: if a write bumped it in the
+        meantime the (possibly stale) results are dropped.
+        """
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            key = self._key(question, top_k, mode)
+            self._entries[key] = (time.monotonic(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def bump_version(self):
+        """Invalidate every entry after the collection changed."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, hit rate, size and current version."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "version": self.version,
+            }
@@ -0,0 +1,118 @@
+"""Cross-encoder reranking of retrieved chunks on CPU, under a latency budget."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+
+from rag.query_cache import normalize_question
+
+
+def _question_hash(question: str) -> str:
+    return hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def _chunk_key(doc: dict) -> str:
+    return doc.get("id") or hashlib.sha1(doc["text"].encode("utf-8")).hexdigest()
+
+
+class Reranker:
+    """Reorders candidates by cross-encoder score, falling back to their original order.
+
+    All uncached (question, chunk) pairs are scored in one batched
+    ``predict`` call on a dedicated thread. If the scores are not ready within
+    ``budget_ms`` the candidates keep their dense order; the call still
+    finishes in the background and fills the cache, so a repeated question
+    is reranked. While such a call is still running, further questions
+    with uncached pairs fall back at once instead of queueing behind it, so
+    a slow model never builds a backlog. Scores are cached per (question hash, chunk ID), keeping at
+    most ``cache_size`` entries (least recently used evicted). The model is
+    loaded on first use.
+    """
+
+    def __init__(self, model_name: str, budget_ms: float, batch_size: int = 32, cache_size: int = 4096):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._model = None
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._in_flight: Future | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-rerank")
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def load(self):
+        """Load the cross-encoder now rather than on the first ``rerank``."""
+        self._get_model()
+
+    def _score(self, question: str, question_key: str, docs: list[dict]):
+        scores = self._get_model().predict(
+            [(question, doc["text"]) for doc in docs], batch_size=self.batch_size, show_progress_bar=False
+        )
+        with self._lock:
+            for doc, score in zip(docs, np.asarray(scores, dtype=np.float32).tolist()):
+                self._scores[(question_key, _chunk_key(doc))] = score
+                self._scores.move_to_end((question_key, _chunk_key(doc)))
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+
+    def rerank(self, question: str, docs: list[dict], top_k: int) -> list[dict]:
+        """Return the ``top_k`` best of ``docs`` by cross-encoder score (dense order on timeout)."""
+        if len(docs) <= 1:
+            return docs[:top_k]
+        question_key = _question_hash(question)
+        with self._lock:
+            missing = [doc for doc in docs if (question_key, _chunk_key(doc)) not in self._scores]
+            self.hits += len(docs) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            with self._lock:
+                if self._in_flight is not None and not self._in_flight.done():
+                    self.fallbacks += 1
+                    return docs[:top_k]
+                self._in_flight = future = self._executor.submit(self._score, question, question_key, missing)
+            try:
+                future.result(timeout=self.budget_ms / 1000)
+            except TimeoutError:
+                with self._lock:
+                    self.fallbacks += 1
+                return docs[:top_k]
+
+        with self._lock:
+            scores = {}
+            for doc in docs:
+                key = (question_key, _chunk_key(doc))
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key[1]] = self._scores[key]
+        if len(scores) < len(docs):
+            # Evicted between scoring and now (tiny cache); keep the dense order
+            return docs[:top_k]
+        order = sorted(range(len(docs)), key=lambda i: -scores[_chunk_key(docs[i])])
+        return [docs[i] for i in order[:top_k]]
+
+    def stats(self) -> dict:
+        """Return cached-score hits/misses, calls that fell back to dense order (timed out or scorer busy), and size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "size": len(self._scores),
+                "capacity": self.cache_size,
+            }
@@ -0,0 +1,237 @@
+"""Standalone HTTP API server over the RAG chain and vector store.
+
+A small asyncio HTTP/1.1 server (no extra dependencies) so one process can
+serve many concurrent chats: generation goes through ``ask_async`` /
+``ask_stream_async`` and blocking store work runs in a thread pool.
+
+Endpoints:
+    GET  /health                      -> {"status": "ok"}
+    GET  /count                       -> {"count": <chunks>}
+    GET  /sources                     -> {"sources": [...]}
+    POST /ask          {"question", "top_k"?} -> {"answer", "sources", "num_chunks"}
+    POST /ask/stream   {"question", "top_k"?} -> Server-Sent Events: one
+         ``data: {"token": ...}`` per token, then ``event: done`` with
+         ``{"sources", "num_chunks"}``
+    POST /ingest?filename=<name>  raw file bytes -> {"source", "added", "deleted", "unchanged"}
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8000] [--no-warmup]
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from rag.chain import ask_async, ask_stream_async, warmup
+from rag.config import TOP_K, UPLOAD_DIR
+from rag.document_loader import SUPPORTED_EXTENSIONS, iter_chunks
+from rag.vector_store import get_document_count, list_sources, sync_source
+
+MAX_BODY_BYTES = 512 * 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """An error that maps directly to an HTTP status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _head(status: int, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{k}: {v}" for k, v in {**headers, "Connection": "close"}.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send_json(writer: asyncio.StreamWriter, status: int, payload: dict):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(_head(status, {"Content-Type": "application/json", "Content-Length": len(body)}) + body)
+    await writer.drain()
+
+
+def _parse_question(body: bytes) -> tuple[str, int]:
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise HTTPError(400, f"Invalid JSON: {e}")
+    question = payload.get("question") if isinstance(payload, dict) else None
+    if not isinstance(question, str) or not question.strip():
+        raise HTTPError(400, "Body must be a JSON object with a non-empty 'question'")
+    top_k = payload.get("top_k", TOP_K)
+    if not isinstance(top_k, int) or top_k < 1:
+        raise HTTPError(400, "'top_k' must be a positive integer")
+    return question, top_k
+
+
+class RAGServer:
+    """Serves the HTTP API on ``host:port``; ``port=0`` picks a free port."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000):
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+        self._ingest_lock: asyncio.Lock | None = None
+
+    async def start(self):
+        """Start listening. Models and the store load on first use or via ``rag.chain.warmup``."""
+        self._ingest_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, *_ = request_line.split(" ")
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0") or 0)
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+            body = await reader.readexactly(length) if length else b""
+
+            url = urlsplit(target)
+            await self._route(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body, writer)
+        except HTTPError as e:
+            await _send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            try:
+                await _send_json(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, params: dict, body: bytes, writer: asyncio.StreamWriter):
+        routes = {
+            "/health": ("GET", self._health),
+            "/count": ("GET", self._count),
+            "/sources": ("GET", self._sources),
+            "/ask": ("POST", self._ask),
+            "/ask/stream": ("POST", self._ask_stream),
+            "/ingest": ("POST", self._ingest),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"No route for {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"{path} only accepts {allowed}")
+        await handler(params, body, writer)
+
+    async def _health(self, params, body, writer):
+        await _send_json(writer, 200, {"status": "ok"})
+
+    async def _count(self, params, body, writer):
+        count = await asyncio.get_running_loop().run_in_executor(None, get_document_count)
+        await _send_json(writer, 200, {"count": count})
+
+    async def _sources(self, params, body, writer):
+        sources = await asyncio.get_running_loop().run_in_executor(None, list_sources)
+        await _send_json(writer, 200, {"sources": sources})
+
+    async def _ask(self, params, body, writer):
+        question, top_k = _parse_question(body)
+        await _send_json(writer, 200, await ask_async(question, top_k=top_k))
+
+    async def _ask_stream(self, params, body, writer):
+        question, top_k = _parse_question(body)
+        stream = ask_stream_async(question, top_k=top_k)
+        headers_sent = False
+        try:
+            async for item in stream:
+                if not headers_sent:
+                    writer.write(_head(200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}))
+                    headers_sent = True
+                if isinstance(item, dict):
+                    writer.write(f"event: done\ndata: {json.dumps(item)}\n\n".encode("utf-8"))
+                else:
+                    writer.write(f"data: {json.dumps({'token': item})}\n\n".encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            if not headers_sent:
+                raise
+            writer.write(f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode("utf-8"))
+            await writer.drain()
+        finally:
+            # Closing releases the LLM concurrency slot if the client went away
+            await stream.aclose()
+
+    async def _ingest(self, params, body, writer):
+        filename = Path((params.get("filename") or [""])[0]).name
+        ext = Path(filename).suffix.lower()
+        if not filename or ext not in SUPPORTED_EXTENSIONS:
+            raise HTTPError(400, f"'filename' query parameter must end in one of {sorted(SUPPORTED_EXTENSIONS)}")
+
+        def ingest():
+            UPLOAD_DIR.mkdir(exist_ok=True)
+            save_path = UPLOAD_DIR / filename
+            save_path.write_bytes(body)
+            return sync_source(filename, iter_chunks(str(save_path), content_ids=True))
+
+        async with self._ingest_lock:
+            stats = await asyncio.get_running_loop().run_in_executor(None, ingest)
+        await _send_json(writer, 200, {"source": filename, **stats})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the RAG chatbot over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--no-warmup", action="store_true", help="Load models and open the store on the first request instead"
+    )
+    args = parser.parse_args()
+
+    server = RAGServer(args.host, args.port)
+
+    async def run():
+        await server.start()
+        print(f"RAG server listening on http://{server.host}:{server.port}")
+        if not args.no_warmup:
+            # Background thread; the socket is already bound and early requests wait for the same loads
+            warmup()
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Persistent catalog of ingested sources.
+
+One row per source with its chunk count, text size in bytes, last ingest
+time and a content hash (sha1 over the sha1 digests of its chunk texts, in
+chunk order). The store keeps it current on every write, so listing
+sources never scans chunk metadata. Rows are mirrored in memory and
+re-read from SQLite only when ``PRAGMA data_version`` shows that another
+connection (e.g. ingest.py in a separate process) committed a change.
+
+It also holds the chunk IDs of every source (on disk only), so a source can
+be deleted or replaced by ID without a metadata scan of the collection.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class SourceCatalog:
+    """Per-source statistics keyed by source name. Safe to share between threads."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY, chunks INTEGER NOT NULL, bytes INTEGER NOT NULL,
+                ingested_at REAL NOT NULL, content_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS source_chunks (
+                chunk_id TEXT PRIMARY KEY, source TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS source_chunks_source ON source_chunks (source);
+            """
+        )
+        self._data_version = None
+        self._entries = {}
+        self._sync()
+
+    def _sync(self):
+        """Reload the mirrored rows if another connection committed since they were read."""
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._entries = {
+            row[0]: dict(zip(("source", "chunks", "bytes", "ingested_at", "content_hash"), row))
+            for row in self._db.execute("SELECT source, chunks, bytes, ingested_at, content_hash FROM sources")
+        }
+        self._data_version = version
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._entries)
+
+    def __contains__(self, source: str) -> bool:
+        with self._lock:
+            self._sync()
+            return source in self._entries
+
+    def get(self, source: str) -> dict | None:
+        """Return the entry for ``source`` (source, chunks, bytes, ingested_at, content_hash), or None."""
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(source)
+            return dict(entry) if entry else None
+
+    def names(self) -> list[str]:
+        """Return the sorted source names."""
+        with self._lock:
+            self._sync()
+            return sorted(self._entries)
+
+    def entries(self) -> list[dict]:
+        """Return every entry, sorted by source name."""
+        with self._lock:
+            self._sync()
+            return [dict(self._entries[s]) for s in sorted(self._entries)]
+
+    def chunk_ids(self, source: str) -> list[str]:
+        """Return the IDs of every chunk stored for ``source``."""
+        with self._lock:
+            return [c for (c,) in self._db.execute("SELECT chunk_id FROM source_chunks WHERE source = ?", (source,))]
+
+    def has_chunk_index(self) -> bool:
+        """Whether any chunk IDs are indexed (False for catalogs built before the index existed)."""
+        with self._lock:
+            return self._db.execute("SELECT EXISTS (SELECT 1 FROM source_chunks)").fetchone()[0] == 1
+
+    def index_chunks(self, pairs: list[tuple[str, str]]):
+        """Record (source, chunk_id) pairs; already indexed IDs are moved to the given source."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO source_chunks (chunk_id, source) VALUES (?, ?)",
+                [(chunk_id, source) for source, chunk_id in pairs],
+            )
+            self._db.commit()
+
+    def unindex_chunks(self, chunk_ids: list[str]):
+        """Forget chunk IDs that were deleted from the store."""
+        with self._lock:
+            self._db.executemany("DELETE FROM source_chunks WHERE chunk_id = ?", [(c,) for c in chunk_ids])
+            self._db.commit()
+
+    def _write(self, entry: dict):
+        self._entries[entry["source"]] = entry
+        self._db.execute(
+            "INSERT OR REPLACE INTO sources (source, chunks, bytes, ingested_at, content_hash)"
+            " VALUES (:source, :chunks, :bytes, :ingested_at, :content_hash)",
+            entry,
+        )
+
+    def _drop(self, source: str):
+        self._entries.pop(source, None)
+        self._db.execute("DELETE FROM sources WHERE source = ?", (source,))
+        self._db.execute("DELETE FROM source_chunks WHERE source = ?", (source,))
+
+    def put(self, source: str, chunks: int, size: int, content_hash: str):
+        """Record the full state of ``source`` after it was (re-)ingested; zero chunks removes it."""
+        with self._lock:
+            if chunks > 0:
+                self._write({
+                    "source": source, "chunks": chunks, "bytes": size,
+                    "ingested_at": time.time(), "content_hash": content_hash,
+                })
+            else:
+                self._drop(source)
+            self._db.commit()
+
+    def update(self, changes: dict[str, tuple[int, int]], hashes: dict[str, str] | None = None):
+        """Apply ``{source: (chunk delta, byte delta)}`` and optionally new content hashes."""
+        hashes = hashes or {}
+        with self._lock:
+            # Take the write lock before reading, so deltas apply to the latest rows
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                now = time.time()
+                for source in changes.keys() | hashes.keys():
+                    d_chunks, d_bytes = changes.get(source, (0, 0))
+                    entry = self._entries.get(source) or {"source": source, "chunks": 0, "bytes": 0, "content_hash": ""}
+                    entry = {
+                        **entry,
+                        "chunks": entry["chunks"] + d_chunks,
+                        "bytes": entry["bytes"] + d_bytes,
+                        "ingested_at": now,
+                        "content_hash": hashes.get(source, entry["content_hash"]),
+                    }
+                    if entry["chunks"] > 0:
+                        self._write(entry)
+                    else:
+                        self._drop(source)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                self._data_version = None  # the mirror may hold the rolled-back rows
+                raise
+
+    def remove(self, source: str):
+        """Forget ``source`` and its chunk IDs."""
+        with self._lock:
+            self._drop(source)
+            self._db.commit()
+
+    def clear(self):
+        """Forget every source."""
+        with self._lock:
+            self._entries.clear()
+            self._db.execute("DELETE FROM sources")
+            self._db.execute("DELETE FROM source_chunks")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
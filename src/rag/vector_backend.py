@@ -0,0 +1,52 @@
+"""Interface between ``rag.vector_store`` and the index that holds the vectors.
+
+The store only uses this subset of Chroma's ``Collection`` API, so a Chroma
+collection is the reference implementation; ``rag.flat_index.FlatIndex`` is
+the in-process alternative. Results use Chroma's shapes: ``get`` returns
+flat lists under ``ids``/``documents``/``metadatas``/``embeddings`` and
+``query`` returns one list per query embedding, with cosine distances.
+"""
+
+from typing import Protocol, runtime_checkable
+
+import numpy as np
+
+
+@runtime_checkable
+class VectorBackend(Protocol):
+    def count(self) -> int:
+        """Number of stored chunks."""
+        ...
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | list,
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+    ):
+        """Insert chunks or overwrite the ones whose IDs already exist."""
+        ...
+
+    def update(self, ids: list[str], metadatas: list[dict]):
+        """Replace the metadata of existing chunks."""
+        ...
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        """Read chunks by ID, by metadata equality filter, or page through all of them."""
+        ...
+
+    def delete(self, ids: list[str]):
+        """Delete chunks by ID; unknown IDs are ignored."""
+        ...
+
+    def query(self, query_embeddings: np.ndarray | list, n_results: int = 10, include: list[str] | None = None) -> dict:
+        """Return the ``n_results`` nearest chunks for each query embedding."""
+        ...
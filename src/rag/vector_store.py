@@ -1,101 +1,695 @@
 """ChromaDB vector store operations."""
 
-import chromadb
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
-from rag.config import CHROMA_DB_DIR, CHROMA_COLLECTION, TOP_K, BATCH_SIZE
-from rag.embeddings import LocalEmbeddingFunction
+import numpy as np
 
-_client: chromadb.ClientAPI | None = None
+from rag.config import (
+    CHROMA_DB_DIR,
+    CHROMA_COLLECTION,
+    TOP_K,
+    BATCH_SIZE,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    HYBRID_SEARCH,
+    LEXICAL_INDEX_PATH,
+    SOURCE_CATALOG_PATH,
+    DENSE_WEIGHT,
+    LEXICAL_WEIGHT,
+    RRF_K,
+    HYBRID_CANDIDATES,
+    RETRIEVAL_MODE,
+    MMR_LAMBDA,
+    MMR_FETCH_MULTIPLIER,
+    VECTOR_BACKEND,
+    FLAT_INDEX_DIR,
+    FLAT_INDEX_QUANTIZATION,
+    FLAT_INDEX_RESCORE,
+)
+from rag.embeddings import encode
+from rag.flat_index import FlatIndex
+from rag.lexical_index import LexicalIndex
+from rag.pipeline import run_pipeline
+from rag.query_cache import QueryCache
+from rag.source_catalog import SourceCatalog
+from rag.vector_backend import VectorBackend
 
+if TYPE_CHECKING:
+    import chromadb
 
-def get_client() -> chromadb.ClientAPI:
-    """Return a singleton ChromaDB PersistentClient."""
+_client: "chromadb.ClientAPI | None" = None
+_collection: VectorBackend | None = None
+_count: int | None = None
+_count_lock = threading.Lock()
+_count_read_at = 0.0
+_COUNT_TTL = 5.0  # seconds before the in-memory count is re-read from the index
+# Serializes first opens so a background warmup and a request don't both open the store
+_open_lock = threading.RLock()
+_lexical_index: LexicalIndex | None = None
+_source_catalog: SourceCatalog | None = None
+_query_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+_GET_BATCH = 5000  # IDs per collection.get when reading by ID
+RETRIEVAL_MODES = ("similarity", "mmr")
+VECTOR_BACKENDS = ("chroma", "flat")
+
+
+def get_client() -> "chromadb.ClientAPI":
+    """Return a singleton ChromaDB PersistentClient (chromadb is imported on first call)."""
     global _client
-    if _client is None:
-        _client = chromadb.PersistentClient(path=CHROMA_DB_DIR)
+    with _open_lock:
+        if _client is None:
+            import chromadb
+
+            _client = chromadb.PersistentClient(path=CHROMA_DB_DIR)
     return _client
 
 
-def get_collection() -> chromadb.Collection:
-    """Get or create the default collection with local embeddings."""
-    client = get_client()
-    return client.get_or_create_collection(
-        name=CHROMA_COLLECTION,
-        embedding_function=LocalEmbeddingFunction(),
-        metadata={"hnsw:space": "cosine"},
-    )
+def get_collection() -> VectorBackend:
+    """Return the vector index selected by VECTOR_BACKEND, opened on first use.
+
+    For "chroma" this is the default collection with local embeddings; for
+    "flat" a ``FlatIndex`` in FLAT_INDEX_DIR. The handle is cached for the
+    life of the process (``clear_collection`` resets it), so hot paths skip
+    ``get_or_create_collection``.
+    """
+    global _collection
+    with _open_lock:
+        if _collection is None:
+            if VECTOR_BACKEND not in VECTOR_BACKENDS:
+                raise ValueError(f"Unknown vector backend: {VECTOR_BACKEND}. Supported: {VECTOR_BACKENDS}")
+            if VECTOR_BACKEND == "flat":
+                _collection = FlatIndex(FLAT_INDEX_DIR, FLAT_INDEX_QUANTIZATION, FLAT_INDEX_RESCORE)
+            else:
+                from rag.embeddings import LocalEmbeddingFunction
+
+                _collection = get_client().get_or_create_collection(
+                    name=CHROMA_COLLECTION,
+                    embedding_function=LocalEmbeddingFunction(),
+                    metadata={"hnsw:space": "cosine"},
+                )
+        return _collection
+
+
+def _adjust_count(delta: int):
+    global _count
+    with _count_lock:
+        if _count is not None:
+            _count += delta
+
+
+def _stored_texts(collection: VectorBackend, ids: list[str]) -> dict[str, str]:
+    """Return the stored text of those ``ids`` that already exist (upserts of them don't grow the store)."""
+    stored = collection.get(ids=ids, include=["documents"])
+    return dict(zip(stored["ids"], stored["documents"]))
+
+
+def _chunk_digest(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Return the singleton BM25 index persisted next to the Chroma database."""
+    global _lexical_index
+    with _open_lock:
+        if _lexical_index is None:
+            _lexical_index = LexicalIndex(LEXICAL_INDEX_PATH)
+    return _lexical_index
+
+
+def get_source_catalog() -> SourceCatalog:
+    """Return the singleton per-source catalog persisted next to the Chroma database."""
+    global _source_catalog
+    with _open_lock:
+        if _source_catalog is None:
+            _source_catalog = SourceCatalog(SOURCE_CATALOG_PATH)
+    return _source_catalog
+
+
+def get_query_cache() -> QueryCache:
+    """Return the retrieval result cache (for stats or manual invalidation)."""
+    return _query_cache
+
+
+def _write_chunks(
+    chunks: Iterable[dict],
+    progress_callback=None,
+    total: int | None = None,
+    written_ids: dict[str, set[str]] | None = None,
+    stored: dict[str, set[str]] | None = None,
+) -> tuple[int, dict[str, str]]:
+    """Embed and upsert ``chunks``, keeping the count, catalog and lexical index current.
+
+    IDs are added to ``written_ids[source]`` as their batch is stored. With
+    ``stored`` ({source: IDs already in the store}, for content-addressed
+    IDs only) chunks whose ID is already stored are neither re-embedded nor
+    rewritten; only their metadata is updated if it moved (e.g. a new
+    ``chunk_index``). Returns the number of chunks processed and a content
+    hash per source.
+    """
+    collection = get_collection()
+    lexical = get_lexical_index()
+    catalog = get_source_catalog()
+    get_document_count()
+    hashes = defaultdict(hashlib.sha1)
+
+    def is_stored(chunk: dict) -> bool:
+        return stored is not None and chunk["id"] in stored.get(chunk["metadata"].get("source", "unknown"), ())
+
+    def embed_batch(batch: list[dict]):
+        new = [c for c in batch if not is_stored(c)]
+        return new, encode([c["text"] for c in new]) if new else None
+
+    def write_batch(batch: list[dict], payload):
+        new, embeddings = payload
+        for c in batch:
+            source = c["metadata"].get("source", "unknown")
+            hashes[source].update(_chunk_digest(c["text"]))
+            if written_ids is not None:
+                written_ids.setdefault(source, set()).add(c["id"])
+        kept = [c for c in batch if is_stored(c)]
+        if kept:
+            existing = collection.get(ids=[c["id"] for c in kept], include=["metadatas"])
+            metadata = dict(zip(existing["ids"], existing["metadatas"]))
+            moved = [c for c in kept if metadata.get(c["id"]) != c["metadata"]]
+            if moved:
+                collection.update(ids=[c["id"] for c in moved], metadatas=[c["metadata"] for c in moved])
+        if not new:
+            return
+        ids = [c["id"] for c in new]
+        previous = _stored_texts(collection, ids)
+        # Lexical first: if it fails nothing else has changed, and hybrid search
+        # ignores lexical hits that are not (yet) in Chroma.
+        lexical.add(new)
+        collection.upsert(
+            ids=ids,
+            documents=[c["text"] for c in new],
+            metadatas=[c["metadata"] for c in new],
+            embeddings=embeddings,
+        )
+        changes: dict[str, tuple[int, int]] = {}
+        for c in new:
+            source = c["metadata"].get("source", "unknown")
+            old = previous.get(c["id"])
+            size = len(c["text"].encode("utf-8")) - (len(old.encode("utf-8")) if old is not None else 0)
+            n, b = changes.get(source, (0, 0))
+            changes[source] = (n + (old is None), b + size)
+        _adjust_count(sum(n for n, _ in changes.values()))
+        catalog.update(changes)
+        catalog.index_chunks([(c["metadata"].get("source", "unknown"), c["id"]) for c in new])
+
+    written = run_pipeline(chunks, embed_batch, write_batch, progress_callback=progress_callback, total=total)
+    return written, {source: h.hexdigest() for source, h in hashes.items()}
+
+
+def _delete_chunks(chunk_ids: list[str]):
+    """Delete chunks by ID from Chroma, the lexical index, the count and the catalog."""
+    collection = get_collection()
+    catalog = get_source_catalog()
+    for i in range(0, len(chunk_ids), _GET_BATCH):
+        stored = collection.get(ids=chunk_ids[i : i + _GET_BATCH], include=["documents", "metadatas"])
+        changes: dict[str, tuple[int, int]] = {}
+        for text, metadata in zip(stored["documents"], stored["metadatas"]):
+            source = metadata.get("source", "unknown")
+            n, b = changes.get(source, (0, 0))
+            changes[source] = (n - 1, b - len(text.encode("utf-8")))
+        for j in range(0, len(stored["ids"]), BATCH_SIZE):
+            collection.delete(ids=stored["ids"][j : j + BATCH_SIZE])
+        _adjust_count(-len(stored["ids"]))
+        catalog.update(changes)
+    catalog.unindex_chunks(chunk_ids)
+    get_lexical_index().delete(chunk_ids)
 
 
-def add_documents(chunks: list[dict], progress_callback=None) -> int:
+def add_documents(chunks: Iterable[dict], progress_callback=None, total: int | None = None) -> int:
     """Add document chunks to the vector store in batches.
 
+    Chunking, embedding and upserts are pipelined (see ``rag.pipeline``), so
+    ``chunks`` may be a generator that is still parsing the source file.
+    Upserting a source whose new version is shorter leaves its old tail
+    behind; use ``replace_source`` or ``sync_source`` for re-ingests.
+
     Args:
-        chunks: List of dicts with keys: id, text, metadata.
+        chunks: Iterable of dicts with keys: id, text, metadata.
         progress_callback: Optional callable(done, total) for progress updates.
+        total: Expected number of chunks when ``chunks`` is a generator.
 
     Returns:
         Number of chunks added.
     """
-    if not chunks:
-        return 0
+    try:
+        added, hashes = _write_chunks(chunks, progress_callback, total)
+        get_source_catalog().update({}, hashes)
+        return added
+    finally:
+        _query_cache.bump_version()
+
+
+def delete_source(source_name: str) -> int:
+    """Delete every chunk of one source, looked up through the source catalog.
+
+    Returns:
+        Number of chunks deleted.
+    """
+    catalog = _ensure_catalog()
+    chunk_ids = catalog.chunk_ids(source_name)
+    try:
+        for i in range(0, len(chunk_ids), BATCH_SIZE):
+            get_collection().delete(ids=chunk_ids[i : i + BATCH_SIZE])
+        _adjust_count(-len(chunk_ids))
+        get_lexical_index().delete(chunk_ids)
+        catalog.remove(source_name)
+    finally:
+        _query_cache.bump_version()
+    return len(chunk_ids)
+
+
+def replace_sources(
+    chunks: Iterable[dict],
+    progress_callback=None,
+    total: int | None = None,
+    sources: Iterable[str] = (),
+    failed: set[str] | None = None,
+    content_ids: bool = False,
+) -> dict:
+    """Replace every source that appears in ``chunks`` with the chunks given for it.
+
+    New chunks are written first and each source's leftover chunks (e.g. the
+    old tail of a file that got shorter) are deleted afterwards, so sources
+    stay searchable throughout. Sources listed in ``sources`` are replaced
+    even if ``chunks`` has none for them (they end up deleted).
+
+    A source that fails keeps its previous chunks: callers consuming a
+    multi-file stream add the source names of files that failed to parse to
+    ``failed`` while ``chunks`` is being consumed; if the stream itself
+    raises, every source counts as failed and the error is re-raised. The
+    failed sources' newly added IDs are removed again (IDs that already
+    existed keep their new text).
+
+    With ``content_ids`` (chunks from ``load_and_chunk(..., content_ids=True)``)
+    a chunk whose ID is already stored for its source has the same text, so
+    only the new chunks are embedded and written, as in ``sync_source``.
+
+    Returns:
+        Dict with keys: written, unchanged, deleted, sources (number replaced).
+    """
+    catalog = _ensure_catalog()
+    failed = failed if failed is not None else set()
+    old_ids: dict[str, set[str]] = {source: set(catalog.chunk_ids(source)) for source in sources}
+    written_ids: dict[str, set[str]] = {}
+
+    def snapshot(stream: Iterable[dict]):
+        # Runs ahead of the writer, so each source's IDs are read before its first write
+        for chunk in stream:
+            source = chunk["metadata"].get("source", "unknown")
+            if source not in old_ids:
+                old_ids[source] = set(catalog.chunk_ids(source))
+            yield chunk
+
+    written = 0
+    hashes: dict[str, str] = {}
+    try:
+        try:
+            written, hashes = _write_chunks(
+                snapshot(chunks), progress_callback, total, written_ids, old_ids if content_ids else None
+            )
+        except BaseException:
+            failed.update(old_ids)
+            raise
+        finally:
+            stale_ids, rolled_back = [], []
+            for source, before in old_ids.items():
+                after = written_ids.get(source, set())
+                if source in failed:
+                    rolled_back += after - before
+                else:
+                    stale_ids += before - after
+            _delete_chunks(sorted(rolled_back) + sorted(stale_ids))
+        catalog.update({}, {s: hashes.get(s, "") for s in old_ids if s not in failed})
+    finally:
+        _query_cache.bump_version()
+    # With content IDs, a stored ID was skipped rather than written
+    unchanged = {s: written_ids.get(s, set()) & old_ids[s] if content_ids else set() for s in old_ids}
+    return {
+        "written": written - sum(len(ids) for ids in unchanged.values())
+        - sum(len(written_ids.get(s, set()) - unchanged.get(s, set())) for s in failed),
+        "unchanged": sum(len(unchanged[s]) for s in old_ids if s not in failed),
+        "deleted": len(stale_ids),
+        "sources": len(old_ids.keys() - failed),
+    }
+
+
+def replace_source(
+    source_name: str,
+    chunks: Iterable[dict],
+    progress_callback=None,
+    total: int | None = None,
+) -> dict:
+    """Replace all chunks of one source with ``chunks``.
+
+    Works with positional and content-addressed IDs; every chunk is
+    re-embedded (the embedding cache makes unchanged texts cheap), see
+    ``sync_source`` for a diffing re-ingest. If ingest fails the old chunks
+    are kept; see ``replace_sources``.
+
+    Args:
+        source_name: The ``source`` metadata value of every chunk in ``chunks``.
+        chunks: Iterable of dicts with keys: id, text, metadata.
+        progress_callback: Optional callable(done, total) for progress updates.
+        total: Expected number of chunks when ``chunks`` is a generator.
+
+    Returns:
+        Dict with keys: written, deleted.
+    """
+    stats = replace_sources(chunks, progress_callback, total, sources=[source_name])
+    return {"written": stats["written"], "deleted": stats["deleted"]}
+
+
+def sync_source(
+    source_name: str,
+    chunks: Iterable[dict],
+    progress_callback=None,
+    total: int | None = None,
+) -> dict:
+    """Incrementally re-ingest one source using content-addressed chunk IDs.
+
+    Diffs ``chunks`` (from ``iter_chunks``/``load_and_chunk`` with
+    ``content_ids=True``) against the IDs already stored for ``source_name``:
+    only unseen chunks are embedded, chunks that disappeared are deleted, and
+    unchanged chunks whose metadata moved (e.g. a new ``chunk_index``) are
+    updated without re-embedding.
 
+    Args:
+        source_name: The ``source`` metadata value of the file being synced.
+        chunks: Iterable of dicts with keys: id, text, metadata.
+        progress_callback: Optional callable(done, total) over all chunks of the source.
+        total: Expected number of chunks when ``chunks`` is a generator.
+
+    Returns:
+        Dict with keys: added, deleted, unchanged.
+    """
     collection = get_collection()
-    total = len(chunks)
+    lexical = get_lexical_index()
+    catalog = _ensure_catalog()
+    get_document_count()
+    existing_metadata: dict[str, dict] = {}
+    known_ids = catalog.chunk_ids(source_name)
+    for i in range(0, len(known_ids), _GET_BATCH):
+        existing = collection.get(ids=known_ids[i : i + _GET_BATCH], include=["metadatas"])
+        existing_metadata.update(zip(existing["ids"], existing["metadatas"]))
+    seen_ids: set[str] = set()
+    added = 0
+    size = 0
+    content_hash = hashlib.sha1()
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = chunks[i : i + BATCH_SIZE]
-        collection.upsert(
-            ids=[c["id"] for c in batch],
-            documents=[c["text"] for c in batch],
-            metadatas=[c["metadata"] for c in batch],
-        )
-        if progress_callback:
-            progress_callback(min(i + BATCH_SIZE, total), total)
+    def embed_batch(batch: list[dict]):
+        new = [c for c in batch if c["id"] not in existing_metadata]
+        moved = [
+            c for c in batch
+            if c["id"] in existing_metadata and existing_metadata[c["id"]] != c["metadata"]
+        ]
+        return new, encode([c["text"] for c in new]) if new else None, moved
+
+    def write_batch(batch: list[dict], payload):
+        nonlocal added, size
+        new, embeddings, moved = payload
+        seen_ids.update(c["id"] for c in batch)
+        for c in batch:
+            size += len(c["text"].encode("utf-8"))
+            content_hash.update(_chunk_digest(c["text"]))
+        if new:
+            lexical.add(new)  # before Chroma, as in _write_chunks
+            collection.upsert(
+                ids=[c["id"] for c in new],
+                documents=[c["text"] for c in new],
+                metadatas=[c["metadata"] for c in new],
+                embeddings=embeddings,
+            )
+            _adjust_count(len(new))
+            catalog.index_chunks([(source_name, c["id"]) for c in new])
+            added += len(new)
+        if moved:
+            collection.update(
+                ids=[c["id"] for c in moved],
+                metadatas=[c["metadata"] for c in moved],
+            )
+
+    try:
+        processed = run_pipeline(chunks, embed_batch, write_batch, progress_callback=progress_callback, total=total)
+
+        stale_ids = [chunk_id for chunk_id in existing_metadata if chunk_id not in seen_ids]
+        for i in range(0, len(stale_ids), BATCH_SIZE):
+            collection.delete(ids=stale_ids[i : i + BATCH_SIZE])
+        _adjust_count(-len(stale_ids))
+        catalog.unindex_chunks(stale_ids)
+        lexical.delete(stale_ids)
+        catalog.put(source_name, processed, size, content_hash.hexdigest())
+    finally:
+        _query_cache.bump_version()
+
+    return {
+        "added": added,
+        "deleted": len(stale_ids),
+        "unchanged": processed - added,
+    }
+
+
+def _fuse(
+    dense: list[dict],
+    lexical_ids: list[str],
+    query_vector: np.ndarray,
+    collection: VectorBackend,
+    embeddings: dict[str, np.ndarray] | None = None,
+) -> list[dict]:
+    """Merge dense and lexical rankings by weighted reciprocal rank fusion.
+
+    Stored embeddings fetched for lexical-only hits are added to ``embeddings``
+    when it is given.
+    """
+    scores: dict[str, float] = {}
+    for rank, doc in enumerate(dense):
+        scores[doc["id"]] = scores.get(doc["id"], 0.0) + DENSE_WEIGHT / (RRF_K + rank + 1)
+    for rank, chunk_id in enumerate(lexical_ids):
+        scores[chunk_id] = scores.get(chunk_id, 0.0) + LEXICAL_WEIGHT / (RRF_K + rank + 1)
+
+    by_id = {doc["id"]: doc for doc in dense}
+    missing = [chunk_id for chunk_id in lexical_ids if chunk_id not in by_id]
+    if missing:
+        # Lexical-only hits: fetch their text and score their dense distance locally
+        fetched = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        query_unit = query_vector / (np.linalg.norm(query_vector) or 1.0)
+        for chunk_id, text, metadata, embedding in zip(
+            fetched["ids"], fetched["documents"], fetched["metadatas"], fetched["embeddings"]
+        ):
+            embedding = np.asarray(embedding, dtype=np.float32)
+            if embeddings is not None:
+                embeddings[chunk_id] = embedding
+            cosine = float(embedding @ query_unit / (np.linalg.norm(embedding) or 1.0))
+            by_id[chunk_id] = {"id": chunk_id, "text": text, "metadata": metadata, "distance": 1.0 - cosine}
+
+    ranked = sorted((chunk_id for chunk_id in scores if chunk_id in by_id), key=lambda c: -scores[c])
+    return [by_id[chunk_id] for chunk_id in ranked]
+
+
+def _mmr(query_vector: np.ndarray, vectors: np.ndarray, top_k: int, lambda_mult: float) -> list[int]:
+    """Pick ``top_k`` rows of ``vectors`` by maximal marginal relevance.
+
+    Each step takes the candidate maximizing ``lambda_mult * sim(query) -
+    (1 - lambda_mult) * max sim(selected)``. Row 0 (the best-ranked
+    candidate) is always picked first so fused lexical hits keep the top spot.
+    """
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query_unit = query_vector / (np.linalg.norm(query_vector) or 1.0)
+    relevance = vectors @ query_unit
+    similarity = vectors @ vectors.T
 
+    selected = [0]
+    redundancy = similarity[0].copy()
+    available = np.ones(len(vectors), dtype=bool)
+    available[0] = False
+    while len(selected) < min(top_k, len(vectors)):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+def query(question: str, top_k: int = TOP_K, mode: str = RETRIEVAL_MODE) -> list[dict]:
+    """Query the vector store for relevant chunks.
+
+    With HYBRID_SEARCH, dense (HNSW) and lexical (BM25) candidates are fused
+    by reciprocal rank fusion so exact tokens such as part numbers are found.
+    ``mode="mmr"`` over-fetches ``MMR_FETCH_MULTIPLIER * top_k`` candidates and
+    diversifies them by maximal marginal relevance over their stored
+    embeddings (nothing is re-embedded), so near-copies of one chunk do not
+    fill every slot. Repeated questions (after normalization) are answered
+    from the query cache without re-embedding or searching until the next
+    write. A miss costs one encode and one index search; there is no count
+    round-trip first.
+
+    Returns a list of dicts with keys: id, text, metadata, distance.
+    """
+    return query_batch([question], top_k=top_k, mode=mode)[0]
+
+
+def query_batch(questions: list[str], top_k: int = TOP_K, mode: str = RETRIEVAL_MODE) -> list[list[dict]]:
+    """Run ``query`` for many questions with one encoder call and one index search.
+
+    Questions missing from the query cache are embedded together and sent to
+    Chroma as a single multi-query search; fusion and MMR then run per
+    question. Returns one result list per question, each identical to what
+    ``query`` returns for it.
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode}. Supported: {RETRIEVAL_MODES}")
+    results: list[list[dict] | None] = [_query_cache.get(question, top_k, mode) for question in questions]
+    # Duplicate questions are searched once
+    pending: dict[str, list[int]] = {}
+    for i, question in enumerate(questions):
+        if results[i] is None:
+            pending.setdefault(question, []).append(i)
+    if not pending:
+        return results
+    version = _query_cache.version
+
+    # No count check: the index returns what it holds, including chunks that
+    # another process (e.g. ingest.py) wrote after this one started
+    collection = get_collection()
+
+    mmr = mode == "mmr"
+    n_fetch = top_k * MMR_FETCH_MULTIPLIER if mmr else top_k
+    n_candidates = max(n_fetch, top_k * HYBRID_CANDIDATES) if HYBRID_SEARCH else n_fetch
+    batch = list(pending)
+    query_vectors = encode(batch)
+    include = ["documents", "metadatas", "distances"] + (["embeddings"] if mmr else [])
+    found = collection.query(query_embeddings=query_vectors, n_results=n_candidates, include=include)
+
+    for q, question in enumerate(batch):
+        documents = []
+        embeddings: dict[str, np.ndarray] = {}
+        for i in range(len(found["ids"][q])):
+            documents.append({
+                "id": found["ids"][q][i],
+                "text": found["documents"][q][i],
+                "metadata": found["metadatas"][q][i],
+                "distance": found["distances"][q][i],
+            })
+            if mmr:
+                embeddings[documents[-1]["id"]] = found["embeddings"][q][i]
+
+        if HYBRID_SEARCH:
+            lexical_ids = [chunk_id for chunk_id, _ in get_lexical_index().search(question, n_candidates)]
+            documents = _fuse(documents, lexical_ids, query_vectors[q], collection, embeddings if mmr else None)
+        if mmr and len(documents) > top_k:
+            candidates = documents[:n_fetch]
+            vectors = np.asarray([embeddings[doc["id"]] for doc in candidates], dtype=np.float32)
+            documents = [candidates[i] for i in _mmr(query_vectors[q], vectors, top_k, MMR_LAMBDA)]
+        documents = documents[:top_k]
+
+        if documents:
+            # Empty results aren't cached, so a store filled by another process is seen at once
+            _query_cache.put(question, top_k, documents, version=version, mode=mode)
+        for i in pending[question]:
+            results[i] = list(documents)
+    return results
+
+
+def rebuild_lexical_index() -> int:
+    """Rebuild the BM25 index from the chunks stored in Chroma.
+
+    Needed once for collections ingested before hybrid search existed.
+    Returns the number of chunks indexed.
+    """
+    collection = get_collection()
+    lexical = get_lexical_index()
+    lexical.clear()
+    total = collection.count()
+    for offset in range(0, total, BATCH_SIZE):
+        page = collection.get(limit=BATCH_SIZE, offset=offset, include=["documents"])
+        lexical.add([{"id": i, "text": t} for i, t in zip(page["ids"], page["documents"])])
+    _query_cache.bump_version()
     return total
 
 
-def query(question: str, top_k: int = TOP_K) -> list[dict]:
-    """Query the vector store for relevant chunks."""
+def rebuild_source_catalog() -> int:
+    """Rebuild the source catalog by scanning every chunk in Chroma.
+
+    Runs automatically the first time sources are listed for a collection
+    ingested before the catalog existed. Returns the number of sources.
+    """
     collection = get_collection()
-    if collection.count() == 0:
-        return []
+    catalog = get_source_catalog()
+    chunks: dict[str, list[tuple[int, bytes]]] = defaultdict(list)
+    sizes: dict[str, int] = defaultdict(int)
+    total = collection.count()
+    catalog.clear()
+    for offset in range(0, total, BATCH_SIZE):
+        page = collection.get(limit=BATCH_SIZE, offset=offset, include=["documents", "metadatas"])
+        pairs = []
+        for chunk_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            source = metadata.get("source", "unknown")
+            chunks[source].append((metadata.get("chunk_index", 0), _chunk_digest(text)))
+            sizes[source] += len(text.encode("utf-8"))
+            pairs.append((source, chunk_id))
+        catalog.index_chunks(pairs)
+
+    for source, digests in chunks.items():
+        content_hash = hashlib.sha1(b"".join(d for _, d in sorted(digests)))
+        catalog.put(source, len(digests), sizes[source], content_hash.hexdigest())
+    return len(chunks)
 
-    results = collection.query(
-        query_texts=[question],
-        n_results=min(top_k, collection.count()),
-    )
 
-    documents = []
-    for i in range(len(results["ids"][0])):
-        documents.append({
-            "text": results["documents"][0][i],
-            "metadata": results["metadatas"][0][i],
-            "distance": results["distances"][0][i],
-        })
-    return documents
+def _ensure_catalog() -> SourceCatalog:
+    catalog = get_source_catalog()
+    if get_document_count() > 0 and (len(catalog) == 0 or not catalog.has_chunk_index()):
+        rebuild_source_catalog()
+    return catalog
 
 
 def list_sources() -> list[str]:
     """Return a sorted list of unique source names in the store."""
-    collection = get_collection()
-    if collection.count() == 0:
-        return []
+    return _ensure_catalog().names()
+
 
-    all_metadata = collection.get(include=["metadatas"])["metadatas"]
-    sources = sorted({m.get("source", "unknown") for m in all_metadata})
-    return sources
+def list_source_info() -> list[dict]:
+    """Return catalog entries (source, chunks, bytes, ingested_at, content_hash), sorted by source."""
+    return _ensure_catalog().entries()
 
 
 def get_document_count() -> int:
-    """Return total number of chunks in the store."""
-    return get_collection().count()
+    """Return total number of chunks in the store.
+
+    Maintained in memory by the write functions and re-read from the index
+    every _COUNT_TTL seconds, so writes by other processes show up too.
+    """
+    global _count, _count_read_at
+    with _count_lock:
+        if _count is None or time.monotonic() - _count_read_at > _COUNT_TTL:
+            _count = get_collection().count()
+            _count_read_at = time.monotonic()
+        return _count
 
 
 def clear_collection():
     """Delete and recreate the collection."""
-    client = get_client()
-    try:
-        client.delete_collection(CHROMA_COLLECTION)
-    except Exception:
-        pass
+    global _collection, _count
+    if VECTOR_BACKEND == "flat":
+        # The flat index empties in place; its handle stays valid
+        get_collection().clear()
+    else:
+        try:
+            get_client().delete_collection(CHROMA_COLLECTION)
+        except Exception:
+            pass
+        _collection = None
+    with _count_lock:
+        _count = 0
+    get_lexical_index().clear()
+    get_source_catalog().clear()
+    _query_cache.bump_version()
@@ -0,0 +1,73 @@
+"""Tests for the semantic answer cache."""
+
+import numpy as np
+from rag.answer_cache import SemanticAnswerCache, context_fingerprint
+
+DOCS = [
+    {"text": "Q3 revenue reached $7.2 million.", "metadata": {"source": "report.pdf"}},
+    {"text": "Growth was 40% year over year.", "metadata": {"source": "report.pdf"}},
+]
+
+
+def _store(cache, vector, fingerprint, answer="$7.2 million", seconds=2.0):
+    cache.store("what was Q3 revenue?", np.array(vector), fingerprint, answer, ["report.pdf"], 2, seconds)
+
+
+def test_fingerprint_is_order_insensitive():
+    """The same chunk set in a different order has the same fingerprint."""
+    assert context_fingerprint(DOCS) == context_fingerprint(list(reversed(DOCS)))
+    assert context_fingerprint(DOCS) != context_fingerprint(DOCS[:1])
+
+
+def test_similar_question_hits():
+    """A question above the similarity threshold with the same chunks hits."""
+    cache = SemanticAnswerCache(threshold=0.9, capacity=10)
+    fp = context_fingerprint(DOCS)
+    _store(cache, [1.0, 0.0, 0.0], fp)
+
+    entry = cache.lookup(np.array([0.99, 0.05, 0.0]), fp)
+    assert entry is not None
+    assert entry["answer"] == "$7.2 million"
+    assert cache.stats()["saved_generation_seconds"] == 2.0
+
+
+def test_dissimilar_question_misses():
+    """A question below the threshold misses."""
+    cache = SemanticAnswerCache(threshold=0.9, capacity=10)
+    fp = context_fingerprint(DOCS)
+    _store(cache, [1.0, 0.0, 0.0], fp)
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), fp) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_changed_chunks_invalidate_entry():
+    """If retrieval returns different chunks, the entry is dropped."""
+    cache = SemanticAnswerCache(threshold=0.9, capacity=10)
+    _store(cache, [1.0, 0.0, 0.0], context_fingerprint(DOCS))
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), context_fingerprint(DOCS[:1])) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_stale_neighbour_does_not_hide_a_fresh_entry():
+    """A fresh entry above the threshold hits even when a closer one is stale."""
+    cache = SemanticAnswerCache(threshold=0.9, capacity=10)
+    _store(cache, [1.0, 0.0, 0.0], context_fingerprint(DOCS[:1]), answer="stale")
+    _store(cache, [0.95, 0.3, 0.0], context_fingerprint(DOCS), answer="fresh")
+
+    entry = cache.lookup(np.array([1.0, 0.0, 0.0]), context_fingerprint(DOCS))
+    assert entry is not None and entry["answer"] == "fresh"
+    assert cache.stats()["size"] == 2
+
+
+def test_capacity_evicts_least_recently_used():
+    """At capacity, the least recently used answer is evicted."""
+    cache = SemanticAnswerCache(threshold=0.99, capacity=2)
+    fp = context_fingerprint(DOCS)
+    _store(cache, [1.0, 0.0, 0.0], fp, answer="a")
+    _store(cache, [0.0, 1.0, 0.0], fp, answer="b")
+    cache.lookup(np.array([1.0, 0.0, 0.0]), fp)
+    _store(cache, [0.0, 0.0, 1.0], fp, answer="c")
+
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), fp) is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), fp)["answer"] == "a"
+    assert cache.lookup(np.array([0.0, 0.0, 1.0]), fp)["answer"] == "c"
@@ -0,0 +1,109 @@
+"""Tests for bulk multi-file ingestion."""
+
+from unittest.mock import patch
+
+import pytest
+from rag import vector_store
+from rag.bulk_ingest import expand_paths, ingest_paths
+from rag.vector_store import clear_collection, get_collection, get_document_count, get_source_catalog, list_sources
+
+
+@pytest.fixture(autouse=True)
+def clean_collection():
+    """Clear collection before and after each test."""
+    clear_collection()
+    yield
+    clear_collection()
+
+
+def _write_docs(directory, count):
+    paths = []
+    for n in range(count):
+        path = directory / f"doc_{n}.txt"
+        path.write_text(f"Document {n} describes part AX-{n:04d}.\n\nIt ships from warehouse {n % 3}.", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def test_expand_paths(tmp_path):
+    """Directories are searched recursively, globs expand and unsupported files are skipped."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "sub" / "b.csv").write_text("h\n1")
+    (tmp_path / "sub" / "notes.md").write_text("skip")
+    assert [p.name for p in expand_paths([str(tmp_path)])] == ["a.txt", "b.csv"]
+    assert [p.name for p in expand_paths([str(tmp_path / "**" / "*.csv"), str(tmp_path / "sub" / "b.csv")])] == ["b.csv"]
+
+
+def test_ingest_paths_reports_each_file(tmp_path):
+    """Every file is indexed and reported once, with aggregate stats."""
+    paths = _write_docs(tmp_path, 5)
+    events = []
+    stats = ingest_paths(paths, workers=1, file_callback=events.append)
+
+    assert stats["files"] == 5 and stats["failed"] == {}
+    assert stats["chunks"] == get_document_count() == 5
+    assert stats["chunks_per_second"] > 0
+    assert sorted(e["source"] for e in events) == [p.name for p in paths]
+    assert [e["files_done"] for e in events] == [1, 2, 3, 4, 5]
+    assert all(e["chunks"] == 1 and e["error"] is None for e in events)
+
+
+def test_failed_file_keeps_previous_version(tmp_path):
+    """A file that fails to parse is reported and keeps its indexed chunks; others proceed."""
+    paths = _write_docs(tmp_path, 3)
+    ingest_paths(paths, workers=1)
+    paths[1].write_bytes(b"\xff\xfe not utf-8")
+    paths[2].write_text("A rewritten third document.", encoding="utf-8")
+
+    events = []
+    stats = ingest_paths(paths, workers=1, file_callback=events.append)
+    assert list(stats["failed"]) == [str(paths[1])]
+    assert [e["source"] for e in events if e["error"]] == ["doc_1.txt"]
+    assert get_collection().get(where={"source": "doc_1.txt"})["documents"] == [
+        "Document 1 describes part AX-0001.\n\nIt ships from warehouse 1."
+    ]
+    assert get_collection().get(where={"source": "doc_2.txt"})["documents"] == ["A rewritten third document."]
+    assert stats["deleted"] == 1
+    assert get_document_count() == 3
+
+
+def test_parallel_parsing_matches_serial(tmp_path):
+    """The parser pool indexes exactly what in-process parsing does."""
+    paths = _write_docs(tmp_path, 6)
+    ingest_paths(paths, workers=1)
+    serial = sorted(get_collection().get()["ids"])
+    clear_collection()
+
+    stats = ingest_paths(paths, workers=2)
+    assert stats["chunks"] == 6
+    assert sorted(get_collection().get()["ids"]) == serial
+    assert list_sources() == sorted(p.name for p in paths)
+    assert get_source_catalog().get("doc_0.txt")["chunks"] == 1
+
+
+def test_same_file_name_in_two_directories_is_rejected(tmp_path):
+    """Sources are keyed by file name, so clashing names fail before anything is written."""
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "notes.txt").write_text(f"Notes from {sub}.", encoding="utf-8")
+    paths = expand_paths([str(tmp_path)])
+
+    with pytest.raises(ValueError, match="notes.txt"):
+        ingest_paths(paths, workers=1)
+    assert get_document_count() == 0
+
+
+def test_reingest_only_writes_new_chunks(tmp_path):
+    """Chunks already stored under their content ID are not re-embedded or rewritten."""
+    paths = _write_docs(tmp_path, 3)
+    ingest_paths(paths, workers=1)
+    paths[2].write_text("A rewritten third document.", encoding="utf-8")
+
+    with patch("rag.vector_store.encode", wraps=vector_store.encode) as mock_encode:
+        stats = ingest_paths(paths, workers=1)
+    encoded = [text for call in mock_encode.call_args_list for text in call.args[0]]
+    assert encoded == ["A rewritten third document."]
+    assert (stats["chunks"], stats["unchanged"], stats["deleted"]) == (1, 2, 1)
+    assert get_document_count() == 3
+    assert get_source_catalog().get("doc_2.txt")["chunks"] == 1
@@ -1,8 +1,17 @@
 """Tests for the RAG chain module (mocked LLM — no Ollama needed)."""
 
-from unittest.mock import patch
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from rag.chain import build_prompt, ask, ask_stream
+import numpy as np
+import pytest
+from rag.answer_cache import SemanticAnswerCache
+from rag.chain import build_prompt, ask, ask_batch, ask_stream, ask_async, ask_stream_async, warmup
 
 
 MOCK_DOCS = [
@@ -69,7 +78,28 @@ def test_ask_returns_answer(mock_gen, mock_query):
 def test_ask_calls_with_correct_question(mock_gen, mock_query):
     """ask() passes the question to vector_query."""
     ask("When was Acme founded?")
-    mock_query.assert_called_once_with("When was Acme founded?", top_k=5)
+    mock_query.assert_called_once_with("When was Acme founded?", top_k=5, mode="similarity")
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+@patch("rag.chain.generate", return_value="Acme Corp was founded in 2018.")
+def test_ask_selects_retrieval_mode(mock_gen, mock_query):
+    """ask() forwards the retrieval mode to vector_query."""
+    ask("When was Acme founded?", mode="mmr")
+    mock_query.assert_called_once_with("When was Acme founded?", top_k=5, mode="mmr")
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+@patch("rag.chain.generate", return_value="Acme Corp was founded in 2018.")
+def test_ask_reranks_overfetched_candidates(mock_gen, mock_query):
+    """With reranking on, ask() over-fetches and keeps the reranker's top_k."""
+    reranker = MagicMock()
+    reranker.rerank.return_value = MOCK_DOCS[1:]
+    with patch("rag.chain._reranker", reranker):
+        result = ask("Where is Acme?", top_k=1)
+    mock_query.assert_called_once_with("Where is Acme?", top_k=3, mode="similarity")
+    reranker.rerank.assert_called_once_with("Where is Acme?", MOCK_DOCS, 1)
+    assert result["num_chunks"] == 1
 
 
 @patch("rag.chain.vector_query", return_value=MOCK_DOCS)
@@ -88,3 +118,157 @@ def test_ask_stream_yields_tokens(mock_stream, mock_query):
     assert len(metadata) == 1
     assert "sources" in metadata[0]
     assert "sample.txt" in metadata[0]["sources"]
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+@patch("rag.chain.encode", return_value=np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+@patch("rag.chain._answer_cache", new_callable=lambda: SemanticAnswerCache(threshold=0.9, capacity=10))
+def test_semantic_cache_skips_generation(mock_cache, mock_encode, mock_query):
+    """A repeated question is answered from the semantic cache without the LLM."""
+    with patch("rag.chain.generate", return_value="Founded in 2018.") as mock_gen:
+        first = ask("When was Acme founded?")
+        second = ask("when was acme founded")
+    assert mock_gen.call_count == 1
+    assert second == first
+    assert mock_cache.stats()["hits"] == 1
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+@patch("rag.chain.encode", return_value=np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+@patch("rag.chain._answer_cache", new_callable=lambda: SemanticAnswerCache(threshold=0.9, capacity=10))
+def test_semantic_cache_replays_stream(mock_cache, mock_encode, mock_query):
+    """ask_stream() replays a cached answer as tokens followed by metadata."""
+    with patch("rag.chain.generate_stream", return_value=iter(["Acme ", "was ", "founded."])) as mock_stream:
+        first = list(ask_stream("When was Acme founded?"))
+        second = list(ask_stream("When was Acme founded?"))
+    assert mock_stream.call_count == 1
+    assert "".join(t for t in second if isinstance(t, str)) == "Acme was founded."
+    assert len([t for t in second if isinstance(t, str)]) > 1
+    assert second[-1] == first[-1]
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+@patch("rag.chain.generate_async", new_callable=AsyncMock, return_value="Acme Corp was founded in 2018.")
+def test_ask_async_matches_ask(mock_gen, mock_query):
+    """ask_async() returns the same shape of result as ask()."""
+    result = asyncio.run(ask_async("When was Acme founded?"))
+    assert result == {
+        "answer": "Acme Corp was founded in 2018.",
+        "sources": ["sample.txt"],
+        "num_chunks": 2,
+    }
+    mock_query.assert_called_once_with("When was Acme founded?", top_k=5, mode="similarity")
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+def test_ask_stream_async_yields_tokens(mock_query):
+    """ask_stream_async() yields string tokens then a metadata dict."""
+    async def fake_stream(prompt):
+        for token in ["Acme ", "was ", "founded."]:
+            yield token
+
+    async def collect():
+        return [t async for t in ask_stream_async("When was Acme founded?")]
+
+    with patch("rag.chain.generate_stream_async", fake_stream):
+        tokens = asyncio.run(collect())
+
+    assert "".join(t for t in tokens if isinstance(t, str)) == "Acme was founded."
+    assert tokens[-1] == {"sources": ["sample.txt"], "num_chunks": 2}
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+def test_ask_async_serves_concurrent_requests(mock_query):
+    """Many ask_async() calls run concurrently on one event loop."""
+    async def slow_generate(prompt):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run_many():
+        return await asyncio.gather(*(ask_async(f"question {i}") for i in range(20)))
+
+    with patch("rag.chain.generate_async", slow_generate):
+        start = time.perf_counter()
+        results = asyncio.run(run_many())
+        elapsed = time.perf_counter() - start
+
+    assert all(r["answer"] == "ok" for r in results)
+    assert elapsed < 20 * 0.05
+
+
+@patch("rag.chain.vector_query", return_value=MOCK_DOCS)
+def test_ask_batch_matches_ask(mock_query):
+    """ask_batch() returns, in order, what ask() returns for each question."""
+    questions = [f"question {i}" for i in range(7)]
+    fake_generate = lambda prompt: prompt.rsplit("Question: ", 1)[1].split("\n")[0]
+    progress = []
+    with patch("rag.chain.generate", side_effect=fake_generate), \
+            patch("rag.chain.vector_query_batch", side_effect=lambda qs, **kw: [MOCK_DOCS for _ in qs]) as mock_batch:
+        batch = ask_batch(questions, parallelism=3, progress_callback=lambda d, t: progress.append((d, t)))
+        single = [ask(q) for q in questions]
+    assert [{k: v for k, v in r.items() if k != "seconds"} for r in batch] == single
+    assert all(r["seconds"] >= 0 for r in batch)
+    assert [r["answer"] for r in batch] == questions
+    mock_batch.assert_called_once_with(questions, top_k=5, mode="similarity")
+    assert progress[-1] == (7, 7)
+
+
+def test_import_is_lazy():
+    """Importing the chain and server loads none of the heavy libraries."""
+    heavy = ["chromadb", "sentence_transformers", "torch", "openai", "langchain_text_splitters", "pypdf"]
+    code = f"import sys, rag.chain, rag.server, rag.bulk_ingest; print([m for m in {heavy!r} if m in sys.modules])"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_warmup_runs_in_background():
+    """warmup() encodes once, opens the store and loads the reranker on its own thread."""
+    reranker = MagicMock()
+    threads = []
+    record = lambda *args: threads.append(threading.current_thread().name)
+    with patch("rag.chain.encode_local", side_effect=record) as mock_encode, \
+            patch("rag.chain.get_document_count", side_effect=record), \
+            patch("rag.chain.get_source_catalog"), \
+            patch("rag.chain.get_lexical_index"), \
+            patch("rag.chain.get_llm_client") as mock_llm, \
+            patch("rag.chain._reranker", reranker):
+        thread = warmup()
+        thread.join(timeout=5)
+    mock_encode.assert_called_once_with(["warmup"])
+    reranker.load.assert_called_once()
+    mock_llm.assert_called_once()
+    assert threads == ["rag-warmup", "rag-warmup"]
+
+
+@patch("rag.chain.vector_query_batch", side_effect=lambda qs, **kw: [MOCK_DOCS for _ in qs])
+def test_ask_batch_records_failed_generations(mock_batch):
+    """With return_exceptions, one failed generation doesn't lose the other answers."""
+    def fake_generate(prompt):
+        if "question 1" in prompt:
+            raise ConnectionError("LLM unreachable")
+        return "ok"
+
+    with patch("rag.chain.generate", side_effect=fake_generate):
+        results = ask_batch(["question 0", "question 1", "question 2"], return_exceptions=True)
+        with pytest.raises(ConnectionError):
+            ask_batch(["question 1"])
+    assert results[1]["error"] == "ConnectionError: LLM unreachable"
+    assert [r.get("answer") for r in results] == ["ok", None, "ok"]
+    assert all(r["seconds"] >= 0 for r in results)
+
+
+def test_ask_batch_records_failed_retrievals():
+    """With return_exceptions, a failed retrieval only fails its own question."""
+    def fake_query_batch(questions, **kwargs):
+        if "question 1" in questions:
+            raise RuntimeError("index unavailable")
+        return [MOCK_DOCS for _ in questions]
+
+    with patch("rag.chain.vector_query_batch", side_effect=fake_query_batch), \
+            patch("rag.chain.generate", return_value="ok"):
+        results = ask_batch(["question 0", "question 1", "question 2"], return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            ask_batch(["question 1"])
+    assert results[1] == {"error": "RuntimeError: index unavailable", "seconds": 0.0}
+    assert [r.get("answer") for r in results] == ["ok", None, "ok"]
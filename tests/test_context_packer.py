@@ -0,0 +1,68 @@
+"""Tests for token-budgeted context packing."""
+
+from rag.chain import build_prompt
+from rag.context_packer import estimate_tokens, pack_context, render_context
+from rag.document_loader import get_splitter
+
+
+def _doc(text: str, source: str = "doc.txt", index: int | None = None, distance: float = 0.1) -> dict:
+    metadata = {"source": source}
+    if index is not None:
+        metadata["chunk_index"] = index
+    return {"text": text, "metadata": metadata, "distance": distance}
+
+
+def _paragraphs(n: int) -> str:
+    return "\n\n".join(
+        f"Paragraph {i} describes policy number {i} of the handbook in some detail, "
+        f"covering scope, owners and exceptions for case {i}." for i in range(n)
+    )
+
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    """Consecutive chunks of a source become one block with the overlap written once."""
+    text = _paragraphs(60)
+    pieces = get_splitter().split_text(text)
+    assert len(pieces) >= 3
+    docs = [_doc(p, index=i) for i, p in enumerate(pieces[:3])]
+    blocks = pack_context([docs[1], docs[0], docs[2]], token_budget=0)
+    assert len(blocks) == 1
+    assert blocks[0]["text"] in text
+    assert blocks[0]["text"].startswith(pieces[0]) and blocks[0]["text"].endswith(pieces[2])
+    assert blocks[0]["metadata"]["chunk_index"] == 0
+
+
+def test_near_duplicates_dropped():
+    """A chunk that repeats a more relevant one (e.g. the same file under another name) is dropped."""
+    text = "Acme Corp was founded in 2018 by Dr. Sarah Chen in Austin, Texas."
+    blocks = pack_context([_doc(text, "a.txt", 0), _doc(text + " [copy]", "b.txt", 0)], token_budget=0)
+    assert [b["metadata"]["source"] for b in blocks] == ["a.txt"]
+
+
+def test_budget_filled_by_relevance():
+    """Chunks are added in relevance order while they fit; smaller later chunks may still fit."""
+    docs = [
+        _doc("alpha " * 100, "a.txt"),
+        _doc("bravo " * 200, "b.txt"),
+        _doc("charlie delta", "c.txt"),
+    ]
+    budget = estimate_tokens(render_context([docs[0], docs[2]])) + 5
+    blocks = pack_context(docs, token_budget=budget)
+    assert [b["metadata"]["source"] for b in blocks] == ["a.txt", "c.txt"]
+    assert estimate_tokens(render_context(blocks)) <= budget
+
+
+def test_oversized_top_chunk_truncated():
+    """The most relevant chunk is truncated to the budget rather than dropped."""
+    blocks = pack_context([_doc("word " * 1000)], token_budget=50)
+    assert len(blocks) == 1
+    assert estimate_tokens(render_context(blocks)) <= 50
+
+
+def test_build_prompt_respects_budget():
+    """build_prompt keeps the packed context within the token budget."""
+    docs = [_doc(f"Fact {i}: " + "filler text " * 100, f"s{i}.txt") for i in range(10)]
+    unbounded = build_prompt("question", docs, token_budget=0)
+    packed = build_prompt("question", docs, token_budget=400)
+    assert len(packed) < len(unbounded)
+    assert "Fact 0:" in packed
@@ -1,9 +1,11 @@
 """Tests for the document loader module."""
 
+import tracemalloc
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
-from rag.document_loader import load_and_chunk, SUPPORTED_EXTENSIONS
+from rag.document_loader import _iter_text_blocks, iter_chunks, load_and_chunk, SUPPORTED_EXTENSIONS
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
@@ -68,3 +70,102 @@ def test_unsupported_extension():
     """Unsupported file types raise ValueError."""
     with pytest.raises(ValueError, match="Unsupported file type"):
         load_and_chunk("document.docx")
+
+
+def test_content_ids_are_content_addressed():
+    """Content IDs depend on chunk text, not position."""
+    chunks = load_and_chunk(str(DATA_DIR / "sample.txt"), content_ids=True)
+    for chunk in chunks:
+        assert chunk["id"].startswith("sample.txt__")
+        assert "__chunk_" not in chunk["id"]
+    assert len({c["id"] for c in chunks}) == len(chunks)
+
+
+def test_content_ids_survive_insertions(tmp_path):
+    """Prepending a paragraph leaves later chunks' content IDs unchanged."""
+    original = (DATA_DIR / "sample.txt").read_text(encoding="utf-8")
+    edited = tmp_path / "sample.txt"
+    edited.write_text("A brand new opening paragraph.\n\n" + original, encoding="utf-8")
+
+    before = {c["id"] for c in load_and_chunk(str(DATA_DIR / "sample.txt"), content_ids=True)}
+    after = {c["id"] for c in load_and_chunk(str(edited), content_ids=True)}
+    assert before & after
+
+
+def _write_pdf(path: Path, page_texts: list[str]):
+    """Write a minimal PDF with one Helvetica text line per page."""
+    objects = [b"<</Type/Catalog/Pages 2 0 R>>", None, b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(b"<</Length %d>>stream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<</Type/Page/MediaBox[0 0 612 792]/Parent 2 0 R/Resources<</Font<</F1 3 0 R>>>>/Contents %d 0 R>>"
+            % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<</Type/Pages/Kids[%s]/Count %d>>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj%sendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer<</Size %d/Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def test_pdf_chunks_carry_page_metadata(tmp_path):
+    """PDF chunks come out in page order with page metadata."""
+    pdf = tmp_path / "report.pdf"
+    _write_pdf(pdf, [f"Page {n} mentions part AX-{n:04d}." for n in range(6)])
+    chunks = list(iter_chunks(str(pdf)))
+    assert [c["metadata"]["page"] for c in chunks] == list(range(6))
+    assert chunks[3]["text"] == "Page 3 mentions part AX-0003."
+    assert chunks[3]["metadata"]["total_pages"] == 6
+    assert [c["metadata"]["chunk_index"] for c in chunks] == list(range(6))
+
+
+def test_parallel_pdf_extraction_matches_serial(tmp_path):
+    """The worker pool yields exactly what in-process extraction does, in order."""
+    pdf = tmp_path / "long.pdf"
+    _write_pdf(pdf, [f"Section {n} of the long report." for n in range(40)])
+    serial = list(iter_chunks(str(pdf)))
+    with patch("rag.document_loader.PDF_WORKERS", 2), patch("rag.document_loader.PDF_PAGE_WINDOW", 8), \
+            patch("rag.document_loader._PDF_PARALLEL_MIN_PAGES", 1):
+        parallel = list(iter_chunks(str(pdf)))
+    assert parallel == serial
+    assert [c["metadata"]["page"] for c in parallel] == list(range(40))
+
+
+def test_text_blocks_cut_at_paragraphs(tmp_path):
+    """TXT files are read in blocks that reassemble to the file and end at blank lines."""
+    text = "\n\n".join(f"Paragraph {n}. " + "word " * 40 for n in range(200))
+    path = tmp_path / "long.txt"
+    path.write_text(text, encoding="utf-8")
+    blocks = list(_iter_text_blocks(str(path), block_chars=2048))
+    assert len(blocks) > 1
+    assert "".join(blocks) == text
+    assert all(b.startswith("\n\n") for b in blocks[1:])
+
+
+def test_csv_chunks_stream_with_flat_memory(tmp_path):
+    """A large CSV is chunked lazily, with the header repeated in every chunk."""
+    path = tmp_path / "export.csv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("sku,description,price\n")
+        for n in range(100_000):
+            f.write(f"SKU-{n:06d},replacement part number {n},{n % 97}.99\n")
+
+    tracemalloc.start()
+    count = 0
+    for chunk in iter_chunks(str(path)):
+        assert chunk["text"].startswith("sku,description,price\n")
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == len(load_and_chunk(str(path)))
+    assert peak < path.stat().st_size / 4
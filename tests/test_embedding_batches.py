@@ -0,0 +1,38 @@
+"""Tests for length-bucketed, token-budgeted embedding batch planning."""
+
+import numpy as np
+from rag.embedding_batches import estimate_lengths, padded_tokens, plan_batches
+
+
+def test_every_text_planned_once_within_budget():
+    lengths = np.random.default_rng(0).integers(3, 256, size=1000)
+    batches = plan_batches(lengths, token_budget=2048)
+    planned = np.concatenate(batches)
+    assert sorted(planned.tolist()) == list(range(1000))
+    assert all(len(b) * lengths[b].max() <= 2048 for b in batches)
+    # Longest first, so similar lengths share a batch
+    assert lengths[planned].tolist() == sorted(lengths.tolist(), reverse=True)
+
+
+def test_long_text_gets_own_batch_and_short_texts_share():
+    lengths = np.array([10, 600, 10, 10])
+    batches = plan_batches(lengths, token_budget=512, max_texts=2)
+    assert [b.tolist() for b in batches] == [[1], [0, 2], [3]]
+
+
+def test_bucketing_cuts_padding_on_mixed_lengths():
+    """Short CSV-like rows mixed with full chunks pad far less than fixed file-order batches."""
+    texts = ["row,1,2,3"] * 3 + ["x" * 1500] + ["short trailing page text"] * 4
+    lengths = estimate_lengths(texts * 32, max_seq_length=256)
+    fixed = [np.arange(i, min(i + 32, len(lengths))) for i in range(0, len(lengths), 32)]
+    assert padded_tokens(lengths, plan_batches(lengths, 8192)) < padded_tokens(lengths, fixed) / 3
+
+
+def test_estimate_lengths_capped_at_model_limit():
+    assert estimate_lengths(["", "abcd" * 10, "x" * 5000], max_seq_length=256).tolist() == [2, 12, 256]
+
+
+def test_batches_hold_similar_lengths():
+    lengths = np.array([100, 90, 80, 70, 40, 30])
+    batches = plan_batches(lengths, token_budget=10_000)
+    assert [b.tolist() for b in batches] == [[0, 1, 2], [3], [4, 5]]
@@ -0,0 +1,85 @@
+"""Tests for the on-disk embedding cache."""
+
+import numpy as np
+from rag.embedding_cache import EmbeddingCache, text_key
+
+
+def _vectors(n: int, dim: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+
+def test_text_key_is_stable():
+    """Same text always maps to the same key; different texts differ."""
+    assert text_key("hello") == text_key("hello")
+    assert text_key("hello") != text_key("hello!")
+
+
+def test_miss_then_hit(tmp_path):
+    """Stored vectors are returned exactly and counted as hits."""
+    cache = EmbeddingCache(tmp_path, "model", max_bytes=1 << 20)
+    keys = [text_key(t) for t in ["a", "b", "c"]]
+    vecs = _vectors(3)
+
+    assert cache.get_many(keys) == [None, None, None]
+    cache.put_many(keys, vecs)
+    got = cache.get_many(keys)
+
+    assert all(np.array_equal(g, v) for g, v in zip(got, vecs))
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+
+
+def test_persists_across_instances(tmp_path):
+    """A new cache instance over the same directory sees earlier entries."""
+    keys = [text_key("persist me")]
+    vecs = _vectors(1)
+    cache = EmbeddingCache(tmp_path, "model", max_bytes=1 << 20)
+    cache.put_many(keys, vecs)
+    cache.close()
+
+    reopened = EmbeddingCache(tmp_path, "model", max_bytes=1 << 20)
+    assert np.array_equal(reopened.get_many(keys)[0], vecs[0])
+
+
+def test_concurrent_instances_never_share_rows(tmp_path):
+    """Two open instances (e.g. the UI and the ingest CLI) allocate distinct rows."""
+    a = EmbeddingCache(tmp_path, "model", max_bytes=1 << 20)
+    b = EmbeddingCache(tmp_path, "model", max_bytes=1 << 20)
+    x, y = [text_key("x")], [text_key("y")]
+    vx, vy = np.full((1, 8), 1.0, dtype=np.float32), np.full((1, 8), 2.0, dtype=np.float32)
+
+    a.put_many(x, vx)
+    b.put_many(y, vy)
+    b.put_many(x, vy)  # already cached by a: left alone
+
+    for cache in (a, b):
+        got = cache.get_many(x + y)
+        assert np.array_equal(got[0], vx[0]) and np.array_equal(got[1], vy[0])
+
+
+def test_models_are_isolated(tmp_path):
+    """Entries for one model are invisible to another model."""
+    key = [text_key("shared text")]
+    EmbeddingCache(tmp_path, "model-a", max_bytes=1 << 20).put_many(key, _vectors(1))
+    other = EmbeddingCache(tmp_path, "model-b", max_bytes=1 << 20)
+    assert other.get_many(key) == [None]
+
+
+def test_size_based_lru_eviction(tmp_path):
+    """Once full, the least recently used entries are evicted first."""
+    dim = 8
+    cache = EmbeddingCache(tmp_path, "model", max_bytes=10 * dim * 4)
+    first = [text_key(f"first-{i}") for i in range(10)]
+    cache.put_many(first, _vectors(10, dim))
+    cache.get_many(first[5:])  # touch the newer half
+
+    second = [text_key(f"second-{i}") for i in range(5)]
+    cache.put_many(second, _vectors(5, dim, seed=1))
+
+    assert cache.stats()["entries"] <= 10
+    assert all(v is not None for v in cache.get_many(second))
+    assert all(v is not None for v in cache.get_many(first[5:]))
+    assert all(v is None for v in cache.get_many(first[:5]))
+    assert (tmp_path / "model" / "vectors.f32").stat().st_size <= 10 * dim * 4
@@ -0,0 +1,33 @@
+"""Tests for the multi-process embedding pool."""
+
+import numpy as np
+from rag.embedding_pool import EmbeddingPool
+from rag.embeddings import encode_local
+
+
+def test_pool_matches_in_process_encoding():
+    """Pooled vectors equal in-process vectors, in input order."""
+    texts = [f"sentence number {i} about topic {i % 7}" for i in range(40)]
+    expected = encode_local(texts)
+
+    with EmbeddingPool(workers=2) as pool:
+        result = pool.encode(texts)
+
+    assert result.shape == expected.shape
+    assert np.allclose(result, expected, atol=1e-5)
+
+
+def test_pool_empty_input():
+    """Encoding nothing returns an empty matrix without touching workers."""
+    with EmbeddingPool(workers=2) as pool:
+        assert pool.encode([]).shape[0] == 0
+
+
+def test_pool_shuts_down_cleanly():
+    """close() terminates every worker process."""
+    pool = EmbeddingPool(workers=2)
+    pool.warmup()
+    processes = list(pool._executor._processes.values())
+    assert processes
+    pool.close()
+    assert all(not p.is_alive() for p in processes)
@@ -1,7 +1,11 @@
 """Tests for the embedding module."""
 
+from unittest.mock import patch
+
 import numpy as np
-from rag.embeddings import get_model, embed_texts, embed_query, LocalEmbeddingFunction
+import pytest
+from rag.config import NORMALIZE_EMBEDDINGS
+from rag.embeddings import get_model, get_cache, encode, encode_local, embed_texts, embed_query, LocalEmbeddingFunction
 
 
 def test_model_loads():
@@ -48,3 +52,38 @@ def test_chroma_embedding_function():
     result = fn(["test document"])
     assert len(result) == 1
     assert len(result[0]) == 384
+
+
+def test_repeat_embedding_hits_cache():
+    """Embedding the same text twice is served from the embedding cache."""
+    cache = get_cache()
+    if cache is None:
+        pytest.skip("embedding cache disabled")
+    embed_texts(["cache me if you can"])
+    hits_before = cache.stats()["hits"]
+    embed_texts(["cache me if you can"])
+    assert cache.stats()["hits"] == hits_before + 1
+
+
+def test_encode_returns_float32_matrix():
+    """encode() returns a 2-D float32 ndarray, not nested lists."""
+    vectors = encode(["first sentence", "second sentence"])
+    assert isinstance(vectors, np.ndarray)
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (2, 384)
+
+
+def test_encode_normalizes_when_configured():
+    """With NORMALIZE_EMBEDDINGS, vectors have unit length."""
+    if not NORMALIZE_EMBEDDINGS:
+        pytest.skip("normalization disabled")
+    norms = np.linalg.norm(encode(["normalize me", "and me too"]), axis=1)
+    assert np.allclose(norms, 1.0, atol=1e-5)
+
+
+def test_bucketed_encoding_keeps_input_order():
+    """Length-sorted, token-budgeted batches come back in the caller's order."""
+    texts = ["a short row", "x " * 400, "another short row", "a medium length sentence about Acme Corp" * 3]
+    expected = np.stack([encode_local([t])[0] for t in texts])
+    with patch("rag.embeddings.EMBEDDING_BATCH_TOKENS", 300):
+        np.testing.assert_allclose(encode_local(texts), expected, atol=1e-5)
@@ -0,0 +1,119 @@
+"""Tests for the NumPy flat vector index backend."""
+
+import numpy as np
+import pytest
+from rag.flat_index import FlatIndex
+from rag.vector_backend import VectorBackend
+
+
+def _vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _latent_vectors(n: int, dim: int = 128, seed: int = 0) -> np.ndarray:
+    """Vectors with low-rank structure, like sentence embeddings (graded neighbours)."""
+    rng = np.random.default_rng(seed)
+    basis = np.random.default_rng(42).standard_normal((dim, 16)).astype(np.float32)
+    vectors = rng.standard_normal((n, 16)).astype(np.float32) @ basis.T + 0.5 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _recall(index: FlatIndex, vectors: np.ndarray, queries: np.ndarray, k: int = 10) -> float:
+    result = index.query(queries, n_results=k)
+    truth = np.argsort(-(vectors @ queries.T), axis=0)[:k].T
+    hits = [len(set(result["ids"][q]) & {f"c{i}" for i in truth[q]}) for q in range(len(queries))]
+    return sum(hits) / (k * len(queries))
+
+
+def _fill(index: FlatIndex, vectors: np.ndarray) -> list[str]:
+    ids = [f"c{i}" for i in range(len(vectors))]
+    index.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[f"text {i}" for i in range(len(vectors))],
+        metadatas=[{"source": f"s{i % 3}.txt", "chunk_index": i} for i in range(len(vectors))],
+    )
+    return ids
+
+
+def test_implements_backend_interface(tmp_path):
+    assert isinstance(FlatIndex(tmp_path), VectorBackend)
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_query_matches_brute_force(tmp_path, quantization):
+    """Top-k equals an exact cosine ranking, with exact distances after rescoring."""
+    vectors = _vectors(3000)
+    index = FlatIndex(tmp_path, quantization)
+    _fill(index, vectors)
+    queries = _vectors(20, seed=1)
+    assert _recall(index, vectors, queries) == 1.0
+    result = index.query(queries, n_results=10)
+    expected = 1.0 - float(vectors[int(result["ids"][0][0][1:])] @ queries[0])
+    assert result["distances"][0][0] == pytest.approx(expected, abs=1e-5)
+    assert result["distances"][0] == sorted(result["distances"][0])
+    assert result["metadatas"][0][0]["source"].startswith("s")
+
+
+def test_binary_codes_with_rescoring(tmp_path):
+    """Hamming candidates rescored on full-precision vectors recover most true neighbours."""
+    vectors = _latent_vectors(5000)
+    queries = _latent_vectors(30, seed=1)
+    coarse = FlatIndex(tmp_path / "coarse", "binary", rescore=0)
+    rescored = FlatIndex(tmp_path / "rescored", "binary", rescore=10)
+    _fill(coarse, vectors)
+    _fill(rescored, vectors)
+    assert _recall(rescored, vectors, queries) >= 0.9
+    assert _recall(rescored, vectors, queries) > _recall(coarse, vectors, queries)
+    assert (tmp_path / "rescored" / "codes.bits").stat().st_size * 32 == (
+        tmp_path / "rescored" / "vectors.f32"
+    ).stat().st_size
+
+
+def test_delete_reuses_rows_and_persists(tmp_path):
+    """Deleted chunks disappear from results, their rows are reused, and state survives reopening."""
+    vectors = _vectors(1500)
+    index = FlatIndex(tmp_path)
+    ids = _fill(index, vectors)
+    index.delete(ids[:10] + ["missing"])
+    assert index.count() == 1490
+    assert index.query(vectors[:1], n_results=1)["ids"][0] != ["c0"]
+
+    index.upsert(ids=["new"], embeddings=vectors[:1], documents=["new text"], metadatas=[{"source": "n.txt"}])
+    index.update(ids=["c20"], metadatas=[{"source": "moved.txt", "chunk_index": 20}])
+    index.close()
+
+    reopened = FlatIndex(tmp_path)
+    assert reopened.count() == 1491
+    assert reopened.query(vectors[:1], n_results=1)["ids"] == [["new"]]
+    assert reopened.get(where={"source": "moved.txt"})["ids"] == ["c20"]
+    page = reopened.get(limit=5, offset=0, include=["embeddings"])
+    assert page["ids"][0] == "new" and page["embeddings"].shape == (5, 32)
+
+
+def test_get_by_ids_and_clear(tmp_path):
+    index = FlatIndex(tmp_path)
+    _fill(index, _vectors(10))
+    got = index.get(ids=["c3", "c1", "nope"], include=["documents"])
+    assert got["ids"] == ["c3", "c1"] and got["documents"] == ["text 3", "text 1"]
+    index.clear()
+    assert index.count() == 0
+    assert index.query(_vectors(1), n_results=3)["ids"] == [[]]
+
+
+def test_instances_sharing_a_directory(tmp_path):
+    """Two processes' indexes on one directory never hand out the same row."""
+    vectors = _vectors(40)
+    first, second = FlatIndex(tmp_path), FlatIndex(tmp_path)
+    first.upsert(ids=[f"a{i}" for i in range(20)], embeddings=vectors[:20])
+    second.upsert(ids=[f"b{i}" for i in range(20)], embeddings=vectors[20:])
+    assert first.count() == second.count() == 40
+    assert first.query(vectors[25:26], n_results=1)["ids"] == [["b5"]]
+
+    second.delete(["a3"])
+    first.upsert(ids=["c"], embeddings=vectors[3:4])
+    second.upsert(ids=["d"], embeddings=vectors[7:8])
+    ids = set(first.get()["ids"])
+    assert len(ids) == 41 and {"b0", "b19", "c", "d"} <= ids and "a3" not in ids
+    assert second.query(vectors[3:4], n_results=1)["ids"] == [["c"]]
@@ -0,0 +1,171 @@
+"""Tests for the persistent BM25 lexical index."""
+
+import numpy as np
+import pytest
+
+from rag.lexical_index import LexicalIndex, tokenize
+
+CHUNKS = [
+    {"id": "a", "text": "Replace filter part AX-2048 every six months."},
+    {"id": "b", "text": "Error code E1234 means the pump is overheating."},
+    {"id": "c", "text": "The pump and the filter are covered by warranty."},
+]
+
+
+def test_tokenize_keeps_compound_tokens_and_parts():
+    """Part numbers are indexed whole and by their parts; stopwords dropped."""
+    tokens = tokenize("Replace the AX-2048 filter")
+    assert "ax-2048" in tokens
+    assert "ax" in tokens and "2048" in tokens
+    assert "the" not in tokens
+
+
+def test_exact_match_ranks_first(tmp_path):
+    """A query for an exact code returns the chunk containing it first."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3")
+    index.add(CHUNKS)
+    assert index.search("what does E1234 mean", top_k=3)[0][0] == "b"
+    assert index.search("AX-2048", top_k=3)[0][0] == "a"
+
+
+def test_search_scores_are_descending(tmp_path):
+    """Results are ordered by BM25 score."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3")
+    index.add(CHUNKS)
+    scores = [score for _, score in index.search("pump filter", top_k=3)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_no_match_returns_empty(tmp_path):
+    """Unknown terms return no results."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3")
+    index.add(CHUNKS)
+    assert index.search("zzzz", top_k=3) == []
+
+
+def test_delete_and_readd(tmp_path):
+    """Deleted chunks disappear; re-adding an ID replaces its text."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3")
+    index.add(CHUNKS)
+    index.delete(["b"])
+    assert index.search("E1234", top_k=3) == []
+
+    index.add([{"id": "a", "text": "Now about part ZX-9"}])
+    assert index.search("AX-2048", top_k=3) == []
+    assert index.search("ZX-9", top_k=3)[0][0] == "a"
+    assert len(index) == 2
+
+
+def test_persists_across_instances(tmp_path):
+    """The index is reloaded from disk."""
+    path = tmp_path / "lex.sqlite3"
+    index = LexicalIndex(path)
+    index.add(CHUNKS)
+    index.delete(["c"])
+    index.close()
+
+    reopened = LexicalIndex(path)
+    assert len(reopened) == 2
+    assert reopened.search("E1234", top_k=1)[0][0] == "b"
+
+
+def test_segments_are_merged(tmp_path):
+    """Many small adds are merged size-tiered, so a term lives in a few segments."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3", merge_factor=4, background_merge=False)
+    for i in range(20):
+        index.add([{"id": f"doc{i}", "text": f"common term plus unique{i}"}])
+    segments = index._db.execute("SELECT COUNT(DISTINCT seg) FROM postings WHERE term = 'common'").fetchone()[0]
+    assert segments <= 3
+    assert len(index.search("common", top_k=100)) == 20
+
+
+def test_background_merge(tmp_path):
+    """Merges run off the add path; merge() drains them."""
+    index = LexicalIndex(tmp_path / "lex.sqlite3", merge_factor=4)
+    for i in range(20):
+        index.add([{"id": f"doc{i}", "text": f"common term plus unique{i}"}])
+    index.merge()
+    segments = index._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+    assert segments <= 3
+    assert len(index.search("common", top_k=100)) == 20
+    assert [cid for cid, _ in index.search("unique7", top_k=3)] == ["doc7"]
+    index.close()
+
+
+def test_replacing_a_file_repeatedly_stays_bounded(tmp_path):
+    """Re-adding the same chunks compacts dead documents instead of growing forever."""
+    path = tmp_path / "lex.sqlite3"
+    index = LexicalIndex(path, compact_min_dead=20, background_merge=False)
+    chunks = [{"id": f"f.txt__{i}", "text": f"chunk {i} of the manual, version term{i}"} for i in range(10)]
+    for _ in range(30):
+        index.add(chunks)
+    assert len(index) == 10
+    assert len(index._lengths) <= 10 + 20 + 10
+    assert index._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0] <= 10 + 20 + 10
+    assert index._db.execute("SELECT COUNT(*) FROM docs WHERE alive = 1").fetchone()[0] == 10
+    stored = index._db.execute("SELECT SUM(n) FROM postings WHERE term = 'manual'").fetchone()[0]
+    assert stored <= 40
+    assert [cid for cid, _ in index.search("term7", top_k=3)] == ["f.txt__7"]
+    index.close()
+
+    reopened = LexicalIndex(path, compact_min_dead=20)
+    assert len(reopened.search("manual", top_k=50)) == 10
+
+
+def test_trailing_deletes_do_not_reuse_doc_numbers(tmp_path):
+    """A document deleted last is not revived by a new document after reopening."""
+    path = tmp_path / "lex.sqlite3"
+    index = LexicalIndex(path)
+    index.add(CHUNKS)
+    index.delete(["c"])
+    index.close()
+
+    reopened = LexicalIndex(path)
+    reopened.add([{"id": "d", "text": "Unrelated text about invoices."}])
+    assert reopened.search("warranty", top_k=5) == []
+    assert [cid for cid, _ in reopened.search("invoices", top_k=5)] == ["d"]
+
+
+def test_instances_sharing_a_file(tmp_path):
+    """Two processes' indexes on one file allocate distinct documents and see each other's writes."""
+    path = tmp_path / "lex.sqlite3"
+    first, second = LexicalIndex(path), LexicalIndex(path)
+    first.add(CHUNKS[:1])
+    second.add(CHUNKS[1:2])
+    first.add(CHUNKS[2:])
+    assert [cid for cid, _ in first.search("E1234", top_k=3)] == ["b"]
+    assert [cid for cid, _ in second.search("warranty", top_k=3)] == ["c"]
+
+    second.delete(["a"])
+    assert first.search("AX-2048", top_k=3) == []
+    assert len(first) == len(second) == 2
+
+
+def test_search_matches_exhaustive_bm25(tmp_path):
+    """Early-terminated and sparse searches return exactly the best BM25 scores."""
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(300)]
+    weights = 1.0 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+    texts = [" ".join(rng.choice(words, size=int(rng.integers(5, 60)), p=weights)) for _ in range(3000)]
+    texts = [t + f" code{i % 7}" if i % 100 == 0 else t for i, t in enumerate(texts)]
+    index = LexicalIndex(tmp_path / "lex.sqlite3", merge_factor=4, max_df_ratio=1.0, background_merge=False)
+    for base in range(0, len(texts), 250):
+        index.add([{"id": f"d{i}", "text": texts[i]} for i in range(base, base + 250)])
+
+    docs = [tokenize(t) for t in texts]
+    avg_len = sum(map(len, docs)) / len(docs)
+    for query in ["w0 w1", "w3 w40 w120", "w0 w7 w250", "w2", "w280 w299", "code3 code5"]:
+        terms = set(query.split())
+        idf = {t: np.log(1 + (len(docs) - df + 0.5) / (df + 0.5)) for t in terms for df in [sum(t in d for d in docs)]}
+        expected = []
+        for doc in docs:
+            score = 0.0
+            for term in terms:
+                tf = doc.count(term)
+                score += idf[term] * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(doc) / avg_len))
+            if score:
+                expected.append(score)
+        expected.sort(reverse=True)
+        scores = [score for _, score in index.search(query, top_k=10)]
+        assert scores == pytest.approx(expected[:10])
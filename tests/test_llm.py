@@ -0,0 +1,56 @@
+"""Tests for the LLM client module (fake client — no Ollama needed)."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from rag import llm
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        message = SimpleNamespace(content=f"echo: {kwargs['messages'][0]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_generate_async_returns_content():
+    """generate_async() returns the completion text."""
+    completions = _FakeCompletions()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    with patch("rag.llm.get_async_client", return_value=fake_client):
+        assert asyncio.run(llm.generate_async("hi")) == "echo: hi"
+
+
+def test_concurrency_limiter_caps_in_flight_generations():
+    """No more than LLM_MAX_CONCURRENCY generations run at once."""
+    completions = _FakeCompletions()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def run_many():
+        return await asyncio.gather(*(llm.generate_async(str(i)) for i in range(12)))
+
+    with patch("rag.llm.get_async_client", return_value=fake_client), \
+            patch("rag.llm.LLM_MAX_CONCURRENCY", 3):
+        results = asyncio.run(run_many())
+
+    assert len(results) == 12
+    assert completions.peak == 3
+
+
+def test_async_client_is_per_event_loop():
+    """Each event loop gets its own pooled async client, reused within the loop."""
+    async def get_twice():
+        return llm.get_async_client(), llm.get_async_client()
+
+    a1, a2 = asyncio.run(get_twice())
+    b1, _ = asyncio.run(get_twice())
+    assert a1 is a2
+    assert a1 is not b1
@@ -0,0 +1,52 @@
+"""Tests for memory-mapped embedding model snapshots."""
+
+from unittest.mock import patch
+
+import numpy as np
+from rag.config import EMBEDDING_MODEL
+from rag.model_snapshot import load_model, snapshot_path
+
+TEXTS = ["Acme Corp was founded in 2018.", "The office is in Austin, Texas."]
+
+
+def test_snapshot_written_once_then_reused(tmp_path):
+    """The first load writes a snapshot; later loads map it without rebuilding the model."""
+    first = load_model(EMBEDDING_MODEL, tmp_path)
+    path = snapshot_path(EMBEDDING_MODEL, tmp_path)
+    assert path.exists()
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+    with patch("rag.model_snapshot.save_snapshot") as mock_save:
+        second = load_model(EMBEDDING_MODEL, tmp_path)
+    mock_save.assert_not_called()
+    np.testing.assert_allclose(first.encode(TEXTS), second.encode(TEXTS), rtol=1e-6)
+
+
+def test_unreadable_snapshot_is_rebuilt(tmp_path):
+    path = snapshot_path(EMBEDDING_MODEL, tmp_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"truncated")
+    model = load_model(EMBEDDING_MODEL, tmp_path)
+    assert model.encode(TEXTS).shape == (2, 384)
+    assert path.stat().st_size > len(b"truncated")
+
+
+def test_snapshot_name_tracks_model_and_versions(tmp_path):
+    path = snapshot_path("sentence-transformers/all-MiniLM-L6-v2", tmp_path)
+    assert path.parent == tmp_path
+    assert path.name.startswith("sentence-transformers--all-MiniLM-L6-v2-st")
+    assert "-torch" in path.name and path.suffix == ".pt"
+
+
+def test_snapshot_moved_to_preferred_device(tmp_path):
+    """Snapshots are mapped on CPU, then moved to the GPU when one is available."""
+    load_model(EMBEDDING_MODEL, tmp_path)
+    with patch("rag.model_snapshot.preferred_device", return_value="cuda"), \
+            patch("rag.model_snapshot.load_snapshot") as mock_load:
+        model = load_model(EMBEDDING_MODEL, tmp_path)
+    mock_load.return_value.to.assert_called_once_with("cuda")
+    assert model is mock_load.return_value.to.return_value
+
+    with patch("rag.model_snapshot.load_snapshot") as mock_load:
+        load_model(EMBEDDING_MODEL, tmp_path, device="cpu")
+    mock_load.return_value.to.assert_not_called()
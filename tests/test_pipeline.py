@@ -0,0 +1,114 @@
+"""Tests for the streaming ingest pipeline."""
+
+import threading
+
+import pytest
+from rag.pipeline import run_pipeline
+
+
+def _chunks(n: int):
+    for i in range(n):
+        yield {"id": f"c{i}", "text": f"text {i}", "metadata": {"chunk_index": i}}
+
+
+def test_processes_every_chunk_in_order():
+    """All chunks reach the writer, batched and in input order."""
+    written = []
+    count = run_pipeline(
+        _chunks(10),
+        embed_batch=lambda batch: [len(c["text"]) for c in batch],
+        write_batch=lambda batch, payload: written.extend(c["id"] for c in batch),
+        batch_size=3,
+    )
+    assert count == 10
+    assert written == [f"c{i}" for i in range(10)]
+
+
+def test_payload_matches_batch():
+    """The writer receives the embedder's payload for the same batch."""
+    pairs = []
+    run_pipeline(
+        _chunks(5),
+        embed_batch=lambda batch: [c["id"].upper() for c in batch],
+        write_batch=lambda batch, payload: pairs.extend(zip((c["id"] for c in batch), payload)),
+        batch_size=2,
+    )
+    assert all(cid.upper() == up for cid, up in pairs)
+
+
+def test_progress_callback_contract():
+    """progress_callback(done, total) is monotonic and ends at (n, n)."""
+    calls = []
+    run_pipeline(
+        list(_chunks(7)),
+        embed_batch=lambda batch: None,
+        write_batch=lambda batch, payload: None,
+        progress_callback=lambda done, total: calls.append((done, total)),
+        batch_size=3,
+    )
+    assert calls == [(3, 7), (6, 7), (7, 7)]
+
+
+def test_progress_with_generator_never_exceeds_total():
+    """With an unsized generator, done never exceeds the reported total."""
+    calls = []
+    run_pipeline(
+        _chunks(7),
+        embed_batch=lambda batch: None,
+        write_batch=lambda batch, payload: None,
+        progress_callback=lambda done, total: calls.append((done, total)),
+        batch_size=3,
+    )
+    assert all(done <= total for done, total in calls)
+    assert calls[-1] == (7, 7)
+
+
+def test_stages_overlap():
+    """The loader keeps parsing while the first batch is still being embedded."""
+    first_embed_started = threading.Event()
+    loaded_during_embed = threading.Event()
+
+    def chunks():
+        for i, chunk in enumerate(_chunks(6)):
+            if i == 2:
+                first_embed_started.wait(timeout=2)
+            if i == 4 and first_embed_started.is_set():
+                loaded_during_embed.set()
+            yield chunk
+
+    def embed_batch(batch):
+        if not first_embed_started.is_set():
+            first_embed_started.set()
+            loaded_during_embed.wait(timeout=2)
+
+    run_pipeline(chunks(), embed_batch, lambda batch, payload: None, batch_size=2)
+    assert loaded_during_embed.is_set()
+
+
+def test_loader_error_propagates():
+    """An exception while parsing is re-raised in the caller."""
+    def broken():
+        yield from _chunks(2)
+        raise RuntimeError("bad page")
+
+    with pytest.raises(RuntimeError, match="bad page"):
+        run_pipeline(broken(), lambda batch: None, lambda batch, payload: None, batch_size=1)
+
+
+def test_embed_error_propagates():
+    """An exception while embedding is re-raised in the caller."""
+    def embed_batch(batch):
+        raise ValueError("encoder failed")
+
+    with pytest.raises(ValueError, match="encoder failed"):
+        run_pipeline(_chunks(4), embed_batch, lambda batch, payload: None, batch_size=2)
+
+
+def test_writer_error_stops_workers():
+    """An exception while writing stops the other stages and is re-raised."""
+    def write_batch(batch, payload):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        run_pipeline(_chunks(1000), lambda batch: None, write_batch, batch_size=1, queue_depth=1)
+    assert not [t for t in threading.enumerate() if t.name.startswith("ingest-")]
@@ -0,0 +1,75 @@
+"""Tests for the retrieval result cache."""
+
+from unittest.mock import patch
+
+from rag.query_cache import QueryCache, normalize_question
+
+RESULTS = [{"text": "Acme was founded in 2018.", "metadata": {"source": "a.txt"}, "distance": 0.1}]
+
+
+def test_normalize_question():
+    """Case, whitespace and trailing punctuation do not matter."""
+    assert normalize_question("  What was Q3   revenue? ") == normalize_question("what was q3 revenue")
+
+
+def test_hit_after_put():
+    """A stored result is returned for an equivalent question."""
+    cache = QueryCache(capacity=10, ttl=60)
+    assert cache.get("When was Acme founded?", 5) is None
+    cache.put("When was Acme founded?", 5, RESULTS)
+    assert cache.get("when was acme founded", 5) == RESULTS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_top_k_is_part_of_key():
+    """Different top_k values are cached separately."""
+    cache = QueryCache(capacity=10, ttl=60)
+    cache.put("question", 5, RESULTS)
+    assert cache.get("question", 3) is None
+
+
+def test_bump_version_invalidates():
+    """A collection write invalidates all cached results."""
+    cache = QueryCache(capacity=10, ttl=60)
+    cache.put("question", 5, RESULTS)
+    cache.bump_version()
+    assert cache.get("question", 5) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_put_with_stale_version_is_dropped():
+    """Results computed before a write are not cached under the new version."""
+    cache = QueryCache(capacity=10, ttl=60)
+    version = cache.version
+    cache.bump_version()
+    cache.put("question", 5, RESULTS, version=version)
+    assert cache.get("question", 5) is None
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted at capacity."""
+    cache = QueryCache(capacity=2, ttl=60)
+    cache.put("a", 5, RESULTS)
+    cache.put("b", 5, RESULTS)
+    cache.get("a", 5)
+    cache.put("c", 5, RESULTS)
+    assert cache.get("b", 5) is None
+    assert cache.get("a", 5) is not None
+    assert cache.get("c", 5) is not None
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    cache = QueryCache(capacity=10, ttl=60)
+    with patch("rag.query_cache.time.monotonic", return_value=1000.0):
+        cache.put("question", 5, RESULTS)
+    with patch("rag.query_cache.time.monotonic", return_value=1061.0):
+        assert cache.get("question", 5) is None
+
+
+def test_zero_capacity_disables_cache():
+    """Capacity 0 never stores anything."""
+    cache = QueryCache(capacity=0, ttl=60)
+    cache.put("question", 5, RESULTS)
+    assert cache.get("question", 5) is None
@@ -0,0 +1,82 @@
+"""Tests for the cross-encoder reranker (fake model — no download needed)."""
+
+import threading
+
+import numpy as np
+from rag.reranker import Reranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of shared words; optionally blocks until released."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.calls = []
+        self.gate = gate
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(list(pairs))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return np.array([len(set(q.lower().split()) & set(d.lower().split())) for q, d in pairs], dtype=np.float32)
+
+
+DOCS = [
+    {"id": "a", "text": "The cafeteria menu changes weekly.", "metadata": {"source": "a.txt"}},
+    {"id": "b", "text": "Acme Corp was founded in 2018 by Sarah Chen.", "metadata": {"source": "b.txt"}},
+    {"id": "c", "text": "Acme Corp is headquartered in Austin.", "metadata": {"source": "c.txt"}},
+]
+
+
+def _reranker(model, budget_ms=1000.0) -> Reranker:
+    reranker = Reranker("fake", budget_ms=budget_ms)
+    reranker._model = model
+    return reranker
+
+
+def test_rerank_orders_by_score_in_one_batch():
+    """All candidate pairs are scored in a single predict call and the best top_k kept."""
+    model = FakeCrossEncoder()
+    result = _reranker(model).rerank("when was acme corp founded", DOCS, top_k=2)
+    assert [d["id"] for d in result] == ["b", "c"]
+    assert len(model.calls) == 1 and len(model.calls[0]) == 3
+
+
+def test_scores_cached_per_question_and_chunk():
+    """A repeated question only scores chunks it has not seen before."""
+    model = FakeCrossEncoder()
+    reranker = _reranker(model)
+    reranker.rerank("when was acme corp founded", DOCS[:2], top_k=2)
+    reranker.rerank("When was Acme Corp founded?", DOCS, top_k=2)
+    assert [len(c) for c in model.calls] == [2, 1]
+    assert reranker.stats()["hits"] == 2
+
+
+def test_slow_rerank_falls_back_to_dense_order():
+    """Past the latency budget the dense order is returned; late scores still fill the cache."""
+    gate = threading.Event()
+    model = FakeCrossEncoder(gate)
+    reranker = _reranker(model, budget_ms=20)
+    assert [d["id"] for d in reranker.rerank("acme corp founded", DOCS, top_k=2)] == ["a", "b"]
+    assert reranker.stats()["fallbacks"] == 1
+
+    gate.set()
+    reranker._executor.submit(lambda: None).result()
+    assert [d["id"] for d in reranker.rerank("acme corp founded", DOCS, top_k=2)] == ["b", "c"]
+    assert len(model.calls) == 1
+
+
+def test_busy_scorer_is_not_queued_behind():
+    """While a timed-out score is still running, new questions fall back without submitting more work."""
+    gate = threading.Event()
+    model = FakeCrossEncoder(gate)
+    reranker = _reranker(model, budget_ms=20)
+    reranker.rerank("acme corp founded", DOCS, top_k=2)
+    for question in ["where is acme", "what is on the menu", "who founded acme"]:
+        assert [d["id"] for d in reranker.rerank(question, DOCS, top_k=2)] == ["a", "b"]
+    assert reranker.stats()["fallbacks"] == 4
+
+    gate.set()
+    reranker._executor.submit(lambda: None).result()
+    assert len(model.calls) == 1
+    assert [d["id"] for d in reranker.rerank("who founded acme", DOCS, top_k=2)] == ["b", "c"]
+    assert len(model.calls) == 2
@@ -0,0 +1,177 @@
+"""Tests for the HTTP API server, run against a stub OpenAI-compatible LLM endpoint."""
+
+import asyncio
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.error import HTTPError
+
+import pytest
+from rag.server import RAGServer
+from rag.vector_store import clear_collection
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+STUB_TOKENS = ["Acme ", "was ", "founded ", "in ", "2018."]
+
+
+class _StubLLMHandler(BaseHTTPRequestHandler):
+    """Mimics POST /v1/chat/completions of an OpenAI-compatible server."""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for token in STUB_TOKENS:
+                chunk = {
+                    "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(STUB_TOKENS)},
+            }],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    """Start the stub LLM and the RAG server on free ports."""
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), _StubLLMHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+
+    mp = pytest.MonkeyPatch()
+    mp.setattr("rag.llm.OLLAMA_BASE_URL", stub_url)
+    clear_collection()
+
+    server = RAGServer("127.0.0.1", 0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.port}"
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    stub.shutdown()
+    mp.undo()
+    clear_collection()
+
+
+def _request(url: str, data: bytes | None = None, method: str | None = None) -> tuple[int, bytes]:
+    req = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status, resp.read()
+    except HTTPError as e:
+        return e.code, e.read()
+
+
+def _ingest_sample(base_url: str) -> dict:
+    data = (DATA_DIR / "sample.txt").read_bytes()
+    status, body = _request(f"{base_url}/ingest?filename=sample.txt", data=data)
+    assert status == 200
+    return json.loads(body)
+
+
+def test_start_binds_without_loading_models():
+    """start() only binds the socket; warming is left to rag.chain.warmup (skipped by --no-warmup)."""
+    server = RAGServer("127.0.0.1", 0)
+
+    async def start_and_close():
+        await server.start()
+        await server.close()
+
+    with (
+        patch("rag.embeddings.get_cache", return_value=None),
+        patch("rag.embeddings.get_model") as mock_model,
+        patch("rag.vector_store.get_collection") as mock_store,
+    ):
+        asyncio.run(start_and_close())
+    mock_model.assert_not_called()
+    mock_store.assert_not_called()
+    assert server.port != 0
+
+
+def test_health(base_url):
+    """Health endpoint responds."""
+    assert _request(f"{base_url}/health") == (200, b'{"status": "ok"}')
+
+
+def test_ingest_count_and_sources(base_url):
+    """Ingested files show up in /count and /sources."""
+    stats = _ingest_sample(base_url)
+    assert stats["source"] == "sample.txt"
+
+    _, body = _request(f"{base_url}/count")
+    assert json.loads(body)["count"] > 0
+    _, body = _request(f"{base_url}/sources")
+    assert "sample.txt" in json.loads(body)["sources"]
+
+
+def test_ask(base_url):
+    """POST /ask returns the stub LLM's answer with sources."""
+    _ingest_sample(base_url)
+    status, body = _request(f"{base_url}/ask", data=json.dumps({"question": "When was Acme founded?"}).encode())
+    assert status == 200
+    result = json.loads(body)
+    assert result["answer"] == "Acme was founded in 2018."
+    assert "sample.txt" in result["sources"]
+
+
+def test_ask_stream(base_url):
+    """POST /ask/stream emits token events then a done event."""
+    _ingest_sample(base_url)
+    status, body = _request(
+        f"{base_url}/ask/stream", data=json.dumps({"question": "When was Acme founded?"}).encode()
+    )
+    assert status == 200
+    events = [e for e in body.decode().split("\n\n") if e]
+    tokens = [json.loads(e.removeprefix("data: "))["token"] for e in events if e.startswith("data: ")]
+    assert "".join(tokens) == "Acme was founded in 2018."
+    assert events[-1].startswith("event: done")
+
+
+def test_concurrent_asks(base_url):
+    """Several concurrent requests are all served."""
+    _ingest_sample(base_url)
+    results = []
+
+    def ask():
+        results.append(_request(f"{base_url}/ask", data=json.dumps({"question": "Founded?"}).encode()))
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [status for status, _ in results] == [200] * 8
+
+
+def test_errors(base_url):
+    """Bad input maps to 4xx JSON errors."""
+    assert _request(f"{base_url}/nope")[0] == 404
+    assert _request(f"{base_url}/ask")[0] == 405
+    assert _request(f"{base_url}/ask", data=b"not json")[0] == 400
+    assert _request(f"{base_url}/ask", data=b'{"question": ""}')[0] == 400
+    assert _request(f"{base_url}/ingest?filename=evil.exe", data=b"x")[0] == 400
@@ -0,0 +1,64 @@
+"""Tests for the persistent source catalog."""
+
+from rag.source_catalog import SourceCatalog
+
+
+def test_put_and_reopen(tmp_path):
+    """Entries survive reopening the catalog."""
+    catalog = SourceCatalog(tmp_path / "sources.sqlite3")
+    catalog.put("b.txt", 3, 120, "hash-b")
+    catalog.put("a.pdf", 1, 40, "hash-a")
+    catalog.close()
+
+    reopened = SourceCatalog(tmp_path / "sources.sqlite3")
+    assert reopened.names() == ["a.pdf", "b.txt"]
+    entry = reopened.get("b.txt")
+    assert (entry["chunks"], entry["bytes"], entry["content_hash"]) == (3, 120, "hash-b")
+    assert entry["ingested_at"] > 0
+
+
+def test_update_applies_deltas(tmp_path):
+    """Deltas accumulate per source and a source reaching zero chunks is dropped."""
+    catalog = SourceCatalog(tmp_path / "sources.sqlite3")
+    catalog.update({"a.txt": (2, 100), "b.txt": (1, 10)})
+    catalog.update({"a.txt": (1, 5)}, {"a.txt": "hash"})
+    assert catalog.get("a.txt")["chunks"] == 3
+    assert catalog.get("a.txt")["bytes"] == 105
+    assert catalog.get("a.txt")["content_hash"] == "hash"
+    catalog.update({"b.txt": (-1, -10)})
+    assert "b.txt" not in catalog
+
+
+def test_put_zero_chunks_removes(tmp_path):
+    """Recording an empty source removes it."""
+    catalog = SourceCatalog(tmp_path / "sources.sqlite3")
+    catalog.put("a.txt", 2, 10, "h")
+    catalog.put("a.txt", 0, 0, "")
+    assert len(catalog) == 0
+
+
+def test_clear(tmp_path):
+    """clear() forgets every source, persistently."""
+    catalog = SourceCatalog(tmp_path / "sources.sqlite3")
+    catalog.put("a.txt", 2, 10, "h")
+    catalog.clear()
+    assert catalog.entries() == []
+    assert len(SourceCatalog(tmp_path / "sources.sqlite3")) == 0
+
+
+def test_sees_writes_from_another_connection(tmp_path):
+    """A long-lived catalog picks up sources recorded by another process."""
+    path = tmp_path / "sources.sqlite3"
+    app = SourceCatalog(path)
+    assert app.names() == []
+
+    ingest = SourceCatalog(path)
+    ingest.put("a.txt", 2, 10, "h")
+    ingest.update({"b.txt": (1, 5)})
+    assert app.names() == ["a.txt", "b.txt"]
+    assert "a.txt" in app and len(app) == 2
+
+    app.update({"a.txt": (1, 5)})
+    ingest.remove("b.txt")
+    assert ingest.get("a.txt")["chunks"] == 3
+    assert app.names() == ["a.txt"]
@@ -1,13 +1,27 @@
 """Tests for the vector store module."""
 
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
 import pytest
+import rag.vector_store as vector_store
+from rag.document_loader import _assign_content_ids
 from rag.vector_store import (
     add_documents,
     query,
     list_sources,
+    list_source_info,
+    get_source_catalog,
     get_document_count,
     clear_collection,
     get_collection,
+    get_query_cache,
+    sync_source,
+    delete_source,
+    replace_source,
+    query_batch,
 )
 
 
@@ -103,3 +117,257 @@ def test_upsert_deduplication():
     assert get_document_count() == 3
     add_documents(SAMPLE_CHUNKS)
     assert get_document_count() == 3
+
+
+def _content_chunks(texts: list[str]) -> list[dict]:
+    chunks = [
+        {"id": "", "text": text, "metadata": {"source": "doc.txt", "chunk_index": i}}
+        for i, text in enumerate(texts)
+    ]
+    return _assign_content_ids(chunks)
+
+
+def test_sync_source_adds_all_on_first_ingest():
+    """First sync embeds every chunk."""
+    stats = sync_source("doc.txt", _content_chunks(["alpha", "beta", "gamma"]))
+    assert stats == {"added": 3, "deleted": 0, "unchanged": 0}
+    assert get_document_count() == 3
+
+
+def test_sync_source_only_embeds_changed_chunks():
+    """Re-syncing an edited source adds new chunks and deletes vanished ones."""
+    sync_source("doc.txt", _content_chunks(["alpha", "beta", "gamma"]))
+    stats = sync_source("doc.txt", _content_chunks(["intro", "alpha", "gamma"]))
+    assert stats == {"added": 1, "deleted": 1, "unchanged": 2}
+    assert get_document_count() == 3
+
+    stored = get_collection().get(where={"source": "doc.txt"})
+    assert sorted(stored["documents"]) == ["alpha", "gamma", "intro"]
+    indexes = {doc: meta["chunk_index"] for doc, meta in zip(stored["documents"], stored["metadatas"])}
+    assert indexes == {"intro": 0, "alpha": 1, "gamma": 2}
+
+
+def test_sync_source_leaves_other_sources_alone():
+    """Syncing one source never deletes another source's chunks."""
+    add_documents(SAMPLE_CHUNKS)
+    sync_source("doc.txt", _content_chunks(["alpha"]))
+    assert get_document_count() == 4
+
+
+def test_add_documents_accepts_generator():
+    """add_documents streams chunks from a generator."""
+    progress = []
+    count = add_documents(
+        (c for c in SAMPLE_CHUNKS),
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+    assert count == 3
+    assert get_document_count() == 3
+    assert progress[-1] == (3, 3)
+
+
+def test_repeat_query_served_from_cache():
+    """A repeated question skips the encoder and the index search."""
+    add_documents(SAMPLE_CHUNKS)
+    first = query("When was Acme Corp founded?", top_k=2)
+    with patch("rag.vector_store.encode") as mock_encode:
+        second = query("when was acme corp founded", top_k=2)
+    mock_encode.assert_not_called()
+    assert second == first
+
+
+def test_writes_invalidate_query_cache():
+    """add_documents and clear_collection invalidate cached results."""
+    hits_before = get_query_cache().stats()["hits"]
+    add_documents(SAMPLE_CHUNKS[:1])
+    assert len(query("revenue", top_k=5)) == 1
+    add_documents(SAMPLE_CHUNKS)
+    assert len(query("revenue", top_k=5)) == 3
+    clear_collection()
+    assert query("revenue", top_k=5) == []
+    assert get_query_cache().stats()["hits"] == hits_before
+
+
+def test_hybrid_search_finds_exact_codes():
+    """Exact identifiers are retrieved through the lexical index."""
+    chunks = SAMPLE_CHUNKS + [
+        {
+            "id": "parts.csv__chunk_0",
+            "text": "sku,description\nZQ-77812,replacement hinge assembly",
+            "metadata": {"source": "parts.csv", "chunk_index": 0},
+        },
+    ]
+    add_documents(chunks)
+    results = query("ZQ-77812", top_k=2)
+    assert results[0]["id"] == "parts.csv__chunk_0"
+    assert all(r["distance"] is not None for r in results)
+
+
+def test_query_reuses_collection_handle_and_count():
+    """After warm-up, a query makes no get_or_create or count round-trips."""
+    add_documents(SAMPLE_CHUNKS)
+    assert get_document_count() == 3
+    collection = get_collection()
+    with patch.object(type(collection), "count") as mock_count, \
+            patch("rag.vector_store.get_client") as mock_client:
+        assert len(query("Who founded Acme Corp?", top_k=2)) == 2
+    mock_count.assert_not_called()
+    mock_client.assert_not_called()
+    assert get_collection() is collection
+
+
+def test_sees_chunks_written_by_another_process():
+    """A long-running process that started on an empty store finds chunks ingested by ingest.py."""
+    assert get_document_count() == 0
+    code = (
+        "from rag.vector_store import add_documents; "
+        f"add_documents({SAMPLE_CHUNKS[:1]!r})"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    assert [r["id"] for r in query("Who founded Acme Corp?")] == [SAMPLE_CHUNKS[0]["id"]]
+    with patch("rag.vector_store._COUNT_TTL", 0):
+        assert get_document_count() == 1
+
+
+def test_count_tracks_sync_deletes():
+    """The in-memory count follows sync_source additions and deletions."""
+    sync_source("doc.txt", _content_chunks(["alpha", "beta", "gamma"]))
+    sync_source("doc.txt", _content_chunks(["alpha"]))
+    assert get_document_count() == 1 == get_collection().count()
+
+
+def test_list_sources_reads_catalog():
+    """Listing sources does not scan chunk metadata."""
+    add_documents(SAMPLE_CHUNKS)
+    with patch.object(type(get_collection()), "get") as mock_get:
+        assert list_sources() == ["report.pdf", "test.txt"]
+    mock_get.assert_not_called()
+    info = {e["source"]: e for e in list_source_info()}
+    assert info["test.txt"]["chunks"] == 2
+    assert info["test.txt"]["bytes"] == sum(len(c["text"]) for c in SAMPLE_CHUNKS[:2])
+
+
+def test_catalog_follows_sync_source():
+    """sync_source records the new chunk count and content hash."""
+    sync_source("doc.txt", _content_chunks(["alpha", "beta", "gamma"]))
+    before = get_source_catalog().get("doc.txt")
+    sync_source("doc.txt", _content_chunks(["alpha", "gamma"]))
+    after = get_source_catalog().get("doc.txt")
+    assert (before["chunks"], after["chunks"]) == (3, 2)
+    assert after["bytes"] == len("alpha") + len("gamma")
+    assert after["content_hash"] != before["content_hash"]
+
+    sync_source("doc.txt", _content_chunks(["alpha", "gamma"]))
+    assert get_source_catalog().get("doc.txt")["content_hash"] == after["content_hash"]
+
+
+def test_catalog_rebuilt_for_existing_collection():
+    """A collection without a catalog is scanned once, with the same hashes ingest records."""
+    sync_source("doc.txt", _content_chunks(["alpha", "beta"]))
+    add_documents(SAMPLE_CHUNKS)
+    expected = list_source_info()
+    get_source_catalog().clear()
+    rebuilt = list_source_info()
+    assert [(e["source"], e["chunks"], e["bytes"], e["content_hash"]) for e in rebuilt] == [
+        (e["source"], e["chunks"], e["bytes"], e["content_hash"]) for e in expected
+    ]
+
+
+def test_delete_source_removes_only_that_source():
+    """delete_source drops one source's chunks, catalog entry and lexical postings."""
+    add_documents(SAMPLE_CHUNKS)
+    with patch.object(type(get_collection()), "get") as mock_get:
+        assert delete_source("test.txt") == 2
+    mock_get.assert_not_called()
+    assert get_document_count() == 1 == get_collection().count()
+    assert list_sources() == ["report.pdf"]
+    assert all(r["metadata"]["source"] == "report.pdf" for r in query("Acme Corp founded", top_k=3))
+    assert delete_source("missing.txt") == 0
+
+
+def test_replace_source_drops_orphans():
+    """Replacing a source with a shorter version leaves no positional orphans."""
+    add_documents(SAMPLE_CHUNKS)
+    shorter = [{
+        "id": "test.txt__chunk_0",
+        "text": "Acme Corp was founded in 2019.",
+        "metadata": {"source": "test.txt", "chunk_index": 0},
+    }]
+    stats = replace_source("test.txt", shorter)
+    assert stats == {"written": 1, "deleted": 1}
+    stored = get_collection().get(where={"source": "test.txt"})
+    assert stored["documents"] == ["Acme Corp was founded in 2019."]
+    assert get_document_count() == 2
+    entry = get_source_catalog().get("test.txt")
+    assert (entry["chunks"], entry["bytes"]) == (1, len(shorter[0]["text"]))
+
+
+def test_replace_source_failure_keeps_old_version():
+    """A failed replace removes the partial new chunks and keeps the old ones."""
+    add_documents(SAMPLE_CHUNKS[:1])
+
+    def broken():
+        yield {"id": "test.txt__new_0", "text": "partial", "metadata": {"source": "test.txt", "chunk_index": 0}}
+        raise RuntimeError("parse error")
+
+    with pytest.raises(RuntimeError):
+        replace_source("test.txt", broken())
+    stored = get_collection().get(where={"source": "test.txt"})
+    assert stored["ids"] == ["test.txt__chunk_0"]
+    assert get_document_count() == 1
+    assert get_source_catalog().get("test.txt")["chunks"] == 1
+
+
+def test_mmr_mode_diversifies_near_copies():
+    """MMR skips near-copies of an already selected chunk that similarity search returns."""
+    copies = [
+        {
+            "id": f"batch.csv__chunk_{i}",
+            "text": f"Acme Corp was founded in 2018 by Dr. Sarah Chen. Row {i}.",
+            "metadata": {"source": "batch.csv", "chunk_index": i},
+        }
+        for i in range(4)
+    ]
+    add_documents(copies + SAMPLE_CHUNKS[1:])
+    similar = query("Who founded Acme Corp?", top_k=2, mode="similarity")
+    diverse = query("Who founded Acme Corp?", top_k=2, mode="mmr")
+    assert {r["metadata"]["source"] for r in similar} == {"batch.csv"}
+    assert diverse[0]["id"] == similar[0]["id"]
+    assert diverse[1]["metadata"]["source"] != "batch.csv"
+
+
+def test_unknown_retrieval_mode_rejected():
+    """An unsupported mode raises ValueError."""
+    with pytest.raises(ValueError):
+        query("anything", mode="random")
+
+
+def test_query_batch_matches_query_with_one_search():
+    """query_batch embeds all questions in one call and issues one index search."""
+    add_documents(SAMPLE_CHUNKS)
+    questions = ["Who founded Acme Corp?", "What was Q3 revenue?", "Which languages does the team use?"]
+    collection = get_collection()
+    with patch("rag.vector_store.encode", wraps=vector_store.encode) as mock_encode, \
+            patch.object(type(collection), "query", autospec=True, side_effect=type(collection).query) as mock_search:
+        batch = query_batch(questions, top_k=2)
+    assert mock_encode.call_count == 1 and mock_search.call_count == 1
+    get_query_cache().bump_version()
+    assert batch == [query(q, top_k=2) for q in questions]
+
+
+def test_flat_backend_serves_store_operations(tmp_path):
+    """With VECTOR_BACKEND="flat" the store writes, queries, deletes and clears through FlatIndex."""
+    with patch("rag.vector_store.VECTOR_BACKEND", "flat"), \
+            patch("rag.vector_store.FLAT_INDEX_DIR", str(tmp_path / "flat")), \
+            patch("rag.vector_store._collection", None), \
+            patch("rag.vector_store._count", None):
+        assert type(get_collection()).__name__ == "FlatIndex"
+        add_documents(SAMPLE_CHUNKS)
+        assert get_document_count() == 3
+        assert query("When was Acme Corp founded?", top_k=1)[0]["id"] == "test.txt__chunk_0"
+        assert delete_source("test.txt") == 2
+        assert get_collection().count() == 1
+        clear_collection()
+        assert get_collection().count() == 0